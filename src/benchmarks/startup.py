@@ -0,0 +1,48 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from cli_app.command_loader import discover_folders_with_commands, load_command_tree, load_commands
+from cli_app.manifest_cache import load_commands_cached
+from benchmarks.synthetic_tree import create_command_tree
+
+def time_call(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def cold_call(function) -> float:
+    # Each cold stage starts without the manifest, metadata and description caches of the previous one.
+    shutil.rmtree('.cli_app_cache', ignore_errors=True)
+    return time_call(function)
+
+def run_benchmark(folders: int, commands_per_folder: int, noise_dirs: int) -> dict[str, float]:
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        create_command_tree(Path(temp_dir), folders * commands_per_folder, folders, noise_dirs=noise_dirs)
+        os.chdir(temp_dir)
+        try:
+            return {
+                'uncached': time_call(lambda: load_commands(discover_folders_with_commands())),
+                'walker': cold_call(load_command_tree),
+                'cold': cold_call(load_commands_cached),
+                'warm': time_call(load_commands_cached),
+            }
+        finally:
+            os.chdir(cwd)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare uncached, single-pass, cold and warm command discovery.")
+    parser.add_argument("--folders", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=50)
+    parser.add_argument("--noise-dirs", type=int, default=1000)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.folders, args.commands, args.noise_dirs)
+    for name, seconds in results.items():
+        print(f"{name:<10}{seconds * 1000:10.2f} ms")
+
+if __name__ == "__main__":
+    main()
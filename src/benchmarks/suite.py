@@ -0,0 +1,200 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+from cli_app.cli_helpers import get_help
+from cli_app.command_index import CommandCatalog, CommandMap
+from cli_app.command_loader import discover_folders_with_commands, load_command_tree, load_commands
+from cli_app.command_runner import find_command_in_folders, module_registry, run_command
+from cli_app.command_search import CommandSearchIndex
+from cli_app.manifest_cache import load_commands_cached
+from benchmarks.synthetic_tree import create_command_tree
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+LOOKUPS = 1000
+RUNS = 20
+SUGGESTIONS = 100
+SUGGEST_SIZE = 100000
+
+def measure(function: Callable[[], object], repeat: int) -> dict[str, float]:
+    best = min(time_once(function) for _ in range(repeat))
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': best, 'peak_bytes': peak}
+
+def measure_retained(build: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Like measure, but peak_bytes is the memory still held by what build returns."""
+    best = min(time_once(build) for _ in range(repeat))
+
+    tracemalloc.start()
+    try:
+        built = build()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+
+    return {'seconds': best, 'peak_bytes': retained}
+
+def time_once(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def benchmark_size(commands: int, folders: int, depth: int, repeat: int) -> dict[str, dict[str, float]]:
+    prefix = f"bench{commands}_folder"
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        importable = create_command_tree(Path(temp_dir), commands, folders, depth, prefix=prefix)
+        os.chdir(temp_dir)
+        sys.path.insert(0, temp_dir)
+        try:
+            folder_names = discover_folders_with_commands()
+            catalog = load_commands(folder_names)
+            names = [command for folder in catalog.values() for command in folder][:LOOKUPS]
+            targets = [(folder, commands[0]) for folder, commands in importable.items() if commands][:RUNS]
+
+            def find_all() -> None:
+                for name in names:
+                    find_command_in_folders(catalog, name)
+
+            typos = [f"{name[1]}{name[0]}{name[2:]}" for name in names[:SUGGESTIONS]]
+            search_index = CommandSearchIndex(command for folder in catalog.values() for command in folder)
+            search_index.suggest("warm")
+
+            def suggest_all() -> None:
+                for typo in typos:
+                    search_index.suggest(typo)
+
+            def run_all() -> None:
+                for folder, command in targets:
+                    run_command(folder, command)
+
+            def run_all_cold() -> None:
+                module_registry.clear()
+                for module_name in [name for name in sys.modules if name.startswith(prefix)]:
+                    del sys.modules[module_name]
+                run_all()
+
+            # The catalog as loaded from the manifest, nested dicts against the compact representation.
+            dict_manifest = json.dumps({folder: dict(commands) for folder, commands in catalog.items()})
+            compact_manifest = json.dumps(catalog.to_manifest())
+
+            load_commands_cached()
+            return {
+                'discover': measure(discover_folders_with_commands, repeat),
+                'load': measure(lambda: load_commands(folder_names), repeat),
+                'walk': measure(load_command_tree, repeat),
+                'manifest_warm': measure(load_commands_cached, repeat),
+                'find_per_lookup': per_call(measure(find_all, repeat), len(names)),
+                'suggest_per_lookup': per_call(measure(suggest_all, repeat), len(typos)),
+                'run_cold_per_command': per_call(measure(run_all_cold, 1), len(targets)),
+                'run_warm_per_command': per_call(measure(run_all, repeat), len(targets)),
+                'help': measure(lambda: get_help(catalog, None), repeat),
+                'catalog_dict_memory': measure_retained(lambda: CommandMap(json.loads(dict_manifest)), repeat),
+                'catalog_compact_memory': measure_retained(lambda: CommandCatalog.from_manifest(json.loads(compact_manifest)), repeat),
+            }
+        finally:
+            sys.path.remove(temp_dir)
+            os.chdir(cwd)
+            module_registry.clear()
+            for module_name in [name for name in sys.modules if name.startswith(prefix)]:
+                del sys.modules[module_name]
+
+def benchmark_suggestions(size: int, repeat: int) -> dict[str, dict[str, float]]:
+    """The "did you mean" index on its own, at a catalog size the file tree stages do not reach."""
+    names = [f"command{number}" for number in range(size)]
+    typos = [f"{name[1]}{name[0]}{name[2:]}" for name in names[::max(1, size // SUGGESTIONS)]]
+    search_index = CommandSearchIndex(names)
+    changed_names = names[:-10] + [f"added{number}" for number in range(10)]
+
+    def suggest_all() -> None:
+        for typo in typos:
+            search_index.suggest(typo)
+
+    return {
+        'search_index_build': measure(lambda: CommandSearchIndex(names), 1),
+        'search_index_update': measure(lambda: search_index.updated(changed_names), repeat),
+        'suggest_per_lookup': per_call(measure(suggest_all, repeat), len(typos)),
+    }
+
+def per_call(result: dict[str, float], calls: int) -> dict[str, float]:
+    return {**result, 'seconds': result['seconds'] / max(calls, 1)}
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if previous and result['seconds'] > previous['seconds'] * (1 + threshold):
+                regressions.append(f"{size} {stage}: {previous['seconds'] * 1000:.3f} ms -> {result['seconds'] * 1000:.3f} ms")
+    return regressions
+
+def print_results(results: dict, baseline: dict) -> None:
+    print(f"{'size':>8}  {'stage':<22}{'time ms':>12}{'peak KiB':>12}{'baseline':>10}")
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            change = f"{(result['seconds'] / previous['seconds'] - 1) * 100:+.0f}%" if previous and previous['seconds'] else "-"
+            print(f"{size:>8}  {stage:<22}{result['seconds'] * 1000:>12.3f}{result['peak_bytes'] / 1024:>12.1f}{change:>10}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark discovery, loading, dispatch and help rendering.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of commands, 10 to 100000.")
+    parser.add_argument("--commands-per-folder", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=2, help="Levels of nested subfolders inside command folders.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per stage, the best one is kept.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown against the baseline.")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    results = {}
+    for size in args.sizes:
+        folders = max(1, size // args.commands_per_folder)
+        results[str(size)] = benchmark_size(size, folders, args.depth, args.repeat)
+    results[f"{SUGGEST_SIZE}n"] = benchmark_suggestions(SUGGEST_SIZE, args.repeat)
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        baseline = {}
+
+    print_results(results, baseline)
+    for size, stages in results.items():
+        if 'catalog_dict_memory' not in stages:
+            continue
+        dict_bytes = stages['catalog_dict_memory']['peak_bytes']
+        compact_bytes = stages['catalog_compact_memory']['peak_bytes']
+        print(f"{size:>8}  catalog memory: {compact_bytes / 1024:.1f} KiB compact, {dict_bytes / 1024:.1f} KiB as dicts ({(1 - compact_bytes / dict_bytes) * 100:.0f}% saved)")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({**baseline, **results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+COMMAND_SOURCE = "def run(args=None):\n    pass\n"
+
+def create_command_tree(
+    root: Path,
+    commands: int,
+    folders: int,
+    depth: int = 0,
+    noise_dirs: int = 0,
+    prefix: str = "folder"
+) -> dict[str, list[str]]:
+    """
+    Writes `commands` command files spread over `folders` command folders under `root`.
+    With `depth` > 0 part of each folder's commands live in nested subfolders, down to `depth` levels.
+    Returns the top level (importable) commands per folder.
+    """
+    folders = max(1, min(folders, commands))
+    descriptions: dict[str, dict] = {}
+    importable: dict[str, list[str]] = {}
+
+    for command_index in range(commands):
+        folder_name = f"{prefix}{command_index % folders}"
+        folder = root / folder_name
+        if folder_name not in descriptions:
+            (folder / "lib").mkdir(parents=True)
+            (folder / "__init__.py").touch()
+            descriptions[folder_name] = {}
+            importable[folder_name] = []
+
+        level = (command_index // folders) % (depth + 1)
+        command_folder = folder.joinpath(*[f"level{index}" for index in range(level)])
+        command_folder.mkdir(parents=True, exist_ok=True)
+
+        command_name = f"command{command_index}"
+        (command_folder / f"{command_name}.py").write_text(COMMAND_SOURCE)
+        descriptions[folder_name][command_name] = {"description": f"Description of {command_name}"}
+        if level == 0:
+            importable[folder_name].append(command_name)
+
+    for noise_index in range(noise_dirs):
+        (root / "data" / f"dir{noise_index}" / "nested").mkdir(parents=True)
+
+    (root / "command_descriptions.json").write_text(json.dumps(descriptions))
+    return importable
@@ -0,0 +1,72 @@
+import threading
+from typing import Any, Optional
+from shared.lazy_import import lazy_import
+
+# Only commands that declare `arguments` need it.
+argparse = lazy_import('argparse')
+
+parsers: dict[str, tuple[Any, 'argparse.ArgumentParser']] = {}
+parsers_lock = threading.Lock()
+
+class ArgumentSchemaError(ValueError):
+    pass
+
+def raise_argument_error(message: str) -> None:
+    raise ArgumentSchemaError(message)
+
+def compile_schema(schema: list[dict[str, Any]], prog: str) -> 'argparse.ArgumentParser':
+    """
+    Builds a parser from a command's `arguments` list. Each entry has a 'name' ('path', '--count'
+    or a list like ['-n', '--count']), the other keys are passed to argparse's add_argument.
+    """
+    parser = argparse.ArgumentParser(prog=prog, add_help=False, exit_on_error=False)
+    parser.error = raise_argument_error
+    for spec in schema:
+        options = dict(spec)
+        names = options.pop('name')
+        parser.add_argument(*([names] if isinstance(names, str) else names), **options)
+    return parser
+
+def get_parser(name: str, schema: list[dict[str, Any]]) -> 'argparse.ArgumentParser':
+    """Compiled parser of the schema, compiled again only when the schema object changes (module reload)."""
+    with parsers_lock:
+        cached = parsers.get(name)
+        if cached is None or cached[0] is not schema:
+            cached = (schema, compile_schema(schema, name))
+            parsers[name] = cached
+        return cached[1]
+
+def parse_arguments(parser: 'argparse.ArgumentParser', args: list[str]) -> 'argparse.Namespace':
+    try:
+        return parser.parse_args(args)
+    except argparse.ArgumentError as e:
+        raise ArgumentSchemaError(str(e))
+
+def get_option_action(parser: 'argparse.ArgumentParser', option: str) -> Optional['argparse.Action']:
+    return parser._option_string_actions.get(option)
+
+def complete_arguments(parser: 'argparse.ArgumentParser', text: str, args: list[str]) -> list[str]:
+    """Option names, or the choices of the option or positional argument being typed."""
+    if args:
+        action = get_option_action(parser, args[-1])
+        if action is not None and action.nargs != 0:
+            return [str(choice) for choice in action.choices or []]
+
+    if text.startswith('-'):
+        return sorted(parser._option_string_actions)
+
+    positionals = [action for action in parser._actions if not action.option_strings]
+    position = 0
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+        elif arg.startswith('-'):
+            action = get_option_action(parser, arg)
+            skip_value = action is not None and action.nargs != 0
+        else:
+            position += 1
+
+    if position < len(positionals):
+        return [str(choice) for choice in positionals[position].choices or []]
+    return []
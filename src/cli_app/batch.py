@@ -0,0 +1,80 @@
+from typing import Iterable, Iterator
+from cli_app.cli_helpers import iter_help_lines, print_paged
+from cli_app.command_stats import format_stats, profile_call
+from cli_app.command_runner import execute_command_line, run_parallel_block, shutdown_executors
+from cli_app.config import BATCH_ON_AMBIGUITY, LOGGER_CONFIG
+from cli_app.import_report import format_import_report, format_prompt_time, measure_import_times, measure_prompt_time
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+def read_block(numbered_lines: Iterator[tuple[int, str]]) -> list[str]:
+    block = []
+    for _, line in numbered_lines:
+        line = line.strip()
+        if line.lower() == "end":
+            break
+        if line and not line.startswith('#'):
+            block.append(line)
+    return block
+
+def run_batch(
+    lines: Iterable[str],
+    commands: dict[str, dict[str, dict[str, str]]],
+    on_ambiguity: str = BATCH_ON_AMBIGUITY,
+    stop_on_error: bool = False,
+    profile: bool = False
+) -> int:
+    executed = 0
+    failed = 0
+    numbered_lines = enumerate(lines, start=1)
+
+    for line_number, line in numbered_lines:
+        user_input = line.strip()
+        if not user_input or user_input.startswith('#'):
+            continue
+
+        if user_input.lower() == "exit":
+            break
+
+        if user_input.lower() == "help" or user_input.lower().startswith("help "):
+            print_paged(iter_help_lines(commands, None, user_input[len("help "):].strip() or None), page_size=0)
+            continue
+
+        if user_input.lower() == "stats":
+            print(format_stats())
+            continue
+
+        if user_input.lower() == "importtime":
+            print(format_import_report(measure_import_times()))
+            print(format_prompt_time(measure_prompt_time()))
+            continue
+
+        if user_input.lower().startswith("profile "):
+            user_input = user_input[len("profile "):]
+            profile_line = True
+        else:
+            profile_line = profile
+
+        executed += 1
+        try:
+            if user_input.lower() == "parallel":
+                block = read_block(numbered_lines)
+                succeeded = run_parallel_block(block, commands, None, on_ambiguity)
+            elif profile_line:
+                succeeded = profile_call(lambda: execute_command_line(user_input, commands, None, on_ambiguity))
+            else:
+                succeeded = execute_command_line(user_input, commands, None, on_ambiguity)
+        except ValueError as e:
+            logger.error(f"Line {line_number}: could not parse '{user_input}': {e}")
+            succeeded = False
+
+        if not succeeded:
+            failed += 1
+            logger.error(f"Line {line_number}: command failed: {user_input}")
+            if stop_on_error:
+                break
+
+    shutdown_executors()
+    logger.info(f"Batch finished: {executed} commands executed, {failed} failed.")
+    return 1 if failed else 0
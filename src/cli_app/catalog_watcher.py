@@ -0,0 +1,291 @@
+import importlib
+import os
+import select
+import struct
+import sys
+import threading
+from functools import partial
+from typing import Optional
+from cli_app.command_index import CommandMap, FolderCommands
+from cli_app.command_loader import walk_command_tree
+from cli_app.command_metadata import find_runnable_commands
+from cli_app.command_runner import module_registry, registry_lock
+from cli_app.config import DESCRIPTIONS_CACHE_FOLDER, LOGGER_CONFIG, METADATA_CACHE_FILE, WATCH_POLL_INTERVAL
+from cli_app.descriptions import DescriptionStore
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+ctypes = lazy_import('ctypes')
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+class CatalogWatcher:
+    """
+    Watches the command folders and keeps a CommandMap up to date.
+    Backend threads only record changed paths, apply_pending() rescans the changed
+    directories and updates the map and the module registry. It is called between
+    dispatches, so a command never sees a half applied reload.
+    """
+
+    def __init__(
+        self,
+        commands: CommandMap,
+        src_folder_with_commands: str = ".",
+        descriptions_file: str = 'command_descriptions.json',
+        poll_interval: float = WATCH_POLL_INTERVAL,
+        descriptions_cache_folder: str = DESCRIPTIONS_CACHE_FOLDER,
+        metadata_cache_file: str = METADATA_CACHE_FILE
+    ) -> None:
+        self.commands = commands
+        self.root = os.path.abspath(src_folder_with_commands)
+        self.descriptions_file = os.path.abspath(descriptions_file)
+        self.poll_interval = poll_interval
+        self.descriptions_cache_folder = descriptions_cache_folder
+        self.metadata_cache_file = metadata_cache_file
+        self.lock = threading.Lock()
+        self.changed_paths: set[str] = set()
+        self.full_rescan = False
+        self.stopped = threading.Event()
+        self.ready = threading.Event()
+        self.directories: dict[str, dict] = {}
+        self.command_files: dict[str, dict[str, str]] = {}
+        self.store: Optional[DescriptionStore] = None
+        self.thread: Optional[threading.Thread] = None
+        self.backend = ''
+
+    def scan(self) -> None:
+        tree = walk_command_tree(self.root, directories=self.directories)
+        self.directories = tree.directories
+        # Edited files are parsed again, so a command that loses or gains run leaves or joins the catalog.
+        self.command_files = find_runnable_commands(tree.commands, self.root, self.metadata_cache_file)
+
+    def start(self) -> 'CatalogWatcher':
+        self.thread = threading.Thread(target=self.watch, name="catalog-watcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def watch(self) -> None:
+        with self.lock:
+            try:
+                self.scan()
+            except ValueError as e:
+                logger.error(f"Not watching the command catalog: {e}")
+                return
+            directories = list(self.directories)
+        self.ready.set()
+
+        try:
+            inotify = Inotify()
+        except OSError as e:
+            logger.debug("inotify is not available, polling for changes: %s", e)
+            self.backend = 'polling'
+            self.poll()
+            return
+
+        self.backend = 'inotify'
+        with inotify:
+            for directory in directories:
+                inotify.add_watch(self.get_path(directory))
+            while not self.stopped.is_set():
+                for path, is_dir, overflow in inotify.read_events(timeout=self.poll_interval):
+                    if overflow:
+                        self.notify_rescan()
+                        continue
+                    if is_dir and os.path.isdir(path):
+                        inotify.add_tree(path)
+                    self.notify(path, is_dir)
+
+    def poll(self) -> None:
+        snapshot = self.take_snapshot()
+        while not self.stopped.wait(self.poll_interval):
+            current = self.take_snapshot()
+            for path in current.keys() | snapshot.keys():
+                if current.get(path) != snapshot.get(path):
+                    _, is_dir = current.get(path) or snapshot[path]
+                    self.notify(path, is_dir)
+            snapshot = current
+
+    def take_snapshot(self) -> dict[str, tuple[int, bool]]:
+        snapshot = {}
+        with self.lock:
+            directories = [self.get_path(directory) for directory in self.directories]
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir()
+                        if is_dir or entry.name.endswith('.py') or entry.path == self.descriptions_file:
+                            snapshot[entry.path] = (entry.stat().st_mtime_ns, is_dir)
+            except OSError:
+                continue
+        return snapshot
+
+    def get_path(self, directory: str) -> str:
+        return os.path.normpath(os.path.join(self.root, directory))
+
+    def notify(self, path: str, is_dir: bool = False) -> None:
+        if is_dir or path.endswith('.py') or path == self.descriptions_file:
+            with self.lock:
+                self.changed_paths.add(path)
+
+    def notify_rescan(self) -> None:
+        with self.lock:
+            self.full_rescan = True
+
+    def has_pending(self) -> bool:
+        return bool(self.changed_paths) or self.full_rescan
+
+    def apply_pending(self) -> bool:
+        """Applies the recorded changes, returns True when the command map changed."""
+        if not self.has_pending() or not self.ready.is_set():
+            return False
+
+        with self.lock:
+            changed_paths, self.changed_paths = self.changed_paths, set()
+            full_rescan, self.full_rescan = self.full_rescan, False
+
+            if full_rescan:
+                self.directories = {}
+            for path in changed_paths:
+                directory = os.path.relpath(os.path.dirname(path), self.root)
+                self.directories.pop(os.path.normpath(directory), None)
+                self.directories.pop(os.path.normpath(os.path.relpath(path, self.root)), None)
+
+            previous_files = self.command_files
+            try:
+                self.scan()
+            except ValueError as e:
+                logger.error(f"Could not reload the command catalog: {e}")
+                return False
+
+        descriptions_changed = full_rescan or self.descriptions_file in changed_paths
+        if descriptions_changed or self.store is None:
+            self.store = DescriptionStore(self.descriptions_file, self.command_files, self.root, self.descriptions_cache_folder)
+        self.store.command_files = self.command_files
+
+        changed = self.update_commands(previous_files, descriptions_changed, changed_paths)
+        self.invalidate_modules(previous_files, changed_paths)
+        if changed:
+            logger.info(f"Reloaded command catalog: {len(changed_paths)} changed paths.")
+        return changed
+
+    def update_commands(
+        self,
+        previous_files: dict[str, dict[str, str]],
+        descriptions_changed: bool,
+        changed_paths: set[str]
+    ) -> bool:
+        """
+        Replaces the folders whose commands, descriptions or command files changed with
+        lazily described ones, returns True when a command was added or removed or the
+        descriptions file changed.
+        """
+        changed = False
+        for folder in [folder for folder in self.commands if folder not in self.command_files]:
+            del self.commands[folder]
+            changed = True
+
+        for folder, files in self.command_files.items():
+            edited = any(os.path.normpath(os.path.join(self.root, path)) in changed_paths for path in files.values())
+            if not descriptions_changed and not edited and folder in self.commands and previous_files.get(folder) == files:
+                continue
+
+            if set(self.commands.get(folder, ())) != set(files):
+                changed = True
+            self.store.forget(folder)
+            self.commands[folder] = FolderCommands.lazy(files, partial(self.store.get_folder, folder))
+        return changed or descriptions_changed
+
+    def invalidate_modules(self, previous_files: dict[str, dict[str, str]], changed_paths: set[str]) -> None:
+        removed_modules = [
+            f"{folder}.{command_name}"
+            for folder, files in previous_files.items()
+            for command_name in files
+            if command_name not in self.command_files.get(folder, {})
+        ]
+
+        with registry_lock:
+            for module_name, entry in list(module_registry.items()):
+                if module_name in removed_modules or os.path.abspath(entry.file) in changed_paths:
+                    del module_registry[module_name]
+                    removed_modules.append(module_name)
+        # Without its registry entry an edited module would not be reloaded, it is imported again instead.
+        for module_name in removed_modules:
+            sys.modules.pop(module_name, None)
+        importlib.invalidate_caches()
+
+class Inotify:
+    """Minimal ctypes binding of Linux inotify, raises OSError where it is not available."""
+
+    def __init__(self) -> None:
+        try:
+            # The symbols already loaded into the interpreter, libc included.
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            self.libc.inotify_init1
+        except (OSError, AttributeError, TypeError) as e:
+            raise OSError(f"inotify not supported: {e}")
+
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: dict[int, str] = {}
+
+    def __enter__(self) -> 'Inotify':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        os.close(self.fd)
+
+    def add_watch(self, path: str) -> None:
+        descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if descriptor < 0:
+            logger.debug("Could not watch %s: errno %d", path, ctypes.get_errno())
+            return
+        self.watches[descriptor] = path
+
+    def add_tree(self, path: str) -> None:
+        for directory, _, _ in os.walk(path):
+            self.add_watch(directory)
+
+    def read_events(self, timeout: float) -> list[tuple[str, bool, bool]]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        buffer = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            descriptor, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(('', False, True))
+                continue
+            directory = self.watches.get(descriptor)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                self.watches.pop(descriptor, None)
+                events.append((directory, True, False))
+                continue
+            events.append((os.path.join(directory, os.fsdecode(name)), bool(mask & IN_ISDIR), False))
+        return events
@@ -1,6 +1,14 @@
 import os
-from typing import Optional
-from cli_app.config import COMMAND_NAME_MAX_LENGTH
+import sys
+from bisect import bisect_left
+from functools import partial
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+from cli_app.command_index import CommandMap, get_cached
+from cli_app.config import COMMAND_NAME_MAX_LENGTH, HELP_PAGE_SIZE
+from shared.lazy_import import lazy_import
+
+# Only `help <command>` needs the runner, to import a command and show its arguments.
+command_runner = lazy_import('cli_app.command_runner')
 
 def generate_string(count: int, string: str = ' ', max_length: int = 1000) -> str:
     result = string * count
@@ -14,25 +22,94 @@ def generate_padding(length: int, string: str) -> str:
         return ''
     return generate_string(padding_length)
 
-def get_help(folders: dict[str, dict[str, dict[str, str]]], selected_folder: Optional[str]) -> None:
-    help = []
-    
-    help.append("Simple CLI App")
-    help.append("Commands:")
-    
+BUILTIN_COMMANDS = [
+    ("help", "Show this help message, help <folder> or help <prefix> to filter"),
+    ("exit", "Exit the program"),
+    ("stats", "Show timing statistics of this session"),
+    ("importtime", "Show the slowest imports of the app startup"),
+    ("profile", "Profile a command line, profile <command> [args]"),
+    ("parallel", "Run the following lines concurrently, until end"),
+]
+
+def get_description(command_info) -> str:
+    if isinstance(command_info, dict):
+        return command_info.get('description', '')
+    return str(command_info)
+
+def format_help_line(catalog: CommandMap, folder_name: str, command_name: str, command_info) -> str:
+    other_folders = [folder for folder in catalog.find(command_name) if folder != folder_name]
+    also_in = f" (also in: {', '.join(other_folders)})" if other_folders else ""
+    return f"  {command_name}{generate_padding(COMMAND_NAME_MAX_LENGTH, command_name)}- {get_description(command_info)}{also_in}"
+
+def build_help_section(folders: CommandMap, folder_name: str) -> list[tuple[str, str]]:
+    """Help lines of one folder, only the descriptions of this folder are read."""
+    return [
+        (command_name, format_help_line(folders, folder_name, command_name, command_info))
+        for command_name, command_info in folders[folder_name].items()
+    ]
+
+def get_help_section(folders: CommandMap, folder_name: str) -> list[tuple[str, str]]:
+    return get_cached(folders, f'help_section:{folder_name}', partial(build_help_section, folder_name=folder_name))
+
+def build_help_prefix_index(folders: dict[str, dict[str, dict[str, str]]]) -> list[tuple[str, str]]:
+    """(command, folder) pairs sorted by command, names only so that no descriptions are read."""
+    return sorted((command_name, folder_name) for folder_name, commands in folders.items() for command_name in commands)
+
+def iter_help_lines(
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    filter_text: Optional[str] = None
+) -> Iterator[str]:
+    yield "Simple CLI App"
+    yield "Commands:"
+
     selected_folder_info = f" Selected folder: {selected_folder}" if selected_folder else " Selected folder: None"
-    help.append(f"\n  {selected_folder_info}")
-    
+    yield f"\n  {selected_folder_info}"
+
     length = COMMAND_NAME_MAX_LENGTH
-    help.append(f"\n  help{generate_padding(length, 'help')}- Show this help message")
-    help.append(f"  exit{generate_padding(length, 'exit')}- Exit the program")
-    
-    for folder_name, commands in folders.items():
-        help.append(f"\n{folder_name} commands:")
-        for command_name, command_info in commands.items():
-            help.append(f"  {command_name}{generate_padding(length, command_name)}- {command_info['description']}")
-    
-    return "\n".join(help)
+    yield ""
+    for name, description in BUILTIN_COMMANDS:
+        yield f"  {name}{generate_padding(length, name)}- {description}"
+
+    catalog = folders if isinstance(folders, CommandMap) else CommandMap(folders)
+
+    if filter_text and filter_text not in catalog:
+        yield f"\nCommands starting with '{filter_text}':"
+        prefix_index = get_cached(catalog, 'help_prefix_index', build_help_prefix_index)
+        for command_name, folder_name in prefix_index[bisect_left(prefix_index, (filter_text,)):]:
+            if not command_name.startswith(filter_text):
+                break
+            yield f"{format_help_line(catalog, folder_name, command_name, catalog[folder_name][command_name])} [{folder_name}]"
+
+        yield from command_runner.iter_argument_help(folders, filter_text)
+        return
+
+    for folder_name in ([filter_text] if filter_text else catalog):
+        yield f"\n{folder_name} commands:"
+        for _, line in get_help_section(catalog, folder_name):
+            yield line
+
+def get_help(
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    filter_text: Optional[str] = None
+) -> str:
+    return "\n".join(iter_help_lines(folders, selected_folder, filter_text))
+
+def print_paged(
+    lines: Iterable[str],
+    page_size: int = HELP_PAGE_SIZE,
+    stream: Optional[TextIO] = None,
+    read_key: Callable[[str], str] = input
+) -> None:
+    stream = stream or sys.stdout
+    paging = page_size > 0 and stream.isatty()
+
+    for count, line in enumerate(lines, start=1):
+        stream.write(f"{line}\n")
+        if paging and count % page_size == 0:
+            if read_key("-- more (Enter to continue, q to quit) --").strip().lower() == 'q':
+                return
 
 def get_current_working_directory():
     current_folder = os.getcwd()
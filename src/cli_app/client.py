@@ -0,0 +1,77 @@
+import os
+import socket
+import struct
+import sys
+
+# The client starts for every command, so it imports neither cli_app.config (which pulls in
+# logging) nor cli_app.protocol, json or typing. These must match SERVER_SOCKET and the protocol.
+SERVER_SOCKET = '.cli_app_cache/server.sock'
+HEADER = struct.Struct('>cI')
+REQUEST_HEADER = struct.Struct('>I')
+STDOUT = b'o'
+STDERR = b'e'
+EXIT = b'x'
+
+def receive_exactly(connection: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed before the whole message was received.")
+        data.extend(chunk)
+    return bytes(data)
+
+def encode_json_string(text: str) -> str:
+    """text as an ASCII JSON string literal, like json.dumps(text)."""
+    parts = ['"']
+    for char in text:
+        code = ord(char)
+        if char in '"\\':
+            parts.append(f"\\{char}")
+        elif 0x20 <= code < 0x7f:
+            parts.append(char)
+        elif code > 0xffff:
+            code -= 0x10000
+            parts.append(f"\\u{0xd800 | code >> 10:04x}\\u{0xdc00 | code & 0x3ff:04x}")
+        else:
+            parts.append(f"\\u{code:04x}")
+    parts.append('"')
+    return ''.join(parts)
+
+def encode_request(argv: list[str], cwd: str) -> bytes:
+    arguments = ', '.join(encode_json_string(argument) for argument in argv)
+    return f'{{"argv": [{arguments}], "cwd": {encode_json_string(cwd)}}}'.encode('ascii')
+
+def forward(argv: list[str], socket_path: str = SERVER_SOCKET) -> int:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        payload = encode_request(argv, os.getcwd())
+        connection.sendall(REQUEST_HEADER.pack(len(payload)) + payload)
+
+        while True:
+            channel, size = HEADER.unpack(receive_exactly(connection, HEADER.size))
+            payload = receive_exactly(connection, size)
+            if channel == STDOUT:
+                sys.stdout.buffer.write(payload)
+                sys.stdout.flush()
+            elif channel == STDERR:
+                sys.stderr.buffer.write(payload)
+                sys.stderr.flush()
+            elif channel == EXIT:
+                return int(payload)
+
+def main(argv: 'list[str] | None' = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    socket_path = os.environ.get('CLI_APP_SOCKET', SERVER_SOCKET)
+
+    try:
+        return forward(argv, socket_path)
+    except BrokenPipeError:
+        return 1
+    except (ConnectionError, FileNotFoundError) as e:
+        print(f"Could not reach cli_app server at {socket_path}: {e}", file=sys.stderr)
+        print("Start it with: python -m cli_app.main --serve", file=sys.stderr)
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import sys
+from bisect import bisect_left
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Union
+
+class CommandMap(dict):
+    """
+    Folder -> commands mapping, as returned by load_commands, that also keeps an
+    inverted index of command name -> folders up to date on every folder change.
+    Values derived from the whole catalog (help text, ...) are cached per version.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__()
+        self.index: dict[str, dict[str, None]] = {}
+        self.derived: dict[str, tuple[int, Any]] = {}
+        self.version = 0
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, folder: str, commands: dict) -> None:
+        previous = self.get(folder, {})
+        super().__setitem__(folder, commands)
+        self._unindex(folder, [name for name in previous if name not in commands])
+        self._index(folder, [name for name in commands if name not in previous])
+        self.version += 1
+
+    def __delitem__(self, folder: str) -> None:
+        commands = self[folder]
+        super().__delitem__(folder)
+        self._unindex(folder, commands)
+        self.version += 1
+
+    def update(self, *args, **kwargs) -> None:
+        for folder, commands in dict(*args, **kwargs).items():
+            self[folder] = commands
+
+    def setdefault(self, folder: str, commands: Optional[dict] = None) -> dict:
+        if folder not in self:
+            self[folder] = {} if commands is None else commands
+        return self[folder]
+
+    def pop(self, folder: str, *default):
+        if folder not in self:
+            if default:
+                return default[0]
+            raise KeyError(folder)
+        commands = self[folder]
+        del self[folder]
+        return commands
+
+    def popitem(self) -> tuple:
+        folder = next(reversed(self))
+        return folder, self.pop(folder)
+
+    def clear(self) -> None:
+        super().clear()
+        self.index.clear()
+        self.version += 1
+
+    def add_command(self, folder: str, command: str, info) -> None:
+        commands = self.setdefault(folder)
+        if command not in commands:
+            self._index(folder, [command])
+        commands[command] = info
+        self.version += 1
+
+    def remove_command(self, folder: str, command: str) -> None:
+        commands = self.get(folder, {})
+        if command in commands:
+            del commands[command]
+            self._unindex(folder, [command])
+            self.version += 1
+
+    def cached(self, name: str, build: Callable[['CommandMap'], Any]) -> Any:
+        version, value = self.derived.get(name, (None, None))
+        if version != self.version:
+            value = build(self)
+            self.derived[name] = (self.version, value)
+        return value
+
+    def find(self, command: str) -> list[str]:
+        return list(self.index.get(command, ()))
+
+    def _index(self, folder: str, commands: Iterable[str]) -> None:
+        for command in commands:
+            self.index.setdefault(command, {})[folder] = None
+
+    def _unindex(self, folder: str, commands: Iterable[str]) -> None:
+        for command in commands:
+            folders = self.index.get(command)
+            if folders is None:
+                continue
+            folders.pop(folder, None)
+            if not folders:
+                del self.index[command]
+
+def default_description(command_name: str) -> str:
+    return f"Description for {command_name} not found"
+
+class FolderCommands(Mapping):
+    """
+    Read-only command -> description mapping of one folder, kept in two tuples sorted by
+    name instead of a dict. Default descriptions are stored as None and rebuilt on access.
+    Lazy instances get their descriptions from `source` the first time one is read.
+    """
+    __slots__ = ('names', 'descriptions', 'source')
+
+    def __init__(self, commands: Mapping[str, object] = {}) -> None:
+        items = sorted(commands.items(), key=lambda item: item[0])
+        self.names = tuple(sys.intern(name) for name, _ in items)
+        self.descriptions = tuple(None if info == default_description(name) else info for name, info in items)
+        self.source = None
+
+    @classmethod
+    def from_sorted(cls, names: Iterable[str], descriptions: Iterable[object]) -> 'FolderCommands':
+        commands = cls.__new__(cls)
+        commands.names = tuple(sys.intern(name) for name in names)
+        commands.descriptions = tuple(descriptions)
+        commands.source = None
+        return commands
+
+    @classmethod
+    def lazy(cls, names: Iterable[str], source: Callable[[], Mapping[str, object]]) -> 'FolderCommands':
+        commands = cls.__new__(cls)
+        commands.names = tuple(sys.intern(name) for name in sorted(names))
+        commands.descriptions = None
+        commands.source = source
+        return commands
+
+    @property
+    def loaded(self) -> bool:
+        return self.descriptions is not None
+
+    def get_descriptions(self) -> tuple:
+        descriptions = self.descriptions
+        if descriptions is None:
+            loaded = self.source()
+            descriptions = tuple(loaded.get(name) for name in self.names)
+            self.descriptions = descriptions
+        return descriptions
+
+    def position(self, name: str) -> int:
+        position = bisect_left(self.names, name)
+        if position == len(self.names) or self.names[position] != name:
+            return -1
+        return position
+
+    def __getitem__(self, name: str):
+        position = self.position(name)
+        if position < 0:
+            raise KeyError(name)
+        description = self.get_descriptions()[position]
+        return default_description(name) if description is None else description
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.position(name) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"FolderCommands({dict(self.items())!r})"
+
+class CommandCatalog(CommandMap):
+    """
+    CommandMap for large trees: folders are FolderCommands, command and folder names are
+    interned, and the index maps a command to its folder name, or to a tuple of them when
+    the name is in several folders, instead of a dict per command.
+    """
+
+    def __setitem__(self, folder: str, commands: Mapping) -> None:
+        if not isinstance(commands, FolderCommands):
+            commands = FolderCommands(commands)
+        super().__setitem__(sys.intern(folder), commands)
+
+    def add_command(self, folder: str, command: str, info) -> None:
+        self[folder] = {**self.get(folder, {}), command: info}
+
+    def remove_command(self, folder: str, command: str) -> None:
+        commands = self.get(folder, {})
+        if command in commands:
+            self[folder] = {name: info for name, info in commands.items() if name != command}
+
+    def find(self, command: str) -> list[str]:
+        folders = self.index.get(command, ())
+        return [folders] if isinstance(folders, str) else list(folders)
+
+    def _index(self, folder: str, commands: Iterable[str]) -> None:
+        index: dict[str, Union[str, tuple[str, ...]]] = self.index
+        for command in commands:
+            folders = index.get(command)
+            if folders is None:
+                index[command] = folder
+            elif isinstance(folders, str):
+                if folders != folder:
+                    index[command] = (folders, folder)
+            elif folder not in folders:
+                index[command] = (*folders, folder)
+
+    def _unindex(self, folder: str, commands: Iterable[str]) -> None:
+        index: dict[str, Union[str, tuple[str, ...]]] = self.index
+        for command in commands:
+            folders = index.get(command)
+            if folders is None:
+                continue
+            remaining = tuple(name for name in ((folders,) if isinstance(folders, str) else folders) if name != folder)
+            if not remaining:
+                del index[command]
+            else:
+                index[command] = remaining[0] if len(remaining) == 1 else remaining
+
+    def to_manifest(self, with_descriptions: bool = True) -> dict[str, list[list]]:
+        """Folder -> [names, descriptions] lists, default descriptions as null, or [names] only."""
+        if not with_descriptions:
+            return {folder: [list(commands.names)] for folder, commands in self.items()}
+        return {folder: [list(commands.names), list(commands.get_descriptions())] for folder, commands in self.items()}
+
+    @classmethod
+    def from_manifest(
+        cls,
+        data: Mapping[str, list[list]],
+        source: Optional[Callable[[str], Mapping[str, object]]] = None
+    ) -> 'CommandCatalog':
+        """Entries without descriptions get them lazily from source(folder)."""
+        return cls({
+            folder: FolderCommands.from_sorted(*entry) if len(entry) > 1 else FolderCommands.lazy(entry[0], partial(source, folder))
+            for folder, entry in data.items()
+        })
+
+def get_cached(folders: Mapping[str, Mapping[str, object]], name: str, build: Callable[[Mapping], Any]) -> Any:
+    if isinstance(folders, CommandMap):
+        return folders.cached(name, build)
+    return build(folders)
+
+def get_command_index(folders: Mapping[str, Mapping[str, object]]) -> dict:
+    if isinstance(folders, CommandMap):
+        return folders.index
+    return CommandMap(folders).index
+
+def find_folders(folders: Mapping[str, Mapping[str, object]], command: str) -> list[str]:
+    if isinstance(folders, CommandMap):
+        return folders.find(command)
+    return CommandMap(folders).find(command)
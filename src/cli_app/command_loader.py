@@ -1,37 +1,169 @@
-import json
-from pathlib import Path
-from cli_app.config import COMMAND_NAME_MAX_LENGTH, LOGGER_CONFIG
+import os
+from typing import NamedTuple, Optional
+from cli_app.command_index import CommandCatalog, default_description
+from cli_app.command_metadata import find_runnable_commands
+from cli_app.config import COMMAND_NAME_MAX_LENGTH, DESCRIPTIONS_CACHE_FOLDER, FOLLOW_SYMLINKS, LOGGER_CONFIG, PRUNED_FOLDERS
+from cli_app.descriptions import DescriptionStore, build_lazy_catalog, read_descriptions
+from shared.lazy_import import lazy_import
 from shared.logger import setup_logger
-import json
+
+pathlib = lazy_import('pathlib')
 
 logger = setup_logger(__name__, LOGGER_CONFIG)
 
+class CommandTree(NamedTuple):
+    folders: list[str]
+    commands: dict[str, dict[str, str]]
+    skipped: int
+    scanned: int
+    directories: dict[str, dict]
+
+def scan_directory(path: str, follow_symlinks: bool = False) -> Optional[dict]:
+    record = {'mtime': None, 'dirs': [], 'files': [], 'has_init': False, 'is_venv': False}
+
+    try:
+        record['mtime'] = os.stat(path).st_mtime_ns
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    record['dirs'].append(entry.name)
+                elif entry.name.endswith('.py'):
+                    record['files'].append(entry.name)
+                elif entry.name == 'pyvenv.cfg':
+                    record['is_venv'] = True
+    except OSError as e:
+        logger.warning(f"Could not scan directory {path}: {e}")
+        return None
+
+    record['dirs'].sort()
+    record['files'].sort()
+    record['has_init'] = '__init__.py' in record['files']
+    return record
+
+def walk_command_tree(
+    src_folder_with_commands: str = ".",
+    ignore_these_folders: list[str] = ["cli_app", "shared", "lib", "tests"],
+    ignore_subfolders: list[str] = ["lib", "tests"],
+    follow_symlinks: bool = FOLLOW_SYMLINKS,
+    directories: Optional[dict[str, dict]] = None
+) -> CommandTree:
+    directories = directories or {}
+    prune_set = {folder.lower() for folder in [*ignore_these_folders, *ignore_subfolders, *PRUNED_FOLDERS]}
+
+    fresh_directories = {}
+    visited = set()
+    folder_names = []
+    folder_commands = {}
+    skipped = 0
+    scanned = 0
+
+    pending = [('.', ())]
+    while pending:
+        relative_path, enclosing_folders = pending.pop()
+        path = os.path.join(src_folder_with_commands, relative_path)
+
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Could not stat directory {path}: {e}")
+            continue
+
+        if follow_symlinks:
+            identity = (stat.st_dev, stat.st_ino)
+            if identity in visited:
+                logger.debug("Skipping already visited directory (symlink cycle): %s", path)
+                skipped += 1
+                continue
+            visited.add(identity)
+
+        record = directories.get(relative_path)
+        if record is None or record['mtime'] != stat.st_mtime_ns:
+            record = scan_directory(path, follow_symlinks)
+            scanned += 1
+            if record is None:
+                continue
+
+        fresh_directories[relative_path] = record
+
+        if record['is_venv'] and relative_path != '.':
+            logger.debug("Skipping virtual environment: %s", path)
+            skipped += 1
+            continue
+
+        if relative_path != '.' and record['has_init']:
+            folder_name = os.path.basename(relative_path)
+            folder_names.append(folder_name)
+            folder_commands.setdefault(folder_name, {})
+            enclosing_folders = (*enclosing_folders, folder_name)
+
+        for file_name in record['files'] if enclosing_folders else []:
+            if file_name == "__init__.py":
+                continue
+
+            command_name = file_name[:-len('.py')]
+            if len(command_name) > COMMAND_NAME_MAX_LENGTH:
+                raise ValueError(f"Command name '{command_name}' is too long. Maximum allowed length is {COMMAND_NAME_MAX_LENGTH} characters.")
+
+            for folder_name in enclosing_folders:
+                folder_commands[folder_name][command_name] = os.path.join(relative_path, file_name)
+
+        for dir_name in reversed(record['dirs']):
+            if dir_name.startswith('.') or dir_name.lower() in prune_set:
+                skipped += 1
+                continue
+            pending.append((os.path.normpath(os.path.join(relative_path, dir_name)), enclosing_folders))
+
+    folder_names.sort()
+
+    logger.debug("Walked %s: %d directories scanned, %d skipped", src_folder_with_commands, scanned, skipped)
+    logger.debug("Discovered folders: %s", folder_names)
+
+    return CommandTree(
+        folder_names,
+        {folder_name: folder_commands[folder_name] for folder_name in folder_names},
+        skipped,
+        scanned,
+        fresh_directories
+    )
+
 def discover_folders_with_commands(
     src_folder_with_commands: str = ".",
     ignore_these_folders: list[str] = ["cli_app", "shared", "lib", "tests"]
 ) -> list[str]:
-    src_path = Path(src_folder_with_commands)
-
-    if not src_path.is_dir():
+    if not pathlib.Path(src_folder_with_commands).is_dir():
         logger.error(f"Specified source folder does not exist: {src_folder_with_commands}")
         return []
 
-    ignore_set = {folder.lower() for folder in ignore_these_folders}
-
-    folder_names = [
-        folder.name
-        for folder in src_path.rglob("*")
-        if folder.is_dir()
-        and folder.name.lower() not in ignore_set
-        and (folder / "__init__.py").exists()
-    ]
-
     logger.debug(f"Discovering folders...")
     logger.debug(f"Root: {src_folder_with_commands}")
     logger.debug(f"Ignored: {ignore_these_folders}")
-    logger.debug(f"Discovered folders: {folder_names}")
 
-    return sorted(folder_names)
+    return walk_command_tree(src_folder_with_commands, ignore_these_folders, ignore_subfolders=[]).folders
+
+def apply_descriptions(
+    command_files: dict[str, dict[str, str]],
+    descriptions_data: dict
+) -> dict[str, dict[str, dict[str, str]]]:
+    return CommandCatalog({
+        folder: {
+            command_name: descriptions_data.get(folder, {}).get(command_name, default_description(command_name))
+            for command_name in commands
+        }
+        for folder, commands in command_files.items()
+    })
+
+def load_command_tree(
+    src_folder_with_commands: str = ".",
+    descriptions_file: str = 'command_descriptions.json'
+) -> tuple[list[str], dict[str, dict[str, dict[str, str]]]]:
+    if not os.path.isdir(src_folder_with_commands):
+        logger.error(f"Specified source folder does not exist: {src_folder_with_commands}")
+        return [], CommandCatalog()
+
+    tree = walk_command_tree(src_folder_with_commands)
+    command_files = find_runnable_commands(tree.commands, src_folder_with_commands)
+    store = DescriptionStore(descriptions_file, command_files, src_folder_with_commands, DESCRIPTIONS_CACHE_FOLDER)
+    return tree.folders, build_lazy_catalog(command_files, store)
 
 def load_commands(
     folders: list[str], 
@@ -42,28 +174,23 @@ def load_commands(
     if not isinstance(folders, list) or not all(isinstance(folder, str) for folder in folders):
         raise TypeError("The 'folders' parameter must be a list of folder names as strings.")
 
-    folder_commands = {}
+    folder_commands = CommandCatalog()
 
-    try:
-        with open(descriptions_file, 'r') as f:
-            descriptions_data = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError) as e:
-        logger.error(f"Error reading descriptions file {descriptions_file}: {e}")
-        descriptions_data = {}
+    descriptions_data = read_descriptions(descriptions_file)
 
     for folder in folders:
-        folder_path = Path(folder)
+        folder_path = pathlib.Path(folder)
         if not folder_path.is_dir():
             logger.warning(f"Folder does not exist or is not a directory: {folder}")
             continue
 
-        logger.debug(f"Processing folder: {folder}")
+        logger.debug("Processing folder: %s", folder)
 
         commands = {}
         for subfolder in folder_path.rglob('*.py'):
-            logger.debug(f"file: {subfolder.name}")
+            logger.debug("file: %s", subfolder.name)
             if subfolder.is_dir() or subfolder.parent.name.lower() in ignore_subfolders:
-                logger.debug(f"Ignored: {subfolder.name}")
+                logger.debug("Ignored: %s", subfolder.name)
                 continue
 
             if subfolder.name != "__init__.py":
@@ -71,10 +198,10 @@ def load_commands(
                 if len(command_name) > COMMAND_NAME_MAX_LENGTH:
                     raise ValueError(f"Command name '{command_name}' is too long. Maximum allowed length is {COMMAND_NAME_MAX_LENGTH} characters.")
 
-                description = descriptions_data.get(folder, {}).get(command_name, f"Description for {command_name} not found")
+                description = descriptions_data.get(folder, {}).get(command_name, default_description(command_name))
                 commands[command_name] = description
 
         folder_commands[folder] = commands
 
-    logger.debug(f"Discovered commands: {folder_commands}")
+    logger.debug("Discovered commands: %s", folder_commands)
     return folder_commands
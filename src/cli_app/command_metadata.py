@@ -0,0 +1,250 @@
+import hashlib
+import os
+import threading
+from typing import Iterable, Mapping, NamedTuple, Optional
+from cli_app.config import LOGGER_CONFIG, METADATA_CACHE_FILE, METADATA_PARALLEL_MIN_FILES, METADATA_WORKERS
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+ast = lazy_import('ast')
+concurrent_futures = lazy_import('concurrent.futures')
+json = lazy_import('json')
+
+METADATA_VERSION = 1
+PARSE_CHUNK_SIZE = 64
+
+class CommandMetadata(NamedTuple):
+    has_run: bool
+    is_async: bool
+    description: Optional[str]
+    options: list[str]
+    has_complete: bool
+
+# By catalog name (folder.command) and by command file.
+metadata_registry: dict[str, CommandMetadata] = {}
+file_metadata: dict[str, CommandMetadata] = {}
+registry_lock = threading.Lock()
+
+def get_string(node) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+def get_option_names(node) -> list[str]:
+    """Names declared in a literal `arguments` list, see cli_app.arg_schema."""
+    if not isinstance(node, (ast.List, ast.Tuple)):
+        return []
+
+    names = []
+    for entry in node.elts:
+        if not isinstance(entry, ast.Dict):
+            continue
+        for key, value in zip(entry.keys, entry.values):
+            if get_string(key) != 'name':
+                continue
+            if isinstance(value, (ast.List, ast.Tuple)):
+                names.extend(name for name in map(get_string, value.elts) if name is not None)
+            elif get_string(value) is not None:
+                names.append(get_string(value))
+    return names
+
+def extract_metadata(source: bytes, path: str = '<command>') -> CommandMetadata:
+    """Reads a command module's top level statements, nothing is executed. Raises SyntaxError."""
+    tree = ast.parse(source, filename=path)
+
+    has_run = False
+    is_async = False
+    description = None
+    options: list[str] = []
+    has_complete = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name == 'run':
+                has_run = True
+                is_async = isinstance(node, ast.AsyncFunctionDef)
+            has_complete = has_complete or node.name == 'complete'
+            continue
+
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            targets = [ast.Name(id=alias.asname or alias.name) for alias in node.names]
+        else:
+            continue
+
+        value = getattr(node, 'value', None)
+        for name in [target.id for target in targets if isinstance(target, ast.Name)]:
+            if name == 'run':
+                # run = main or from .impl import run, a run that is not a def.
+                has_run = True
+                is_async = False
+            elif name == 'complete':
+                has_complete = True
+            elif name == 'description':
+                description = get_string(value)
+            elif name == 'arguments':
+                options = get_option_names(value)
+
+    return CommandMetadata(has_run, is_async, description, options, has_complete)
+
+def parse_files(paths: list[str]) -> list[tuple[str, Optional[list], Optional[str], Optional[list]]]:
+    """[path, [mtime, size], hash, metadata] for each file, metadata is None for broken files."""
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                source = f.read()
+        except OSError:
+            results.append((path, None, None, None))
+            continue
+
+        digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+        try:
+            metadata = list(extract_metadata(source, path))
+        except (SyntaxError, ValueError) as e:
+            logger.debug(f"Could not parse {path}: {e}")
+            metadata = None
+        results.append((path, [stat.st_mtime_ns, stat.st_size], digest, metadata))
+    return results
+
+def hash_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+def read_metadata_cache(cache_file: str) -> dict[str, list]:
+    try:
+        with open(cache_file, 'r') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != METADATA_VERSION:
+        return {}
+    return data.get('files', {})
+
+def write_metadata_cache(cache_file: str, files: dict[str, list]) -> None:
+    temp_file = f"{cache_file}.tmp"
+    try:
+        if os.path.dirname(cache_file):
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, 'w') as f:
+            json.dump({'version': METADATA_VERSION, 'files': files}, f)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write command metadata cache {cache_file}: {e}")
+
+def parse_in_parallel(paths: list[str], workers: int) -> list[tuple]:
+    if len(paths) < METADATA_PARALLEL_MIN_FILES or workers <= 1:
+        return parse_files(paths)
+
+    chunks = [paths[start:start + PARSE_CHUNK_SIZE] for start in range(0, len(paths), PARSE_CHUNK_SIZE)]
+    try:
+        with concurrent_futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            return [result for results in executor.map(parse_files, chunks) for result in results]
+    except (OSError, RuntimeError) as e:
+        logger.debug(f"Parsing command files in this process: {e}")
+        return parse_files(paths)
+
+def read_cached_metadata(cache_file: str = METADATA_CACHE_FILE) -> dict[str, Optional[CommandMetadata]]:
+    """The metadata saved by the last load_metadata, the files are not checked."""
+    return {
+        path: CommandMetadata(*entry[2]) if entry[2] is not None else None
+        for path, entry in read_metadata_cache(cache_file).items()
+    }
+
+def load_metadata(
+    paths: Iterable[str],
+    cache_file: str = METADATA_CACHE_FILE,
+    workers: int = METADATA_WORKERS
+) -> dict[str, Optional[CommandMetadata]]:
+    """
+    Metadata of each command file, None for files that are missing or do not parse.
+    Files whose mtime and size match the cache are not read, files whose content hash
+    matches are not parsed, the others are parsed on a process pool when there are many.
+    """
+    cached = read_metadata_cache(cache_file)
+    files: dict[str, list] = {}
+    to_parse = []
+
+    for path in paths:
+        entry = cached.get(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+
+        if entry is not None and entry[0] == [stat.st_mtime_ns, stat.st_size]:
+            files[path] = entry
+        elif entry is not None and hash_file(path) == entry[1]:
+            files[path] = [[stat.st_mtime_ns, stat.st_size], *entry[1:]]
+        else:
+            to_parse.append(path)
+
+    if to_parse:
+        logger.debug("Parsing %d command files", len(to_parse))
+        for path, signature, digest, metadata in parse_in_parallel(to_parse, workers):
+            if signature is not None:
+                files[path] = [signature, digest, metadata]
+
+    if files != cached:
+        write_metadata_cache(cache_file, files)
+
+    return {
+        path: CommandMetadata(*entry[2]) if entry[2] is not None else None
+        for path, entry in files.items()
+    }
+
+def find_runnable_commands(
+    command_files: Mapping[str, Mapping[str, str]],
+    root: str = ".",
+    cache_file: str = METADATA_CACHE_FILE
+) -> dict[str, dict[str, str]]:
+    """
+    The command files that define `run`. Files that do not parse or have no run are
+    left out of the catalog, the metadata of the others is kept in metadata_registry.
+    """
+    paths = [os.path.join(root, path) for files in command_files.values() for path in files.values()]
+    return select_runnable_commands(command_files, load_metadata(paths, cache_file), root)
+
+def select_runnable_commands(
+    command_files: Mapping[str, Mapping[str, str]],
+    metadata: Mapping[str, Optional[CommandMetadata]],
+    root: str = ".",
+    folder_keys: Optional[Mapping[str, str]] = None
+) -> dict[str, dict[str, str]]:
+    """find_runnable_commands with the metadata already loaded, folders are registered under their folder_keys name."""
+    folder_keys = folder_keys or {}
+    runnable: dict[str, dict[str, str]] = {}
+    with registry_lock:
+        for folder, files in command_files.items():
+            key = folder_keys.get(folder, folder)
+            runnable[folder] = {}
+            for command, path in files.items():
+                full_path = os.path.join(root, path)
+                entry = metadata.get(full_path)
+                if entry is None or not entry.has_run:
+                    metadata_registry.pop(f"{key}.{command}", None)
+                    file_metadata.pop(os.path.abspath(full_path), None)
+                if entry is None:
+                    logger.warning(f"Skipping command file {full_path}: it could not be parsed.")
+                    continue
+                if not entry.has_run:
+                    logger.debug("Skipping command file %s: it has no run function", full_path)
+                    continue
+                runnable[folder][command] = path
+                metadata_registry[f"{key}.{command}"] = entry
+                file_metadata[os.path.abspath(full_path)] = entry
+    return runnable
+
+def get_metadata(folder: str, command: str) -> Optional[CommandMetadata]:
+    return metadata_registry.get(f"{folder}.{command}")
+
+def get_file_metadata(path: str) -> Optional[CommandMetadata]:
+    return file_metadata.get(os.path.abspath(path))
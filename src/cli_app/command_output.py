@@ -0,0 +1,257 @@
+import queue
+import sys
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional, TextIO
+from cli_app.config import OUTPUT_MAX_CHARS, OUTPUT_MEMORY_LIMIT, PIPE_BUFFER_LINES
+
+output_target: ContextVar[Optional[TextIO]] = ContextVar('output_target', default=None)
+error_target: ContextVar[Optional[TextIO]] = ContextVar('error_target', default=None)
+input_source: ContextVar[Optional[TextIO]] = ContextVar('input_source', default=None)
+routing_lock = threading.Lock()
+routing_users = 0
+
+class OutputLimitExceeded(Exception):
+    pass
+
+class RoutedStream:
+    """
+    Stands in for sys.stdout, sys.stderr or sys.stdin: reads and writes go to the stream set
+    for the current context (a capture, a pipe), or to the original stream when none is set.
+    """
+
+    def __init__(self, stream: TextIO, target: ContextVar) -> None:
+        self.stream = stream
+        self.target = target
+
+    def current(self) -> TextIO:
+        return self.target.get() or self.stream
+
+    def write(self, text: str) -> int:
+        return self.current().write(text)
+
+    def flush(self) -> None:
+        self.current().flush()
+
+    def readline(self, *args) -> str:
+        return self.current().readline(*args)
+
+    def read(self, *args) -> str:
+        return self.current().read(*args)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.current())
+
+    def __getattr__(self, name: str):
+        return getattr(self.current(), name)
+
+ROUTED_STREAMS = (('stdout', output_target), ('stderr', error_target), ('stdin', input_source))
+
+def install_routing() -> None:
+    global routing_users
+    with routing_lock:
+        if routing_users == 0:
+            for name, target in ROUTED_STREAMS:
+                if not isinstance(getattr(sys, name), RoutedStream):
+                    setattr(sys, name, RoutedStream(getattr(sys, name), target))
+        routing_users += 1
+
+def uninstall_routing() -> None:
+    global routing_users
+    with routing_lock:
+        routing_users -= 1
+        if routing_users == 0:
+            for name, _ in ROUTED_STREAMS:
+                stream = getattr(sys, name)
+                if isinstance(stream, RoutedStream):
+                    setattr(sys, name, stream.stream)
+
+@contextmanager
+def routed_output(
+    stdout: Optional[TextIO] = None,
+    stderr: Optional[TextIO] = None,
+    stdin: Optional[TextIO] = None
+) -> Iterator[None]:
+    """Sends this context's stdout and stderr to the given streams and reads its stdin from `stdin`."""
+    install_routing()
+    tokens = [
+        (target, target.set(stream))
+        for target, stream in ((output_target, stdout), (error_target, stderr), (input_source, stdin))
+        if stream is not None
+    ]
+    try:
+        yield
+    finally:
+        for target, token in reversed(tokens):
+            target.reset(token)
+        uninstall_routing()
+
+class RingBufferOutput:
+    """Keeps only the last max_lines lines written."""
+
+    def __init__(self, max_lines: int) -> None:
+        self.lines: deque[str] = deque(maxlen=max_lines)
+        self.partial = ''
+        self.dropped = 0
+
+    def write(self, text: str) -> int:
+        *lines, self.partial = (self.partial + text).split('\n')
+        self.dropped += max(0, len(self.lines) + len(lines) - self.lines.maxlen)
+        self.lines.extend(lines)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def iter_lines(self) -> Iterator[str]:
+        yield from self.lines
+        if self.partial:
+            yield self.partial
+
+    def getvalue(self) -> str:
+        return '\n'.join(self.iter_lines())
+
+    def close(self) -> None:
+        self.lines.clear()
+
+class SpooledOutput:
+    """
+    Keeps everything written, in memory up to memory_limit characters and in a temporary
+    file beyond it. Writing more than max_chars raises OutputLimitExceeded, which stops the command.
+    """
+
+    def __init__(self, memory_limit: int = OUTPUT_MEMORY_LIMIT, max_chars: Optional[int] = OUTPUT_MAX_CHARS) -> None:
+        self.file = tempfile.SpooledTemporaryFile(max_size=memory_limit, mode='w+', encoding='utf-8')
+        self.max_chars = max_chars
+        self.size = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self.file._rolled
+
+    def write(self, text: str) -> int:
+        if self.max_chars is not None and self.size + len(text) > self.max_chars:
+            raise OutputLimitExceeded(f"Output exceeded {self.max_chars} characters.")
+        self.size += len(text)
+        return self.file.write(text)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def iter_lines(self) -> Iterator[str]:
+        self.file.seek(0)
+        for line in self.file:
+            yield line.rstrip('\n')
+        self.file.seek(0, 2)
+
+    def getvalue(self) -> str:
+        self.file.seek(0)
+        value = self.file.read()
+        self.file.seek(0, 2)
+        return value
+
+    def close(self) -> None:
+        self.file.close()
+
+class PipeOutput:
+    """
+    Bounded queue of lines between a writing command and a reader. The writer blocks
+    while max_lines are waiting, writing after the reader stopped raises BrokenPipeError.
+    """
+    END = None
+
+    def __init__(self, max_lines: int = PIPE_BUFFER_LINES) -> None:
+        self.lines: queue.Queue = queue.Queue(maxsize=max_lines)
+        self.partial = ''
+        self.stopped = threading.Event()
+        self.finished = False
+
+    def put(self, line: Optional[str]) -> None:
+        while not self.stopped.is_set():
+            try:
+                self.lines.put(line, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        if line is not self.END:
+            raise BrokenPipeError("The reading command stopped reading.")
+
+    def write(self, text: str) -> int:
+        *lines, self.partial = (self.partial + text).split('\n')
+        for line in lines:
+            self.put(f"{line}\n")
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self.partial:
+            self.put(self.partial)
+            self.partial = ''
+        self.put(self.END)
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def __iter__(self) -> Iterator[str]:
+        while not self.finished:
+            line = self.lines.get()
+            if line is self.END:
+                self.finished = True
+                return
+            yield line
+
+class LineInput:
+    """Read-only text stream over an iterator of lines, used as a pipeline stage's stdin."""
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self.lines = iter(lines)
+
+    def readline(self, size: int = -1) -> str:
+        return next(self.lines, '')
+
+    def read(self, size: int = -1) -> str:
+        return ''.join(self.lines)
+
+    def readlines(self) -> list[str]:
+        return list(self.lines)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.lines
+
+    def flush(self) -> None:
+        pass
+
+def current_stdout() -> TextIO:
+    """The stream print() writes to in this context, without the routing wrapper."""
+    return sys.stdout.current() if isinstance(sys.stdout, RoutedStream) else sys.stdout
+
+class TeeOutput:
+    """Passes writes through to stream and keeps a copy of up to max_chars characters."""
+
+    def __init__(self, stream: TextIO, max_chars: int) -> None:
+        self.stream = stream
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.size = 0
+        self.overflowed = False
+
+    def write(self, text: str) -> int:
+        if not self.overflowed:
+            self.size += len(text)
+            if self.size > self.max_chars:
+                self.overflowed = True
+                self.parts = []
+            else:
+                self.parts.append(text)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def getvalue(self) -> str:
+        return ''.join(self.parts)
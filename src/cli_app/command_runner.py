@@ -1,67 +1,809 @@
+import concurrent.futures
 import importlib.util
 import importlib
+import os
 import shlex
-from typing import Optional
-from cli_app.config import LOGGER_CONFIG
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future
+from contextlib import redirect_stdout
+from contextvars import ContextVar, copy_context
+from io import StringIO
+from types import ModuleType
+from typing import Any, Callable, Coroutine, Iterable, Iterator, NamedTuple, Optional, TextIO, Union
+from cli_app.arg_schema import ArgumentSchemaError, get_parser, parse_arguments
+from cli_app.command_index import find_folders
+from cli_app.command_output import (
+    LineInput,
+    OutputLimitExceeded,
+    PipeOutput,
+    RingBufferOutput,
+    SpooledOutput,
+    TeeOutput,
+    current_stdout,
+    routed_output
+)
+from cli_app.command_search import get_search_index
+from cli_app.command_stats import CommandTiming, record_timing, start_memory_tracing, stop_memory_tracing
+from cli_app.config import (
+    ASYNC_COMMAND_TIMEOUT,
+    COMMAND_RESULT_LOG_LEVEL,
+    COMMAND_USAGE_FILE,
+    ISOLATE_COMMANDS,
+    ISOLATED_COMMANDS,
+    LOGGER_CONFIG,
+    PARALLEL_PROCESSES,
+    PARALLEL_THREADS,
+    PIPE_BUFFER_LINES,
+    PRELOAD_COMMAND_COUNT,
+    PRELOAD_WORKERS,
+    RESULT_CACHE_MAX_OUTPUT,
+    RESULT_CACHE_TTL,
+    UNIQUE_PREFIX_EXECUTION,
+    WORKER_CPU_LIMIT,
+    WORKER_MEMORY_LIMIT
+)
+from cli_app.result_cache import get_result_cache
+from shared.lazy_import import lazy_import
 from shared.logger import setup_logger
 
 logger = setup_logger(__name__, LOGGER_CONFIG)
 
-def execute_user_input(user_input: str, folders: dict[str, dict[str, dict[str, str]]], selected_folder: str):
+# Only needed once a command runs, not for the first prompt.
+asyncio = lazy_import('asyncio')
+inspect = lazy_import('inspect')
+json = lazy_import('json')
+worker_pool = lazy_import('cli_app.worker_pool')
+
+class RegisteredModule(NamedTuple):
+    module: ModuleType
+    run: Callable
+    file: str
+    mtime: Optional[int]
+
+class IsolatedModule(NamedTuple):
+    """What a worker reports about a command module it ran, the app itself does not import it."""
+    file: str
+    mtime: Optional[int]
+    cacheable: bool
+    cache_ttl: float
+
+class Job(NamedTuple):
+    folder: str
+    command: str
+    args: list[str]
+
+    @property
+    def name(self) -> str:
+        return f"{self.folder}.{self.command}"
+
+module_registry: dict[str, RegisteredModule] = {}
+isolated_modules: dict[str, IsolatedModule] = {}
+registry_lock = threading.Lock()
+command_usage: Counter = Counter()
+executors: dict[str, Executor] = {}
+output_prefix: ContextVar[Optional[list]] = ContextVar('output_prefix', default=None)
+event_loop: Optional['asyncio.AbstractEventLoop'] = None
+event_loop_lock = threading.Lock()
+QUOTING_CHARS = frozenset('"\'\\')
+
+def execute_user_input(
+    user_input: str,
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: str,
+    on_ambiguity: str = 'prompt'
+) -> bool:
+    stages = split_pipeline(user_input)
+    if len(stages) > 1:
+        return run_pipeline(stages, folders, selected_folder, on_ambiguity)
+
+    job = resolve_job(user_input, folders, selected_folder, on_ambiguity)
+    if job is None:
+        return False
+    return run_command(job.folder, job.command, job.args)
+
+def resolve_job(
+    user_input: str,
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    on_ambiguity: str = 'prompt'
+) -> Optional[Job]:
     command, args = parse_input(user_input)
 
+    qualified_folder = split_qualified_command(folders, command)
+    if qualified_folder is not None:
+        return Job(*qualified_folder, args)
+
     matching_folders = find_command_in_folders(folders, command)
 
+    if not matching_folders and UNIQUE_PREFIX_EXECUTION:
+        completion = get_search_index(folders).unique_completion(command)
+        if completion is not None:
+            logger.info(f"Completed '{command}' to '{completion}'.")
+            command = completion
+            matching_folders = find_command_in_folders(folders, command)
+
     if len(matching_folders) == 1:
         selected_folder = matching_folders[0]
         logger.info(f"Automatically selected folder: {selected_folder}")
-        run_command(selected_folder, command, args)
-        return
+        return Job(selected_folder, command, args)
 
     if len(matching_folders) > 1:
-        selected_folder = display_menu(matching_folders)
-        run_command(selected_folder, command, args)
-        return
+        selected_folder = resolve_ambiguity(matching_folders, selected_folder, on_ambiguity)
+        if selected_folder is None:
+            return None
+        return Job(selected_folder, command, args)
 
     logger.info(f"Unknown command '{command}'. Type 'help' for a list of commands.")
+    suggestions = get_search_index(folders).suggest(command)
+    if suggestions:
+        logger.info(f"Did you mean: {', '.join(suggestions)}?")
+    return None
+
+def iter_command_tokens(user_input: str, operators: str) -> Iterator[tuple[str, bool]]:
+    """
+    (token, is_operator) pairs of a command line. Only a single unquoted operator character
+    is an operator, a quoted or escaped one is part of a word, and a run of them such as
+    '&&' or '||' is not supported and raises ValueError like an unclosed quote.
+    """
+    lexer = shlex.shlex(user_input, posix=True, punctuation_chars=operators)
+    lexer.whitespace_split = True
+    while True:
+        # A token starting with an operator character outside quotes is an operator token.
+        start = lexer.instream.tell() - len(lexer._pushback_chars)
+        token = lexer.get_token()
+        if token is None:
+            return
+        first = user_input[start:].lstrip(lexer.whitespace)[:1]
+        is_operator = bool(first) and first in operators
+        if is_operator and len(token) > 1:
+            raise ValueError(f"Unsupported operator '{token}'")
+        yield token, is_operator
+
+def split_command_line(user_input: str) -> list[tuple[str, bool]]:
+    if ';' not in user_input and '&' not in user_input:
+        return [(user_input, False)]
+
+    segments = []
+    stages: list[list[str]] = [[]]
+    for token, is_operator in iter_command_tokens(user_input, ';&|'):
+        if not is_operator:
+            stages[-1].append(token)
+        elif token in (';', '&'):
+            if stages[-1]:
+                segments.append((join_stages(stages), token == '&'))
+            stages = [[]]
+        else:
+            stages.append([])
+
+    if stages[-1]:
+        segments.append((join_stages(stages), False))
+    return segments
+
+def join_stages(stages: list[list[str]]) -> str:
+    return ' | '.join(shlex.join(tokens) for tokens in stages)
+
+def split_pipeline(user_input: str) -> list[str]:
+    if '|' not in user_input:
+        return [user_input]
+
+    stages: list[list[str]] = [[]]
+    for token, is_operator in iter_command_tokens(user_input, '|'):
+        if is_operator:
+            stages.append([])
+        else:
+            stages[-1].append(token)
+    return [shlex.join(tokens) for tokens in stages]
+
+def execute_command_line(
+    user_input: str,
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    on_ambiguity: str = 'prompt'
+) -> bool:
+    segments = split_command_line(user_input)
+    if len(segments) == 1 and not segments[0][1]:
+        return execute_user_input(segments[0][0], folders, selected_folder, on_ambiguity)
+    return run_segments(segments, folders, selected_folder, on_ambiguity)
+
+def run_parallel_block(
+    lines: Iterable[str],
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    on_ambiguity: str = 'prompt'
+) -> bool:
+    segments = [(segment, True) for line in lines for segment, _ in split_command_line(line)]
+    return run_segments(segments, folders, selected_folder, on_ambiguity)
+
+def split_qualified_command(folders: dict[str, dict[str, dict[str, str]]], command: str) -> Optional[tuple[str, str]]:
+    folder, separator, command_name = command.rpartition('.')
+    if separator and command_name in folders.get(folder, {}):
+        return folder, command_name
+    return None
+
+def resolve_ambiguity(matching_folders: list[str], selected_folder: Optional[str], on_ambiguity: str) -> Optional[str]:
+    if on_ambiguity == 'prompt':
+        return display_menu(matching_folders)
+
+    if selected_folder in matching_folders:
+        return selected_folder
+
+    if on_ambiguity == 'first':
+        logger.info(f"Multiple folders contain this command, using the first: {matching_folders[0]}")
+        return matching_folders[0]
+
+    logger.error(f"Multiple folders contain this command: {', '.join(matching_folders)}. Use folder.command to pick one.")
+    return None
 
 def parse_input(user_input: str) -> tuple[str, list[str]]:
     if not user_input.strip():
         return '', []
 
-    parts = shlex.split(user_input)
+    # Without quotes or escapes shlex would only split on whitespace.
+    parts = user_input.split() if QUOTING_CHARS.isdisjoint(user_input) else shlex.split(user_input)
     command = parts[0]
     args = parts[1:]
     return command, args
 
 def find_command_in_folders(folders: dict[str, dict[str, dict[str, str]]], command_name: str) -> list[str]:
-    return [folder_name for folder_name, commands in folders.items() if command_name in commands]
+    return find_folders(folders, command_name)
 
-def run_command(selected_folder: str, command: str, args: Optional[list[str]] = None) -> None:
-    args = args or []
-    
+def get_file_mtime(file: str) -> Optional[int]:
+    try:
+        return os.stat(file).st_mtime_ns
+    except OSError:
+        return None
+
+def get_registered_run(module_name: str) -> Optional[Callable]:
+    entry = module_registry.get(module_name)
+    if entry is None:
+        return None
+
+    if get_file_mtime(entry.file) != entry.mtime:
+        logger.debug(f"Module '{module_name}' changed on disk, it will be re-imported.")
+        return None
+
+    return entry.run
+
+def import_command_module(module_name: str) -> ModuleType:
+    with registry_lock:
+        stale_entry = module_registry.pop(module_name, None)
+
+    command_module = importlib.import_module(module_name)
+    if stale_entry is not None and command_module is stale_entry.module:
+        command_module = importlib.reload(command_module)
+
+    return command_module
+
+def register_module(module_name: str, command_module: ModuleType) -> None:
+    file = getattr(command_module, '__file__', None)
+    if not isinstance(file, str):
+        return
+
+    with registry_lock:
+        module_registry[module_name] = RegisteredModule(command_module, command_module.run, file, get_file_mtime(file))
+
+def resolve_command(selected_folder: str, command: str) -> Optional[Callable]:
     module_name = f"{selected_folder}.{command}"
-    logger.debug(f"Attempting to find module: {module_name}")
-    
+
+    run = get_registered_run(module_name)
+    if run is not None:
+        return run
+
+    logger.debug("Attempting to find module: %s", module_name)
+
     spec = importlib.util.find_spec(module_name)
     if spec is None:
         logger.error(f"Command '{command}' not found in folder '{selected_folder}'.")
-        return
+        return None
 
     try:
-        command_module = importlib.import_module(module_name)
+        command_module = import_command_module(module_name)
     except Exception as e:
         logger.exception(f"Failed to import module '{module_name}'. Error: {e}")
+        return None
+
+    if not hasattr(command_module, 'run'):
+        logger.warning(f"Command '{command}' does not have a 'run' function.")
+        return None
+
+    register_module(module_name, command_module)
+    return command_module.run
+
+def run_command(selected_folder: str, command: str, args: Optional[list[str]] = None) -> bool:
+    args = args or []
+
+    if ISOLATE_COMMANDS or f"{selected_folder}.{command}" in ISOLATED_COMMANDS:
+        timing = run_isolated(selected_folder, command, args)
+    else:
+        timing = run_in_process(selected_folder, command, args)
+    if timing is None:
+        return False
+
+    command_usage[f"{selected_folder}.{command}"] += 1
+    record_timing(f"{selected_folder}.{command}", timing)
+
+    status = 'ok' if timing.succeeded else 'failed'
+    logger.log(
+        COMMAND_RESULT_LOG_LEVEL,
+        "Command '%s.%s' finished in %.3f ms: %s",
+        selected_folder, command, timing.run_seconds * 1000, status,
+        extra={'command': command, 'folder': selected_folder, 'duration': timing.run_seconds, 'status': status}
+    )
+    return timing.succeeded
+
+def run_in_process(selected_folder: str, command: str, args: list[str]) -> Optional[CommandTiming]:
+    started = time.perf_counter()
+    run = resolve_command(selected_folder, command)
+    if run is None:
+        return None
+    import_seconds = time.perf_counter() - started
+
+    memory_tracing = start_memory_tracing()
+    started = time.perf_counter()
+    if get_command_attribute(selected_folder, command, 'cacheable', False) is True:
+        succeeded = call_cached_run(selected_folder, command, run, args)
+    else:
+        succeeded = call_run(selected_folder, command, run, args)
+    return CommandTiming(import_seconds, time.perf_counter() - started, stop_memory_tracing(memory_tracing), succeeded)
+
+def run_worker_request(folder: str, command: str, args: list[str]) -> tuple[Optional[CommandTiming], Optional[IsolatedModule]]:
+    """Runs in a worker process: the command within its limits. Results are cached by the app, not here."""
+    started = time.perf_counter()
+    run = resolve_command(folder, command)
+    if run is None:
+        return None, None
+    import_seconds = time.perf_counter() - started
+
+    entry = module_registry.get(f"{folder}.{command}")
+    reported = None
+    if entry is not None:
+        cacheable = get_command_attribute(folder, command, 'cacheable', False) is True
+        reported = IsolatedModule(entry.file, entry.mtime, cacheable, get_command_attribute(folder, command, 'cache_ttl', RESULT_CACHE_TTL))
+    memory_limit = get_command_attribute(folder, command, 'memory_limit', WORKER_MEMORY_LIMIT)
+    cpu_limit = get_command_attribute(folder, command, 'cpu_limit', WORKER_CPU_LIMIT)
+
+    memory_tracing = start_memory_tracing()
+    started = time.perf_counter()
+    try:
+        with worker_pool.command_limits(memory_limit, cpu_limit):
+            succeeded = call_run(folder, command, run, args)
+    except MemoryError:
+        logger.error(f"Command '{folder}.{command}' exceeded its memory limit.")
+        succeeded = False
+    return CommandTiming(import_seconds, time.perf_counter() - started, stop_memory_tracing(memory_tracing), succeeded), reported
+
+def call_worker(selected_folder: str, command: str, args: list[str]) -> Optional[CommandTiming]:
+    started = time.perf_counter()
+    try:
+        result = worker_pool.run_in_worker(run_worker_request, selected_folder, command, args)
+    except OutputLimitExceeded as e:
+        logger.error(f"Command '{selected_folder}.{command}' was stopped: {e}", extra={'command': command, 'folder': selected_folder, 'status': 'error'})
+        return CommandTiming(0.0, time.perf_counter() - started, None, False)
+
+    if result is None:
+        logger.error(f"Command '{selected_folder}.{command}' did not finish in its worker process.")
+        return CommandTiming(0.0, time.perf_counter() - started, None, False)
+    timing, reported = result
+    if reported is not None:
+        isolated_modules[f"{selected_folder}.{command}"] = reported
+    return timing
+
+def run_isolated(selected_folder: str, command: str, args: list[str]) -> Optional[CommandTiming]:
+    """
+    Runs a command in a worker process. Its output and input go through this context's
+    streams, so an isolated command is captured, piped and prefixed like the others.
+    Commands the worker reported as cacheable are memoized here.
+    """
+    reported = isolated_modules.get(f"{selected_folder}.{command}")
+    if reported is not None and not reported.cacheable:
+        return call_worker(selected_folder, command, args)
+
+    cache = get_result_cache()
+    key = cache.make_key(selected_folder, command, args)
+    started = time.perf_counter()
+    if reported is not None and replay_cached_result(key, selected_folder, command, args, get_file_mtime(reported.file)):
+        return CommandTiming(0.0, time.perf_counter() - started, None, True)
+
+    # Until a worker ran it, whether the command is cacheable is not known.
+    output = TeeOutput(current_stdout(), RESULT_CACHE_MAX_OUTPUT)
+    with routed_output(stdout=output):
+        timing = call_worker(selected_folder, command, args)
+    reported = isolated_modules.get(f"{selected_folder}.{command}")
+    if timing is not None and timing.succeeded and reported is not None and reported.cacheable and not output.overflowed:
+        cache.put(key, output.getvalue(), reported.cache_ttl, reported.mtime)
+    return timing
+
+def replay_cached_result(key: str, selected_folder: str, command: str, args: list[str], mtime: Optional[int]) -> bool:
+    cached = get_result_cache().get(key, mtime)
+    if cached is None:
+        return False
+    logger.info(f"Using the cached result of '{selected_folder}.{command}' with arguments: {args}")
+    sys.stdout.write(cached.output)
+    return True
+
+def call_cached_run(selected_folder: str, command: str, run: Callable, args: list[str]) -> bool:
+    """Replays the memoized output of a cacheable command, or runs it and memoizes its output when it succeeds."""
+    cache = get_result_cache()
+    key = cache.make_key(selected_folder, command, args)
+    entry = module_registry.get(f"{selected_folder}.{command}")
+    mtime = entry.mtime if entry is not None else None
+
+    if replay_cached_result(key, selected_folder, command, args, mtime):
+        return True
+
+    output = TeeOutput(current_stdout(), RESULT_CACHE_MAX_OUTPUT)
+    with routed_output(stdout=output):
+        succeeded = call_run(selected_folder, command, run, args)
+    if succeeded and not output.overflowed:
+        cache.put(key, output.getvalue(), get_command_attribute(selected_folder, command, 'cache_ttl', RESULT_CACHE_TTL), mtime)
+    return succeeded
+
+def call_run(selected_folder: str, command: str, run: Callable, args: list[str]) -> bool:
+    try:
+        logger.info(f"Running command '{command}' with arguments: {args}")
+        parser = get_argument_parser(selected_folder, command)
+        run_args = parse_arguments(parser, args) if parser is not None else args
+        if inspect.iscoroutinefunction(run):
+            timeout = get_command_attribute(selected_folder, command, 'timeout', ASYNC_COMMAND_TIMEOUT)
+            run_coroutine(run(run_args), timeout)
+        else:
+            run(run_args)
+    except KeyboardInterrupt:
+        logger.warning(f"Command '{selected_folder}.{command}' was cancelled.", extra={'command': command, 'folder': selected_folder, 'status': 'cancelled'})
+        return False
+    except ArgumentSchemaError as e:
+        logger.error(
+            f"Invalid arguments for '{selected_folder}.{command}': {e}\n{parser.format_usage().strip()}",
+            extra={'command': command, 'folder': selected_folder, 'status': 'error'}
+        )
+        return False
+    except BrokenPipeError:
+        logger.debug("Command '%s.%s' stopped, its output is no longer read.", selected_folder, command)
+        return True
+    except OutputLimitExceeded as e:
+        logger.error(f"Command '{selected_folder}.{command}' was stopped: {e}", extra={'command': command, 'folder': selected_folder, 'status': 'error'})
+        return False
+    except TimeoutError:
+        logger.error(f"Command '{selected_folder}.{command}' timed out.", extra={'command': command, 'folder': selected_folder, 'status': 'timeout'})
+        return False
+    except Exception as e:
+        logger.exception(
+            f"An error occurred while executing the 'run' function in '{selected_folder}.{command}'. Error: {e}",
+            extra={'command': command, 'folder': selected_folder, 'status': 'error'}
+        )
+        return False
+
+    return True
+
+def capture_command(
+    selected_folder: str,
+    command: str,
+    args: Optional[list[str]] = None,
+    max_lines: Optional[int] = None
+) -> tuple[bool, Union[RingBufferOutput, SpooledOutput]]:
+    """
+    Runs a command with its stdout and stderr captured: only the last max_lines lines when
+    given, otherwise everything, spilled to a temporary file once it outgrows memory.
+    """
+    output = RingBufferOutput(max_lines) if max_lines else SpooledOutput()
+    with routed_output(stdout=output, stderr=output):
+        succeeded = run_command(selected_folder, command, args)
+    return succeeded, output
+
+class CommandStream:
+    """
+    Runs a command on its own thread, its output is read line by line while it is written.
+    At most max_lines lines wait unread, the command blocks until they are taken.
+    """
+
+    def __init__(self, job: Job, stdin: Optional[Iterable[str]] = None, max_lines: int = PIPE_BUFFER_LINES) -> None:
+        self.job = job
+        self.stdin = stdin
+        self.pipe = PipeOutput(max_lines)
+        self.succeeded: Optional[bool] = None
+        self.thread = threading.Thread(target=self.produce, name=f"pipe-{job.name}", daemon=True)
+        self.thread.start()
+
+    def produce(self) -> None:
+        try:
+            with routed_output(stdout=self.pipe, stdin=LineInput(self.stdin) if self.stdin is not None else None):
+                self.succeeded = run_command(self.job.folder, self.job.command, self.job.args)
+        finally:
+            self.pipe.close()
+            if isinstance(self.stdin, CommandStream):
+                self.stdin.close()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.pipe)
+
+    def close(self) -> bool:
+        """Stops reading, waits for the command and returns whether it succeeded."""
+        self.pipe.stop()
+        self.thread.join()
+        return bool(self.succeeded)
+
+    def __enter__(self) -> 'CommandStream':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def stream_command(
+    selected_folder: str,
+    command: str,
+    args: Optional[list[str]] = None,
+    stdin: Optional[Iterable[str]] = None
+) -> CommandStream:
+    return CommandStream(Job(selected_folder, command, args or []), stdin)
+
+def run_pipeline(
+    stages: list[str],
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    on_ambiguity: str = 'prompt'
+) -> bool:
+    """
+    Runs `cmd1 | cmd2 | ...` in process: every stage but the last streams its output on a
+    thread, the next stage reads it as sys.stdin line by line, nothing is collected in full.
+    """
+    jobs = [resolve_job(stage, folders, selected_folder, on_ambiguity) for stage in stages]
+    if any(job is None for job in jobs):
+        return False
+
+    streams: list[CommandStream] = []
+    for job in jobs[:-1]:
+        streams.append(CommandStream(job, streams[-1] if streams else None))
+
+    last = jobs[-1]
+    try:
+        with routed_output(stdin=LineInput(streams[-1])):
+            succeeded = run_command(last.folder, last.command, last.args)
+    finally:
+        streams[-1].close()
+    return succeeded and all(stream.succeeded for stream in streams)
+
+class PrefixedOutput:
+    """
+    Replacement for sys.stdout while background jobs run: lines written from a job
+    with a prefix are tagged with it, other writes pass straight through.
+    The prefix lives in a context variable so it follows async commands onto the event loop.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def set_prefix(self, prefix: Optional[str]) -> None:
+        output_prefix.set([prefix, ''] if prefix is not None else None)
+
+    def write(self, text: str) -> int:
+        state = output_prefix.get()
+        if state is None:
+            return self.stream.write(text)
+
+        *lines, state[1] = (state[1] + text).split('\n')
+        self.write_lines(state[0], lines)
+        return len(text)
+
+    def write_lines(self, prefix: str, lines: Iterable[str]) -> None:
+        with self.lock:
+            for line in lines:
+                self.stream.write(f"[{prefix}] {line}\n")
+
+    def flush_prefix(self) -> None:
+        state = output_prefix.get()
+        if state is not None and state[1]:
+            self.write_lines(state[0], [state[1]])
+        self.set_prefix(None)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+def get_executor(kind: str) -> Executor:
+    if kind not in executors:
+        if kind == 'process':
+            executors[kind] = concurrent.futures.ProcessPoolExecutor(max_workers=PARALLEL_PROCESSES)
+        else:
+            executors[kind] = concurrent.futures.ThreadPoolExecutor(max_workers=PARALLEL_THREADS, thread_name_prefix="command")
+    return executors[kind]
+
+def shutdown_executors() -> None:
+    while executors:
+        _, executor = executors.popitem()
+        executor.shutdown(wait=True)
+    stop_event_loop()
+
+def get_command_attribute(folder: str, command: str, name: str, default=None):
+    module_name = f"{folder}.{command}"
+    entry = module_registry.get(module_name)
+    command_module = entry.module if entry is not None else sys.modules.get(module_name)
+    return getattr(command_module, name, default)
+
+def get_argument_parser(folder: str, command: str) -> Optional['argparse.ArgumentParser']:
+    """Parser compiled from the command's `arguments` schema, None when it has none."""
+    schema = get_command_attribute(folder, command, 'arguments')
+    if not isinstance(schema, (list, tuple)):
+        return None
+    return get_parser(f"{folder}.{command}", schema)
+
+def iter_argument_help(folders: dict[str, dict[str, dict[str, str]]], name: str) -> Iterator[str]:
+    qualified_folder = split_qualified_command(folders, name)
+    if qualified_folder is None:
+        matching_folders = find_command_in_folders(folders, name)
+        if len(matching_folders) != 1:
+            return
+        qualified_folder = (matching_folders[0], name)
+
+    try:
+        if resolve_command(*qualified_folder) is None:
+            return
+        parser = get_argument_parser(*qualified_folder)
+    except (ImportError, ValueError, TypeError) as e:
+        logger.debug(f"No argument help for '{name}': {e}")
         return
+    if parser is not None:
+        yield ""
+        yield from parser.format_help().rstrip('\n').split('\n')
 
-    if hasattr(command_module, 'run'):
+def run_prefixed_job(job: Job, output: PrefixedOutput) -> bool:
+    output.set_prefix(job.name)
+    try:
+        return run_command(job.folder, job.command, job.args)
+    finally:
+        output.flush_prefix()
+
+def run_captured_job(job: Job) -> tuple[bool, str]:
+    buffer = StringIO()
+    with redirect_stdout(buffer):
+        succeeded = run_command(job.folder, job.command, job.args)
+    return succeeded, buffer.getvalue()
+
+def submit_job(job: Job, output: PrefixedOutput) -> Future:
+    if resolve_command(job.folder, job.command) is None:
+        failed: Future = Future()
+        failed.set_result(False)
+        return failed
+
+    kind = get_command_attribute(job.folder, job.command, 'executor', 'thread')
+    logger.debug("Scheduling '%s' on the %s pool", job.name, kind, extra={'command': job.command, 'folder': job.folder})
+
+    if kind == 'process':
+        return get_executor('process').submit(run_captured_job, job)
+    return get_executor('thread').submit(run_prefixed_job, job, output)
+
+def gather_jobs(jobs: list[tuple[Job, Future]], output: PrefixedOutput) -> list[str]:
+    failures = []
+    for job, future in jobs:
         try:
-            logger.info(f"Running command '{command}' with arguments: {args}")
-            command_module.run(args)
+            result = future.result()
+            if isinstance(result, tuple):
+                result, captured = result
+                if captured:
+                    output.write_lines(job.name, captured.rstrip('\n').split('\n'))
         except Exception as e:
-            logger.exception(f"An error occurred while executing the 'run' function in '{module_name}'. Error: {e}")
-    else:
-        logger.warning(f"Command '{command}' does not have a 'run' function.")
+            logger.error(f"Background command '{job.name}' failed: {e}")
+            result = False
+
+        if not result:
+            failures.append(job.name)
+    return failures
+
+def run_segments(
+    segments: list[tuple[str, bool]],
+    folders: dict[str, dict[str, dict[str, str]]],
+    selected_folder: Optional[str],
+    on_ambiguity: str = 'prompt'
+) -> bool:
+    succeeded = True
+    background: list[tuple[Job, Future]] = []
+
+    output = PrefixedOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        for segment, in_background in segments:
+            # Pipelines already run their stages on threads, they always run in the foreground.
+            if not in_background or len(split_pipeline(segment)) > 1:
+                succeeded = execute_user_input(segment, folders, selected_folder, on_ambiguity) and succeeded
+                continue
+
+            job = resolve_job(segment, folders, selected_folder, on_ambiguity)
+            if job is None:
+                succeeded = False
+                continue
+            background.append((job, submit_job(job, output)))
+
+        failures = gather_jobs(background, output)
+    finally:
+        sys.stdout = output.stream
+
+    if failures:
+        logger.error(f"{len(failures)} of {len(background)} background commands failed: {', '.join(failures)}")
+    return succeeded and not failures
+
+def get_event_loop() -> 'asyncio.AbstractEventLoop':
+    global event_loop
+
+    with event_loop_lock:
+        if event_loop is None or event_loop.is_closed():
+            event_loop = asyncio.new_event_loop()
+            threading.Thread(target=event_loop.run_forever, name="command-event-loop", daemon=True).start()
+        return event_loop
+
+def stop_event_loop() -> None:
+    global event_loop
+
+    with event_loop_lock:
+        if event_loop is None:
+            return
+        loop, event_loop = event_loop, None
+
+    asyncio.run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+async def run_in_context(coroutine: Coroutine, context_values: dict) -> Any:
+    for variable, value in context_values.items():
+        variable.set(value)
+    return await coroutine
+
+def run_coroutine(coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+    future = asyncio.run_coroutine_threadsafe(run_in_context(coroutine, dict(copy_context())), get_event_loop())
+    try:
+        return future.result(timeout)
+    except (KeyboardInterrupt, TimeoutError):
+        future.cancel()
+        raise
+
+def load_command_usage(usage_file: str = COMMAND_USAGE_FILE) -> None:
+    try:
+        with open(usage_file, 'r') as f:
+            command_usage.update(json.load(f))
+    except (json.JSONDecodeError, OSError, TypeError, ValueError) as e:
+        logger.debug(f"No command usage loaded from {usage_file}: {e}")
+
+def save_command_usage(usage_file: str = COMMAND_USAGE_FILE) -> None:
+    try:
+        if os.path.dirname(usage_file):
+            os.makedirs(os.path.dirname(usage_file), exist_ok=True)
+        with open(usage_file, 'w') as f:
+            json.dump(dict(command_usage), f)
+    except OSError as e:
+        logger.warning(f"Could not save command usage to {usage_file}: {e}")
+
+def preload_command(module_name: str) -> None:
+    if get_registered_run(module_name) is not None:
+        return
+
+    try:
+        command_module = import_command_module(module_name)
+    except Exception as e:
+        logger.debug(f"Preloading '{module_name}' failed: {e}")
+        return
+
+    if hasattr(command_module, 'run'):
+        register_module(module_name, command_module)
+
+def start_preloader(
+    folders: dict[str, dict[str, dict[str, str]]],
+    count: int = PRELOAD_COMMAND_COUNT,
+    max_workers: int = PRELOAD_WORKERS
+) -> list[Future]:
+    available = {f"{folder}.{command}" for folder, commands in folders.items() for command in commands}
+    most_used = [module_name for module_name, _ in command_usage.most_common() if module_name in available][:count]
+    if not most_used:
+        return []
+
+    logger.debug("Preloading commands: %s", most_used)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preload")
+    futures = [executor.submit(preload_command, module_name) for module_name in most_used]
+    executor.shutdown(wait=False)
+    return futures
 
 def display_menu(options: list[str]) -> str:
     logger.info("Multiple folders contain this command:")
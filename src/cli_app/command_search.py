@@ -0,0 +1,206 @@
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from operator import itemgetter
+from typing import Iterable, Optional
+from cli_app.command_index import CommandMap, get_cached, get_command_index
+from cli_app.config import SUGGESTION_LIMIT
+
+GRAM_SIZE = 3
+MAX_COUNTED_POSTINGS = 1500
+SUGGESTION_CANDIDATES = 20
+
+search_index_lock = threading.Lock()
+
+def edit_distance(first: str, second: str, max_distance: int) -> int:
+    """
+    Levenshtein distance counting an adjacent transposition as one edit, capped at
+    max_distance + 1 and returned as soon as the rest of second cannot bring it back within max_distance.
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+
+    # A common prefix and suffix do not change the distance, typos usually leave long ones.
+    start = 0
+    while start < len(first) and start < len(second) and first[start] == second[start]:
+        start += 1
+    end = 0
+    while end < len(first) - start and end < len(second) - start and first[-1 - end] == second[-1 - end]:
+        end += 1
+    first = first[start:len(first) - end]
+    second = second[start:len(second) - end]
+    if not first or not second:
+        return min(max(len(first), len(second)), max_distance + 1)
+
+    # Hyyro's bit-vector algorithm: a DP column of first is kept as the bits of a few ints,
+    # each character of second costs a dozen int operations instead of a row of cells.
+    limit = max_distance + 1
+    mask = (1 << len(first)) - 1
+    last_bit = 1 << (len(first) - 1)
+    matches: dict[str, int] = {}
+    for position, char in enumerate(first):
+        matches[char] = matches.get(char, 0) | 1 << position
+
+    positive, negative, diagonal, previous_match = mask, 0, 0, 0
+    distance = len(first)
+    remaining = len(second)
+    for char in second:
+        match = matches.get(char, 0)
+        transposed = ((~diagonal & match) << 1) & previous_match
+        diagonal = ((((match & positive) + positive) ^ positive) | match | negative | transposed) & mask
+        horizontal_positive = negative | ~(diagonal | positive) & mask
+        horizontal_negative = diagonal & positive
+        if horizontal_positive & last_bit:
+            distance += 1
+        elif horizontal_negative & last_bit:
+            distance -= 1
+        remaining -= 1
+        # Each remaining character lowers the distance by one at most.
+        if distance - remaining > max_distance:
+            return limit
+        horizontal_positive = (horizontal_positive << 1 | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        positive = horizontal_negative | ~(diagonal | horizontal_positive) & mask
+        negative = diagonal & horizontal_positive
+        previous_match = match
+    return min(distance, limit)
+
+def get_grams(name: str) -> set[str]:
+    padded = f"{' ' * (GRAM_SIZE - 1)}{name} "
+    return {padded[index:index + GRAM_SIZE] for index in range(len(padded) - GRAM_SIZE + 1)}
+
+def build_grams(names: Iterable[str]) -> dict[str, dict[int, list[str]]]:
+    """Names by trigram, then by length: a suggestion only looks at names of about its length."""
+    grams: dict[str, dict[int, list[str]]] = {}
+    add_gram = grams.setdefault
+    for name in names:
+        length = len(name)
+        for gram in get_grams(name):
+            add_gram(gram, {}).setdefault(length, []).append(name)
+    return grams
+
+class CommandSearchIndex:
+    """
+    Prefix and "did you mean" lookups over command names.
+    Prefix queries use binary search over the sorted names (the trie role, O(log n + k)),
+    suggestions use a trigram index to pick a few candidates before computing edit distances.
+    The trigram index is built with the names, updated() reuses it for a changed catalog.
+    """
+
+    def __init__(self, names: Iterable[str], grams: Optional[dict[str, dict[int, list[str]]]] = None) -> None:
+        self.names = sorted(set(names))
+        self.grams = build_grams(self.names) if grams is None else grams
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, f"{prefix}\U0010ffff", start)
+        return start, end
+
+    def starting_with(self, prefix: str, limit: Optional[int] = None) -> list[str]:
+        start, end = self.prefix_range(prefix)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.names[start:end]
+
+    def unique_completion(self, prefix: str) -> Optional[str]:
+        start, end = self.prefix_range(prefix)
+        return self.names[start] if prefix and end - start == 1 else None
+
+    def updated(self, names: Iterable[str]) -> 'CommandSearchIndex':
+        """
+        The index of names, sharing this index's postings: only the postings of the grams
+        of added and removed names are copied and changed, this index is left as it is.
+        """
+        names = set(names)
+        current = set(self.names)
+        added = names - current
+        removed = current - names
+        if not added and not removed:
+            return self
+        if len(added) + len(removed) > len(names) // 4:
+            return CommandSearchIndex(names)
+
+        grams = dict(self.grams)
+        copied_grams: set[str] = set()
+        copied: set[tuple[str, int]] = set()
+        for name in [*removed, *added]:
+            length = len(name)
+            for gram in get_grams(name):
+                if gram not in copied_grams:
+                    grams[gram] = dict(grams.get(gram, {}))
+                    copied_grams.add(gram)
+                if (gram, length) not in copied:
+                    grams[gram][length] = [other for other in grams[gram].get(length, ()) if other not in removed]
+                    copied.add((gram, length))
+                if name in added:
+                    grams[gram][length].append(name)
+
+        for gram in copied_grams:
+            grams[gram] = {length: postings for length, postings in grams[gram].items() if postings}
+            if not grams[gram]:
+                del grams[gram]
+
+        sorted_names = list(self.names)
+        for name in removed:
+            del sorted_names[bisect_left(sorted_names, name)]
+        for name in added:
+            insort(sorted_names, name)
+
+        index = CommandSearchIndex.__new__(CommandSearchIndex)
+        index.names = sorted_names
+        index.grams = grams
+        return index
+
+    def suggest(self, name: str, limit: int = SUGGESTION_LIMIT) -> list[str]:
+        if not name:
+            return []
+
+        # Only names within the edit distance limit in length can match, closest lengths first
+        # so that they win ties. The rarest grams say the most about a name, counting stops
+        # at MAX_COUNTED_POSTINGS.
+        max_distance = max(1, len(name) // 3)
+        lengths = sorted(range(len(name) - max_distance, len(name) + max_distance + 1), key=lambda length: abs(length - len(name)))
+        postings = []
+        for gram in get_grams(name):
+            by_length = self.grams.get(gram)
+            if by_length is not None:
+                names = [by_length[length] for length in lengths if length in by_length]
+                postings.append((sum(map(len, names)), gram, names))
+        postings.sort(key=itemgetter(0, 1))
+
+        counts: Counter = Counter()
+        counted = 0
+        for size, _, names in postings:
+            if counted and counted + size > MAX_COUNTED_POSTINGS:
+                break
+            for same_length in names:
+                counts.update(same_length[:MAX_COUNTED_POSTINGS])
+            counted += size
+
+        # Once limit names are found, the others only have to be checked against the worst of them.
+        scored: list[tuple[int, str]] = []
+        for candidate, _ in counts.most_common(SUGGESTION_CANDIDATES):
+            bound = scored[limit - 1][0] if len(scored) >= limit else max_distance
+            distance = edit_distance(name, candidate, bound)
+            if distance <= bound:
+                insort(scored, (distance, candidate))
+
+        return [candidate for _, candidate in scored[:limit]]
+
+def build_search_index(folders: dict[str, dict[str, dict[str, str]]]) -> CommandSearchIndex:
+    names = get_command_index(folders)
+    # The index of the previous catalog version, updated rather than rebuilt after a reload.
+    _, previous = folders.derived.get('search_index', (None, None)) if isinstance(folders, CommandMap) else (None, None)
+    if previous is not None:
+        return previous.updated(names)
+    return CommandSearchIndex(names)
+
+def get_search_index(folders: dict[str, dict[str, dict[str, str]]]) -> CommandSearchIndex:
+    with search_index_lock:
+        return get_cached(folders, 'search_index', build_search_index)
+
+def warm_search_index(folders: dict[str, dict[str, dict[str, str]]]) -> threading.Thread:
+    """Builds the search index in the background, so the first unknown command does not wait for it."""
+    thread = threading.Thread(target=get_search_index, args=(folders,), name="search-index", daemon=True)
+    thread.start()
+    return thread
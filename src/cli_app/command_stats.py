@@ -0,0 +1,101 @@
+import math
+import sys
+import threading
+from collections import deque
+from typing import Any, Callable, NamedTuple, Optional, TextIO
+from cli_app.config import COMMAND_NAME_MAX_LENGTH, PROFILE_TOP, STATS_HISTORY, TRACK_COMMAND_MEMORY
+from cli_app.result_cache import format_cache_stats
+from shared.lazy_import import lazy_import
+
+cProfile = lazy_import('cProfile')
+pstats = lazy_import('pstats')
+tracemalloc = lazy_import('tracemalloc')
+
+class CommandTiming(NamedTuple):
+    import_seconds: float
+    run_seconds: float
+    peak_memory: Optional[int]
+    succeeded: bool
+
+command_timings: dict[str, deque] = {}
+timings_lock = threading.Lock()
+
+memory_tracing_users = 0
+memory_tracing_lock = threading.Lock()
+
+def start_memory_tracing(enabled: bool = TRACK_COMMAND_MEMORY) -> bool:
+    """
+    tracemalloc traces the whole process, so commands running at the same time share one
+    trace: it is started by the first of them and stopped when the last one is done.
+    """
+    global memory_tracing_users
+    if not enabled:
+        return False
+    with memory_tracing_lock:
+        if memory_tracing_users == 0:
+            if tracemalloc.is_tracing():
+                # Traced by someone else, whose peak we must not reset.
+                return False
+            tracemalloc.start()
+        memory_tracing_users += 1
+    return True
+
+def stop_memory_tracing(started: bool) -> Optional[int]:
+    """Peak traced memory of the process since the trace started, not of this command alone."""
+    global memory_tracing_users
+    if not started:
+        return None
+    with memory_tracing_lock:
+        _, peak = tracemalloc.get_traced_memory()
+        memory_tracing_users -= 1
+        if memory_tracing_users == 0:
+            tracemalloc.stop()
+    return peak
+
+def record_timing(name: str, timing: CommandTiming) -> None:
+    with timings_lock:
+        command_timings.setdefault(name, deque(maxlen=STATS_HISTORY)).append(timing)
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+def format_stats() -> str:
+    with timings_lock:
+        snapshot = {name: list(timings) for name, timings in command_timings.items()}
+
+    if not snapshot:
+        return "No commands have run in this session."
+
+    length = COMMAND_NAME_MAX_LENGTH * 2
+    traced = False
+    lines = [f"{'Command':<{length}}  runs  failed   p50 ms   p95 ms   p99 ms  import ms  peak KiB"]
+    for name, timings in sorted(snapshot.items()):
+        run_times = [timing.run_seconds * 1000 for timing in timings]
+        import_time = sum(timing.import_seconds for timing in timings) * 1000 / len(timings)
+        peaks = [timing.peak_memory for timing in timings if timing.peak_memory is not None]
+        peak = f"{max(peaks) / 1024:.1f}" if peaks else "-"
+        traced = traced or bool(peaks)
+        failed = sum(1 for timing in timings if not timing.succeeded)
+        lines.append(
+            f"{name:<{length}}  {len(timings):>4}  {failed:>6}"
+            f" {percentile(run_times, 50):>8.2f} {percentile(run_times, 95):>8.2f} {percentile(run_times, 99):>8.2f}"
+            f" {import_time:>10.2f} {peak:>9}"
+        )
+
+    if traced:
+        lines.append("Peak memory is traced for the whole process, it includes commands that ran at the same time.")
+
+    cache_stats = format_cache_stats()
+    if cache_stats is not None:
+        lines.extend(["", cache_stats])
+    return "\n".join(lines)
+
+def profile_call(function: Callable[[], Any], top: int = PROFILE_TOP, stream: Optional[TextIO] = None) -> Any:
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function)
+    finally:
+        stats = pstats.Stats(profiler, stream=stream or sys.stdout)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
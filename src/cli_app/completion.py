@@ -0,0 +1,140 @@
+import os
+import re
+from bisect import bisect_left
+from functools import partial
+from typing import Callable, Optional
+from cli_app.cli_helpers import BUILTIN_COMMANDS
+from cli_app.command_index import get_cached
+from cli_app.config import COMPLETION_LIMIT, HISTORY_FILE, HISTORY_LENGTH, LOGGER_CONFIG
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger
+
+# Completion is set up before the first prompt, these are only needed for argument completion.
+arg_schema = lazy_import('cli_app.arg_schema')
+command_metadata = lazy_import('cli_app.command_metadata')
+command_runner = lazy_import('cli_app.command_runner')
+
+try:
+    import readline
+except ImportError:
+    readline = None
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+COMPLETER_DELIMS = ' \t\n;&|'
+
+def build_completion_index(folders: dict[str, dict[str, dict[str, str]]]) -> tuple[str, ...]:
+    """Sorted names only, Tab needs prefix lookups and not the trigrams of the suggestion index."""
+    names = {name for name, _ in BUILTIN_COMMANDS}
+    for folder, commands in folders.items():
+        names.update(commands)
+        names.update(f"{folder}.{command}" for command in commands)
+    return tuple(sorted(names))
+
+def get_completion_index(folders: dict[str, dict[str, dict[str, str]]]) -> tuple[str, ...]:
+    return get_cached(folders, 'completion_index', build_completion_index)
+
+def complete_prefix(names: tuple[str, ...], prefix: str, limit: Optional[int] = None) -> list[str]:
+    start = bisect_left(names, prefix)
+    end = bisect_left(names, f"{prefix}\U0010ffff", start)
+    if limit is not None:
+        end = min(end, start + limit)
+    return list(names[start:end])
+
+def find_argument_completer(folders: dict[str, dict[str, dict[str, str]]], command: str) -> Optional[Callable]:
+    qualified_folder = command_runner.split_qualified_command(folders, command)
+    if qualified_folder is None:
+        matching_folders = command_runner.find_command_in_folders(folders, command)
+        if len(matching_folders) != 1:
+            return None
+        qualified_folder = (matching_folders[0], command)
+
+    metadata = command_metadata.get_metadata(*qualified_folder)
+    if metadata is not None and metadata.options and not metadata.has_complete:
+        return partial(complete_declared_options, metadata.options, qualified_folder)
+    return import_argument_completer(qualified_folder)
+
+def complete_declared_options(options: list[str], qualified_folder: tuple[str, str], text: str, args: list[str]) -> list[str]:
+    """Option names come from the command's source, it is imported only to complete values."""
+    if text.startswith('-'):
+        return sorted(options)
+    complete = import_argument_completer(qualified_folder)
+    return complete(text, args) if complete is not None else []
+
+def import_argument_completer(qualified_folder: tuple[str, str]) -> Optional[Callable]:
+    try:
+        if command_runner.resolve_command(*qualified_folder) is None:
+            return None
+        complete = command_runner.get_command_attribute(*qualified_folder, 'complete')
+        parser = command_runner.get_argument_parser(*qualified_folder) if complete is None else None
+    except (ImportError, ValueError, TypeError):
+        return None
+
+    if parser is not None:
+        return lambda text, args: arg_schema.complete_arguments(parser, text, args)
+    return complete
+
+class CommandCompleter:
+    """
+    readline completer: the first word of each command completes from a sorted index of command names,
+    builtins and folder.command names, later words are passed to the command's
+    optional `complete(text, args)` function, or complete from its `arguments` schema.
+    """
+
+    def __init__(self, folders: dict[str, dict[str, dict[str, str]]]) -> None:
+        self.folders = folders
+        self.matches: list[str] = []
+
+    def get_matches(self, line: str, begin: int, text: str) -> list[str]:
+        segment = re.split(r'[;&|]', line[:begin])[-1]
+        if not segment.strip():
+            return complete_prefix(get_completion_index(self.folders), text, COMPLETION_LIMIT)
+
+        try:
+            command, args = command_runner.parse_input(segment)
+        except ValueError:
+            return []
+        complete = find_argument_completer(self.folders, command)
+        if complete is None:
+            return []
+        try:
+            return [option for option in complete(text, args) if option.startswith(text)]
+        except Exception as e:
+            logger.debug(f"Argument completion for '{command}' failed: {e}")
+            return []
+
+    def complete(self, text: str, state: int) -> Optional[str]:
+        if state == 0:
+            self.matches = self.get_matches(readline.get_line_buffer(), readline.get_begidx(), text)
+        return self.matches[state] if state < len(self.matches) else None
+
+def setup_completion(folders: dict[str, dict[str, dict[str, str]]], history_file: str = HISTORY_FILE) -> Optional[CommandCompleter]:
+    if readline is None:
+        return None
+
+    completer = CommandCompleter(folders)
+    readline.set_completer(completer.complete)
+    readline.set_completer_delims(COMPLETER_DELIMS)
+    if 'libedit' in (readline.__doc__ or ''):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+
+    readline.set_history_length(HISTORY_LENGTH)
+    try:
+        readline.read_history_file(history_file)
+    except OSError:
+        pass
+    return completer
+
+def save_history(history_file: str = HISTORY_FILE) -> None:
+    if readline is None:
+        return
+
+    try:
+        if os.path.dirname(history_file):
+            os.makedirs(os.path.dirname(history_file), exist_ok=True)
+        readline.set_history_length(HISTORY_LENGTH)
+        readline.write_history_file(history_file)
+    except OSError as e:
+        logger.warning(f"Could not save history to {history_file}: {e}")
@@ -10,4 +10,80 @@ LOGGER_CONFIG = {
             'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             'max_bytes': 10 * 1024 * 1024,  # 10 MB, you can adjust this
             'backup_count': 3, 
-        }
\ No newline at end of file
+            'queue': False,
+            'structured': False,
+        }
+
+COMMAND_RESULT_LOG_LEVEL = logging.DEBUG
+
+PRUNED_FOLDERS = ["__pycache__", "node_modules", "site-packages", "venv", "env"]
+FOLLOW_SYMLINKS = False
+
+MANIFEST_CACHE_FILE = '.cli_app_cache/manifest.json'
+USE_MANIFEST_CACHE = True
+
+PRELOAD_COMMANDS = False
+PRELOAD_COMMAND_COUNT = 10
+PRELOAD_WORKERS = 4
+COMMAND_USAGE_FILE = '.cli_app_cache/command_usage.json'
+
+BATCH_ON_AMBIGUITY = 'error'
+
+SERVER_SOCKET = '.cli_app_cache/server.sock'
+SERVER_REQUEST_TIMEOUT = 1.0  # seconds a client has to send its request
+
+PARALLEL_THREADS = 8
+PARALLEL_PROCESSES = None  # None uses os.cpu_count()
+
+ASYNC_COMMAND_TIMEOUT = None  # seconds, a command module can set its own `timeout`
+
+TRACK_COMMAND_MEMORY = False  # tracemalloc slows allocation heavy commands, enable when needed
+STATS_HISTORY = 1000
+PROFILE_TOP = 20
+
+HELP_PAGE_SIZE = 40
+
+UNIQUE_PREFIX_EXECUTION = True
+SUGGESTION_LIMIT = 3
+
+HISTORY_FILE = '.cli_app_cache/history'
+HISTORY_LENGTH = 1000
+COMPLETION_LIMIT = 200
+
+WATCH_COMMANDS = True
+WATCH_POLL_INTERVAL = 1.0
+
+ISOLATE_COMMANDS = False
+ISOLATED_COMMANDS: list[str] = []
+WORKER_POOL_SIZE = 2
+WORKER_PRELOAD_MODULES = ["json", "os", "platform", "shlex"]
+WORKER_MAX_RUNS = 100
+WORKER_MAX_RSS = 512 * 1024 * 1024
+WORKER_MEMORY_LIMIT = None
+WORKER_CPU_LIMIT = None
+
+STARTUP_IMPORT_BUDGET_MS = 50
+IMPORT_REPORT_TOP = 15
+FIRST_PROMPT_BUDGET_MS = 50
+FIRST_PROMPT_RUNS = 5
+
+OUTPUT_MEMORY_LIMIT = 1024 * 1024
+OUTPUT_MAX_CHARS = 64 * 1024 * 1024
+PIPE_BUFFER_LINES = 1000
+
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL = 300.0
+RESULT_CACHE_MAX_OUTPUT = 1024 * 1024
+RESULT_CACHE_ON_DISK = False
+RESULT_CACHE_FILE = '.cli_app_cache/results.json'
+RESULT_CACHE_DISK_SIZE = 1024
+
+DESCRIPTIONS_CACHE_FOLDER = '.cli_app_cache/descriptions'
+
+METADATA_CACHE_FILE = '.cli_app_cache/metadata.json'
+METADATA_WORKERS = 4
+METADATA_PARALLEL_MIN_FILES = 256
+
+COMMAND_ROOTS: list[str] = []  # Several source roots instead of the current directory, e.g. ['.', '/mnt/scripts']
+ROOT_SCAN_TIMEOUT = 2.0
+ROOT_CACHE_FOLDER = '.cli_app_cache/roots'
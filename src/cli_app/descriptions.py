@@ -0,0 +1,184 @@
+import hashlib
+import os
+import threading
+from functools import partial
+from typing import Mapping, Optional
+from cli_app.command_index import CommandCatalog, FolderCommands
+from cli_app.command_metadata import extract_metadata, get_file_metadata
+from cli_app.config import DESCRIPTIONS_CACHE_FOLDER, LOGGER_CONFIG
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+json = lazy_import('json')
+
+SHARD_INDEX_VERSION = 1
+
+def read_descriptions(descriptions_file: str = 'command_descriptions.json') -> dict:
+    try:
+        with open(descriptions_file, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        logger.error(f"Error reading descriptions file {descriptions_file}: {e}")
+        return {}
+
+def read_module_description(path: str) -> Optional[str]:
+    """The module level `description = "..."` of a command file, read with ast without importing it."""
+    try:
+        with open(path, 'rb') as f:
+            return extract_metadata(f.read(), path).description
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.debug(f"Could not read the description of {path}: {e}")
+        return None
+
+def get_file_signature(path: str) -> Optional[list]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+def read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def write_json(path: str, data: dict) -> None:
+    temp_file = f"{path}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_file, path)
+
+class DescriptionStore:
+    """
+    Command descriptions loaded per folder on first use: from the descriptions file, else
+    from the command module's `description` attribute, else the default.
+    The descriptions file is split once into per folder shards in cache_folder, later
+    sessions only read the shards of the folders they show. Module descriptions are cached
+    there too, by file mtime, unless the command's metadata was already extracted.
+    """
+
+    def __init__(
+        self,
+        descriptions_file: str,
+        command_files: Mapping[str, Mapping[str, str]],
+        root: str = ".",
+        cache_folder: str = DESCRIPTIONS_CACHE_FOLDER
+    ) -> None:
+        self.descriptions_file = descriptions_file
+        self.command_files = command_files
+        self.root = root
+        self.cache_folder = cache_folder
+        self.lock = threading.Lock()
+        self.shards: Optional[dict[str, str]] = None
+        self.data: Optional[dict] = None
+        self.folders: dict[str, dict] = {}
+
+    def get_folder(self, folder: str) -> dict:
+        with self.lock:
+            if folder not in self.folders:
+                self.folders[folder] = self.load_folder(folder)
+            return self.folders[folder]
+
+    def forget(self, folder: str) -> None:
+        with self.lock:
+            self.folders.pop(folder, None)
+
+    def load_folder(self, folder: str) -> dict:
+        descriptions = dict(self.read_file_descriptions(folder))
+        missing = {
+            command: path for command, path in self.command_files.get(folder, {}).items()
+            if command not in descriptions
+        }
+        if missing:
+            descriptions.update(self.read_module_descriptions(folder, missing))
+        return descriptions
+
+    def get_shard_path(self, name: str) -> str:
+        return os.path.join(self.cache_folder, name)
+
+    def read_file_descriptions(self, folder: str) -> dict:
+        if self.shards is None:
+            self.shards = self.load_shards()
+        if self.data is not None:
+            return self.data.get(folder, {})
+
+        shard = self.shards.get(folder)
+        if shard is None:
+            return {}
+        descriptions = read_json(self.get_shard_path(shard))
+        if descriptions is None:
+            # A shard went missing, split the descriptions file again.
+            self.shards = self.load_shards(rebuild=True)
+            return self.data.get(folder, {}) if self.data is not None else {}
+        return descriptions
+
+    def load_shards(self, rebuild: bool = False) -> dict[str, str]:
+        index_file = self.get_shard_path('index.json')
+        source = get_file_signature(self.descriptions_file)
+        index = None if rebuild else read_json(index_file)
+        if index is not None and index.get('version') == SHARD_INDEX_VERSION and index.get('source') == source:
+            return index['shards']
+
+        self.data = read_descriptions(self.descriptions_file) if source is not None else {}
+        shards = {
+            folder: f"{hashlib.sha1(folder.encode('utf-8')).hexdigest()[:16]}.json"
+            for folder, descriptions in self.data.items() if isinstance(descriptions, dict)
+        }
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            for folder, shard in shards.items():
+                write_json(self.get_shard_path(shard), self.data[folder])
+            write_json(index_file, {'version': SHARD_INDEX_VERSION, 'source': source, 'shards': shards})
+        except OSError as e:
+            logger.warning(f"Could not cache descriptions in {self.cache_folder}: {e}")
+        logger.debug("Split %s into %d description shards", self.descriptions_file, len(shards))
+        return shards
+
+    def read_module_descriptions(self, folder: str, command_files: dict[str, str]) -> dict[str, str]:
+        cache_file = self.get_shard_path(f"modules-{hashlib.sha1(folder.encode('utf-8')).hexdigest()[:16]}.json")
+        cached = read_json(cache_file) or {}
+
+        descriptions = {}
+        entries = {}
+        for command, relative_path in command_files.items():
+            path = os.path.join(self.root, relative_path)
+            metadata = get_file_metadata(path)
+            if metadata is not None:
+                # Already read when the catalog was built.
+                if metadata.description is not None:
+                    descriptions[command] = metadata.description
+                continue
+
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            entry = cached.get(command)
+            if entry is None or entry[0] != mtime:
+                entry = [mtime, read_module_description(path)]
+            entries[command] = entry
+            if entry[1] is not None:
+                descriptions[command] = entry[1]
+
+        if entries != cached:
+            try:
+                os.makedirs(self.cache_folder, exist_ok=True)
+                write_json(cache_file, entries)
+            except OSError as e:
+                logger.debug(f"Could not cache module descriptions in {cache_file}: {e}")
+        return descriptions
+
+def build_lazy_catalog(
+    command_files: Mapping[str, Mapping[str, str]],
+    store: DescriptionStore
+) -> CommandCatalog:
+    """Catalog of the discovered commands whose descriptions are loaded from store when first read."""
+    return CommandCatalog({
+        folder: FolderCommands.lazy(files, partial(store.get_folder, folder))
+        for folder, files in command_files.items()
+    })
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import time
+from typing import NamedTuple, Optional
+from cli_app.config import COMMAND_NAME_MAX_LENGTH, FIRST_PROMPT_BUDGET_MS, FIRST_PROMPT_RUNS, IMPORT_REPORT_TOP, STARTUP_IMPORT_BUDGET_MS
+
+PROMPT = "> "
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+def parse_import_times(output: str) -> list[ImportTime]:
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), (len(name) - len(name.lstrip()) - 1) // 2))
+        except ValueError:
+            continue
+    return entries
+
+def measure_import_times(module: str = 'cli_app.main') -> list[ImportTime]:
+    """Imports `module` in a fresh interpreter with -X importtime, like the first start of the app."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd()
+    )
+    return parse_import_times(result.stderr)
+
+def format_import_report(entries: list[ImportTime], module: str = 'cli_app.main', top: int = IMPORT_REPORT_TOP) -> str:
+    root_index = next((index for index in range(len(entries) - 1, -1, -1) if entries[index].module == module and entries[index].depth == 0), None)
+    if root_index is None:
+        return f"Could not measure the import of {module}."
+
+    # An entry is listed after everything it imports, so the modules pulled in by `module`
+    # are the ones between the previous top level entry and `module` itself.
+    start = root_index
+    while start > 0 and entries[start - 1].depth > 0:
+        start -= 1
+    imported = entries[start:root_index + 1]
+    slowest = sorted(imported, key=lambda entry: entry.cumulative_us, reverse=True)[:top]
+
+    width = max(COMMAND_NAME_MAX_LENGTH, *[len(entry.module) for entry in slowest]) + 2
+    lines = [f"{'module':<{width}}{'self ms':>10}{'total ms':>10}"]
+    for entry in slowest:
+        lines.append(f"{entry.module:<{width}}{entry.self_us / 1000:>10.2f}{entry.cumulative_us / 1000:>10.2f}")
+
+    total_ms = entries[root_index].cumulative_us / 1000
+    status = "within" if total_ms <= STARTUP_IMPORT_BUDGET_MS else "over"
+    lines.append(f"{module} imports {len(imported)} modules in {total_ms:.2f} ms, {status} the {STARTUP_IMPORT_BUDGET_MS} ms budget.")
+    return "\n".join(lines)
+
+def measure_prompt_time(runs: int = FIRST_PROMPT_RUNS, command: Optional[list[str]] = None, timeout: float = 10.0) -> Optional[float]:
+    """
+    Median milliseconds from starting the app in a fresh interpreter until its first prompt is
+    written, interpreter start and everything done before the prompt included. None when no prompt appears.
+    """
+    command = command or [sys.executable, "-m", "cli_app.main"]
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=os.getcwd())
+        output = b''
+        while PROMPT.encode() not in output:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                break
+            output += chunk
+        elapsed = (time.perf_counter() - start) * 1000
+
+        # Exiting normally lets the app finish what it started in the background.
+        try:
+            process.communicate(b"exit\n", timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+        if PROMPT.encode() not in output:
+            return None
+        times.append(elapsed)
+    return sorted(times)[len(times) // 2] if times else None
+
+def format_prompt_time(milliseconds: Optional[float]) -> str:
+    if milliseconds is None:
+        return "Could not measure the time to the first prompt."
+    status = "within" if milliseconds <= FIRST_PROMPT_BUDGET_MS else "over"
+    return f"First prompt after {milliseconds:.2f} ms, {status} the {FIRST_PROMPT_BUDGET_MS} ms budget."
@@ -1,32 +1,173 @@
+import sys
+import threading
+from types import SimpleNamespace
 from typing import Optional
-from cli_app.config import LOGGER_CONFIG
-from shared.logger import setup_logger
-from cli_app.cli_helpers import get_current_working_directory, get_help
-from cli_app.command_loader import discover_folders_with_commands, load_commands
-from cli_app.command_runner import execute_user_input
+from cli_app.config import BATCH_ON_AMBIGUITY, COMMAND_ROOTS, LOGGER_CONFIG, PRELOAD_COMMANDS, USE_MANIFEST_CACHE, WATCH_COMMANDS
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger, shutdown_logging
+
+# Loaded on first use, so that only what the first prompt needs is imported before it.
+argparse = lazy_import('argparse')
+batch = lazy_import('cli_app.batch')
+catalog_watcher = lazy_import('cli_app.catalog_watcher')
+cli_helpers = lazy_import('cli_app.cli_helpers')
+command_loader = lazy_import('cli_app.command_loader')
+command_runner = lazy_import('cli_app.command_runner')
+command_search = lazy_import('cli_app.command_search')
+command_stats = lazy_import('cli_app.command_stats')
+completion = lazy_import('cli_app.completion')
+import_report = lazy_import('cli_app.import_report')
+manifest_cache = lazy_import('cli_app.manifest_cache')
+server = lazy_import('cli_app.server')
+source_roots = lazy_import('cli_app.source_roots')
 
 logger = setup_logger(__name__, LOGGER_CONFIG)
 
-def main() -> None:
+def parse_arguments(argv: Optional[list[str]] = None) -> 'argparse.Namespace':
+    if not (sys.argv[1:] if argv is None else argv):
+        # Plain interactive start, argparse is not imported before the first prompt.
+        return SimpleNamespace(batch=None, on_ambiguity=BATCH_ON_AMBIGUITY, stop_on_error=False, profile=False, serve=False)
+
+    parser = argparse.ArgumentParser(prog="cli_app", description="Simple CLI App")
+    parser.add_argument("--batch", metavar="FILE", help="Run command lines from FILE ('-' for stdin) without prompting.")
+    parser.add_argument(
+        "--on-ambiguity",
+        choices=["first", "error"],
+        default=BATCH_ON_AMBIGUITY,
+        help="How batch and server mode resolve a command found in several folders."
+    )
+    parser.add_argument("--stop-on-error", action="store_true", help="Stop batch mode at the first failing command.")
+    parser.add_argument("--profile", action="store_true", help="Profile every command and print the top hotspots.")
+    parser.add_argument("--serve", action="store_true", help="Serve commands on a local Unix socket for cli_app.client.")
+    return parser.parse_args(argv)
+
+def load_catalog() -> tuple[list[str], dict[str, dict[str, dict[str, str]]]]:
+    if COMMAND_ROOTS:
+        return source_roots.load_command_roots(COMMAND_ROOTS)
+    if USE_MANIFEST_CACHE:
+        return manifest_cache.load_commands_cached()
+    return command_loader.load_command_tree()
+
+def start_watcher(commands: dict[str, dict[str, dict[str, str]]]) -> Optional['catalog_watcher.CatalogWatcher']:
+    # The watcher keeps the catalog of a single root in sync.
+    if not WATCH_COMMANDS or COMMAND_ROOTS:
+        return None
+    return catalog_watcher.CatalogWatcher(commands).start()
+
+class SessionLoader:
+    """
+    Loads the catalog and starts what is built from it (usage counts, search index, watcher,
+    preloader) on a background thread, so the first prompt does not wait for discovery.
+    The first command line waits for it.
+    """
+
+    def __init__(self, completer: Optional['completion.CommandCompleter'] = None) -> None:
+        self.completer = completer
+        self.folders: list[str] = []
+        self.commands: dict[str, dict[str, dict[str, str]]] = {}
+        self.watcher: Optional['catalog_watcher.CatalogWatcher'] = None
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self.load, name="session-loader", daemon=True)
+
+    def start(self) -> 'SessionLoader':
+        self.thread.start()
+        return self
+
+    def load(self) -> None:
+        try:
+            self.folders, self.commands = load_catalog()
+            if self.completer is not None:
+                self.completer.folders = self.commands
+            command_runner.load_command_usage()
+            command_search.warm_search_index(self.commands)
+            self.watcher = start_watcher(self.commands)
+            if PRELOAD_COMMANDS:
+                command_runner.start_preloader(self.commands)
+        except BaseException as e:
+            self.error = e
+
+    def wait(self) -> dict[str, dict[str, dict[str, str]]]:
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.commands
+
+def read_parallel_block() -> list[str]:
+    lines = []
+    while True:
+        line = input("... ").strip()
+        if line.lower() == "end":
+            return lines
+        if line:
+            lines.append(line)
+
+def main(argv: Optional[list[str]] = None) -> int:
+    arguments = parse_arguments(argv)
+
+    if arguments.serve:
+        _, commands = load_catalog()
+        watcher = start_watcher(commands)
+        return server.serve(commands, on_ambiguity=arguments.on_ambiguity, watcher=watcher)
+
+    if arguments.batch:
+        _, commands = load_catalog()
+        if arguments.batch == "-":
+            return batch.run_batch(sys.stdin, commands, arguments.on_ambiguity, arguments.stop_on_error, arguments.profile)
+        try:
+            with open(arguments.batch, 'r') as f:
+                return batch.run_batch(f, commands, arguments.on_ambiguity, arguments.stop_on_error, arguments.profile)
+        except OSError as e:
+            logger.error(f"Could not read batch file {arguments.batch}: {e}")
+            return 2
+
     logger.info("Welcome to the Simple CLI App! Type 'help' for commands.")
-    logger.info(get_current_working_directory())
+    logger.info(cli_helpers.get_current_working_directory())
 
     selected_folder: Optional[str] = None
 
-    folders = discover_folders_with_commands()
-    commands = load_commands(folders)
+    # readline is set up on this thread before the first prompt, the catalog is filled in by the loader.
+    session = SessionLoader(completion.setup_completion({})).start()
 
     while True:
         user_input = input("> ").strip()
+        commands = session.wait()
+        watcher = session.watcher
+        if watcher is not None and watcher.apply_pending():
+            command_search.warm_search_index(commands)
 
         if user_input.lower() == "exit":
             logger.info("Exiting the application.")
+            command_runner.save_command_usage()
+            completion.save_history()
+            if watcher is not None:
+                watcher.stop()
+            command_runner.shutdown_executors()
+            worker_pool = sys.modules.get('cli_app.worker_pool')
+            if worker_pool is not None:
+                worker_pool.shutdown_worker_pool()
+            shutdown_logging()
             break
 
-        elif user_input.lower() == "help":
-            logger.info(get_help(commands, selected_folder))               
-        else:
-            execute_user_input(user_input, commands, selected_folder)
+        try:
+            if user_input.lower() == "help" or user_input.lower().startswith("help "):
+                cli_helpers.print_paged(cli_helpers.iter_help_lines(commands, selected_folder, user_input[len("help "):].strip() or None))
+            elif user_input.lower() == "stats":
+                print(command_stats.format_stats())
+            elif user_input.lower() == "importtime":
+                print(import_report.format_import_report(import_report.measure_import_times()))
+                print(import_report.format_prompt_time(import_report.measure_prompt_time()))
+            elif user_input.lower() == "parallel":
+                command_runner.run_parallel_block(read_parallel_block(), commands, selected_folder)
+            elif user_input.lower().startswith("profile "):
+                command_stats.profile_call(lambda: command_runner.execute_command_line(user_input[len("profile "):], commands, selected_folder))
+            elif arguments.profile:
+                command_stats.profile_call(lambda: command_runner.execute_command_line(user_input, commands, selected_folder))
+            else:
+                command_runner.execute_command_line(user_input, commands, selected_folder)
+        except ValueError as e:
+            logger.error(f"Could not parse '{user_input}': {e}")
+
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
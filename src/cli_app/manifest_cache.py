@@ -0,0 +1,137 @@
+import os
+from typing import Optional
+from cli_app.command_index import CommandCatalog
+from cli_app.command_loader import walk_command_tree
+from cli_app.command_metadata import find_runnable_commands
+from cli_app.config import FOLLOW_SYMLINKS, LOGGER_CONFIG, MANIFEST_CACHE_FILE
+from cli_app.descriptions import DescriptionStore, build_lazy_catalog
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+json = lazy_import('json')
+
+MANIFEST_VERSION = 5
+
+def get_signature(path: str) -> Optional[list]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def command_files_changed(manifest: dict, root: str) -> bool:
+    """
+    Editing a file does not change its directory's mtime, so every command file is checked:
+    a command whose run was removed must leave the catalog, one that gained it must join it.
+    """
+    return any(
+        get_signature(os.path.join(root, path)) != signature
+        for path, signature in manifest.get('signatures', {}).items()
+    )
+
+def read_manifest(cache_file: str = MANIFEST_CACHE_FILE) -> Optional[dict]:
+    try:
+        with open(cache_file, 'r') as f:
+            manifest = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.debug(f"No usable manifest cache at {cache_file}: {e}")
+        return None
+
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        logger.debug(f"Manifest cache {cache_file} has an unsupported version, ignoring it.")
+        return None
+
+    return manifest
+
+def write_manifest(manifest: dict, cache_file: str = MANIFEST_CACHE_FILE) -> None:
+    temp_file = f"{cache_file}.tmp"
+    try:
+        if os.path.dirname(cache_file):
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write manifest cache {cache_file}: {e}")
+
+def load_commands_cached(
+    src_folder_with_commands: str = ".",
+    descriptions_file: str = 'command_descriptions.json',
+    cache_file: str = MANIFEST_CACHE_FILE,
+    ignore_these_folders: list[str] = ["cli_app", "shared", "lib", "tests"],
+    ignore_subfolders: list[str] = ["lib", "tests"],
+    follow_symlinks: bool = FOLLOW_SYMLINKS
+) -> tuple[list[str], dict[str, dict[str, dict[str, str]]]]:
+    if not os.path.isdir(src_folder_with_commands):
+        logger.error(f"Specified source folder does not exist: {src_folder_with_commands}")
+        return [], CommandCatalog()
+
+    key = {
+        'root': os.path.abspath(src_folder_with_commands),
+        'descriptions_file': os.path.abspath(descriptions_file),
+        'ignore_these_folders': ignore_these_folders,
+        'ignore_subfolders': ignore_subfolders,
+        'follow_symlinks': follow_symlinks,
+    }
+
+    # Created before scanning so that it does not change the mtime of an already scanned directory.
+    if os.path.dirname(cache_file):
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not create manifest cache folder for {cache_file}: {e}")
+
+    manifest = read_manifest(cache_file)
+    if manifest is None or manifest.get('key') != key:
+        manifest = {'version': MANIFEST_VERSION, 'key': key, 'directories': {}}
+
+    tree = walk_command_tree(
+        src_folder_with_commands,
+        ignore_these_folders,
+        ignore_subfolders,
+        follow_symlinks,
+        manifest['directories']
+    )
+    cache_folder = os.path.dirname(cache_file)
+
+    if tree.scanned == 0 and 'commands' in manifest and not command_files_changed(manifest, src_folder_with_commands):
+        logger.debug(f"Manifest cache hit: {cache_file}")
+        skipped = set(manifest['skipped'])
+        command_files = {
+            folder: {command: path for command, path in files.items() if path not in skipped}
+            for folder, files in tree.commands.items()
+        }
+        # Descriptions are read per folder when first shown, their shards live next to the manifest.
+        store = DescriptionStore(descriptions_file, command_files, src_folder_with_commands, os.path.join(cache_folder, 'descriptions'))
+        return manifest['folders'], CommandCatalog.from_manifest(manifest['commands'], store.get_folder)
+
+    logger.debug(f"Manifest cache refresh: {tree.scanned} directories rescanned")
+
+    command_files = find_runnable_commands(
+        tree.commands,
+        src_folder_with_commands,
+        os.path.join(cache_folder, 'metadata.json')
+    )
+    store = DescriptionStore(descriptions_file, command_files, src_folder_with_commands, os.path.join(cache_folder, 'descriptions'))
+    folders = tree.folders
+    commands = build_lazy_catalog(command_files, store)
+    signatures = {
+        path: get_signature(os.path.join(src_folder_with_commands, path))
+        for files in tree.commands.values()
+        for path in files.values()
+    }
+    skipped = [path for folder, files in tree.commands.items() for command, path in files.items() if command not in command_files[folder]]
+
+    write_manifest({
+        'version': MANIFEST_VERSION,
+        'key': key,
+        'directories': tree.directories,
+        'folders': folders,
+        'commands': commands.to_manifest(with_descriptions=False),
+        'skipped': skipped,
+        'signatures': signatures,
+    }, cache_file)
+
+    return folders, commands
@@ -0,0 +1,54 @@
+import json
+import socket
+import struct
+
+HEADER = struct.Struct('>cI')
+REQUEST_HEADER = struct.Struct('>I')
+
+STDOUT = b'o'
+STDERR = b'e'
+EXIT = b'x'
+
+def receive_exactly(connection: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed before the whole message was received.")
+        data.extend(chunk)
+    return bytes(data)
+
+def send_request(connection: socket.socket, request: dict) -> None:
+    payload = json.dumps(request).encode('utf-8')
+    connection.sendall(REQUEST_HEADER.pack(len(payload)) + payload)
+
+def receive_request(connection: socket.socket) -> dict:
+    (size,) = REQUEST_HEADER.unpack(receive_exactly(connection, REQUEST_HEADER.size))
+    return json.loads(receive_exactly(connection, size).decode('utf-8'))
+
+def send_frame(connection: socket.socket, channel: bytes, payload: bytes) -> None:
+    connection.sendall(HEADER.pack(channel, len(payload)) + payload)
+
+def receive_frame(connection: socket.socket) -> tuple[bytes, bytes]:
+    channel, size = HEADER.unpack(receive_exactly(connection, HEADER.size))
+    return channel, receive_exactly(connection, size)
+
+class FrameWriter:
+    """
+    Text stream that forwards everything written to it as frames on one channel.
+    """
+
+    def __init__(self, connection: socket.socket, channel: bytes) -> None:
+        self.connection = connection
+        self.channel = channel
+
+    def write(self, text: str) -> int:
+        if text:
+            send_frame(self.connection, self.channel, text.encode('utf-8'))
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
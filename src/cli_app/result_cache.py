@@ -0,0 +1,166 @@
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from cli_app.config import (
+    LOGGER_CONFIG,
+    RESULT_CACHE_DISK_SIZE,
+    RESULT_CACHE_FILE,
+    RESULT_CACHE_ON_DISK,
+    RESULT_CACHE_SIZE
+)
+from shared.lazy_import import lazy_import
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+json = lazy_import('json')
+
+class CachedResult(NamedTuple):
+    output: str
+    created: float
+    expires: float
+    mtime: Optional[int]
+
+class ResultCache:
+    """
+    Output of cacheable commands keyed by (folder, command, args): an in-memory LRU of
+    max_entries results, backed by a JSON file that survives restarts when disk_file is set.
+    A result expires after its TTL or when the command file changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_SIZE,
+        disk_file: Optional[str] = None,
+        disk_entries: int = RESULT_CACHE_DISK_SIZE
+    ) -> None:
+        self.max_entries = max_entries
+        self.disk_file = disk_file
+        self.disk_entries = disk_entries
+        self.entries: OrderedDict[str, CachedResult] = OrderedDict()
+        self.disk: Optional[dict[str, CachedResult]] = None
+        self.disk_changed = False
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(folder: str, command: str, args: list[str]) -> str:
+        return json.dumps([folder, command, args], separators=(',', ':'))
+
+    def get(self, key: str, mtime: Optional[int]) -> Optional[CachedResult]:
+        with self.lock:
+            result = self.entries.get(key)
+            from_disk = False
+            if result is None and self.disk_file is not None:
+                result = self.load_disk().get(key)
+                from_disk = result is not None
+
+            if result is not None and (result.expires <= time.time() or result.mtime != mtime):
+                self.remove(key)
+                self.expirations += 1
+                result = None
+
+            if result is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.disk_hits += from_disk
+            self.store(key, result)
+            return result
+
+    def put(self, key: str, output: str, ttl: float, mtime: Optional[int]) -> None:
+        now = time.time()
+        result = CachedResult(output, now, now + ttl, mtime)
+        with self.lock:
+            self.store(key, result)
+            if self.disk_file is not None:
+                self.load_disk()[key] = result
+                self.disk_changed = True
+
+    def store(self, key: str, result: CachedResult) -> None:
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+        if self.disk is not None and self.disk.pop(key, None) is not None:
+            self.disk_changed = True
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.disk_file is not None:
+                self.disk = {}
+                self.disk_changed = True
+
+    def load_disk(self) -> dict[str, CachedResult]:
+        if self.disk is None:
+            self.disk = {}
+            try:
+                with open(self.disk_file, 'r') as f:
+                    self.disk = {key: CachedResult(*value) for key, value in json.load(f).items()}
+            except (json.JSONDecodeError, OSError, TypeError, ValueError, AttributeError) as e:
+                logger.debug(f"No cached results loaded from {self.disk_file}: {e}")
+        return self.disk
+
+    def save(self) -> None:
+        """Writes the unexpired results, the disk_entries most recent ones, to disk_file."""
+        if self.disk_file is None or not self.disk_changed:
+            return
+
+        now = time.time()
+        with self.lock:
+            live = sorted(
+                ((key, result) for key, result in self.load_disk().items() if result.expires > now),
+                key=lambda item: item[1].created
+            )[-self.disk_entries:]
+            self.disk = dict(live)
+            self.disk_changed = False
+
+        try:
+            if os.path.dirname(self.disk_file):
+                os.makedirs(os.path.dirname(self.disk_file), exist_ok=True)
+            with open(self.disk_file, 'w') as f:
+                json.dump({key: list(result) for key, result in live}, f)
+        except OSError as e:
+            logger.warning(f"Could not save cached results to {self.disk_file}: {e}")
+
+    def format_stats(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits * 100 / lookups if lookups else 0.0
+        return (
+            f"Result cache: {self.hits} hits ({self.disk_hits} from disk), {self.misses} misses ({hit_rate:.0f}% hits),"
+            f" {self.evictions} evicted, {self.expirations} expired, {len(self.entries)} entries."
+        )
+
+result_cache: Optional[ResultCache] = None
+result_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    global result_cache
+    with result_cache_lock:
+        if result_cache is None:
+            result_cache = ResultCache(disk_file=RESULT_CACHE_FILE if RESULT_CACHE_ON_DISK else None)
+        return result_cache
+
+def save_result_cache() -> None:
+    if result_cache is not None:
+        result_cache.save()
+
+atexit.register(save_result_cache)
+
+def format_cache_stats() -> Optional[str]:
+    if result_cache is None:
+        return None
+    return result_cache.format_stats()
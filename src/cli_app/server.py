@@ -0,0 +1,131 @@
+import logging
+import os
+import shlex
+import socket
+import socketserver
+import sys
+from typing import Optional
+from cli_app.catalog_watcher import CatalogWatcher
+from cli_app.cli_helpers import iter_help_lines, print_paged
+from cli_app.command_runner import execute_user_input, find_command_in_folders, parse_input, resolve_command, split_qualified_command
+from cli_app.config import BATCH_ON_AMBIGUITY, LOGGER_CONFIG, SERVER_REQUEST_TIMEOUT, SERVER_SOCKET
+from cli_app.protocol import EXIT, STDERR, STDOUT, FrameWriter, receive_request, send_frame
+from shared.logger import flush_logging, get_output_handlers, setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+def server_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX') and hasattr(os, 'fork')
+
+def redirect_console_logging(stream: FrameWriter) -> None:
+    loggers = [logging.getLogger(), *logging.Logger.manager.loggerDict.values()]
+    handlers = [*get_output_handlers(), *[handler for each_logger in loggers for handler in getattr(each_logger, 'handlers', [])]]
+    for handler in handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setStream(stream)
+
+class CommandRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        stdout = FrameWriter(self.request, STDOUT)
+        stderr = FrameWriter(self.request, STDERR)
+        sys.stdout = stdout
+        sys.stderr = stderr
+        redirect_console_logging(stderr)
+
+        exit_code = 1
+        try:
+            exit_code = self.server.run_request(self.server.current_request)
+        except Exception as e:
+            logger.exception(f"Request failed: {e}")
+        finally:
+            flush_logging()
+            send_frame(self.request, EXIT, str(exit_code).encode('utf-8'))
+
+class CommandServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Keeps the command catalog and imported command modules warm in the parent process,
+    each request runs in a forked child whose output is streamed back to the client.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        commands: dict[str, dict[str, dict[str, str]]],
+        on_ambiguity: str = BATCH_ON_AMBIGUITY,
+        watcher: Optional[CatalogWatcher] = None,
+        request_timeout: Optional[float] = SERVER_REQUEST_TIMEOUT
+    ) -> None:
+        self.commands = commands
+        self.on_ambiguity = on_ambiguity
+        self.watcher = watcher
+        self.request_timeout = request_timeout
+        self.current_request: dict = {}
+        super().__init__(socket_path, CommandRequestHandler)
+
+    def process_request(self, request: socket.socket, client_address) -> None:
+        # The request is read before forking so that its command is imported in the server,
+        # a client that does not send it holds up the others for request_timeout at most.
+        request.settimeout(self.request_timeout)
+        try:
+            self.current_request = receive_request(request)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping malformed or stalled request: {e}")
+            self.shutdown_request(request)
+            return
+        request.settimeout(None)
+
+        if self.watcher is not None:
+            self.watcher.apply_pending()
+        self.warm_command(self.current_request.get('argv', []))
+        super().process_request(request, client_address)
+
+    def warm_command(self, argv: list[str]) -> None:
+        if not argv:
+            return
+
+        command, _ = parse_input(shlex.join(argv))
+        qualified_folder = split_qualified_command(self.commands, command)
+        if qualified_folder is not None:
+            resolve_command(*qualified_folder)
+            return
+
+        matching_folders = find_command_in_folders(self.commands, command)
+        if len(matching_folders) == 1:
+            resolve_command(matching_folders[0], command)
+
+    def run_request(self, request: dict) -> int:
+        if request.get('cwd'):
+            os.chdir(request['cwd'])
+
+        argv = request.get('argv', [])
+        if not argv or argv[0] == 'help':
+            print_paged(iter_help_lines(self.commands, None, argv[1] if len(argv) > 1 else None), page_size=0)
+            return 0
+
+        return 0 if execute_user_input(shlex.join(argv), self.commands, None, self.on_ambiguity) else 1
+
+def serve(
+    commands: dict[str, dict[str, dict[str, str]]],
+    socket_path: str = SERVER_SOCKET,
+    on_ambiguity: str = BATCH_ON_AMBIGUITY,
+    watcher: Optional[CatalogWatcher] = None
+) -> int:
+    if not server_supported():
+        logger.error("Server mode needs Unix sockets and fork, it is not available on this platform.")
+        return 2
+
+    socket_path = os.path.abspath(socket_path)
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with CommandServer(socket_path, commands, on_ambiguity, watcher) as server:
+        logger.info(f"Serving commands on {socket_path}. Press Ctrl+C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Stopping the server.")
+        finally:
+            os.unlink(socket_path)
+
+    return 0
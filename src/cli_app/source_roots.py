@@ -0,0 +1,197 @@
+import hashlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import re
+import sys
+import threading
+import time
+from functools import partial
+from typing import NamedTuple, Optional
+from cli_app.command_index import CommandCatalog, FolderCommands
+from cli_app.command_loader import CommandTree, walk_command_tree
+from cli_app.command_metadata import CommandMetadata, load_metadata, read_cached_metadata, select_runnable_commands
+from cli_app.config import LOGGER_CONFIG, ROOT_CACHE_FOLDER, ROOT_SCAN_TIMEOUT
+from cli_app.descriptions import DescriptionStore
+from cli_app.manifest_cache import MANIFEST_VERSION, read_manifest, write_manifest
+from shared.logger import setup_logger
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+class ScannedRoot(NamedTuple):
+    root: str
+    tree: CommandTree
+    metadata: dict[str, Optional[CommandMetadata]]
+
+class RootAliasFinder(importlib.abc.MetaPathFinder):
+    """
+    Imports a command folder under its catalog name when the folder name is taken by an
+    earlier root: 'tools@scripts' is the tools package of the scripts root. Submodules
+    are then found through the alias package's __path__.
+    """
+
+    def __init__(self) -> None:
+        self.aliases: dict[str, str] = {}
+
+    def find_spec(self, fullname: str, path=None, target=None) -> Optional[importlib.machinery.ModuleSpec]:
+        directory = self.aliases.get(fullname)
+        if directory is None:
+            return None
+
+        init_file = os.path.join(directory, '__init__.py')
+        if os.path.isfile(init_file):
+            return importlib.util.spec_from_file_location(fullname, init_file, submodule_search_locations=[directory])
+        spec = importlib.machinery.ModuleSpec(fullname, None, is_package=True)
+        spec.submodule_search_locations = [directory]
+        return spec
+
+alias_finder = RootAliasFinder()
+alias_finder_lock = threading.Lock()
+
+def get_root_cache_folder(root: str, cache_folder: str = ROOT_CACHE_FOLDER) -> str:
+    return os.path.join(cache_folder, hashlib.sha1(root.encode('utf-8')).hexdigest()[:16])
+
+def get_root_label(root: str) -> str:
+    return re.sub(r'\W', '_', os.path.basename(root.rstrip(os.sep)) or 'root')
+
+def read_root_manifest(root: str, cache_folder: str) -> Optional[dict]:
+    manifest = read_manifest(os.path.join(get_root_cache_folder(root, cache_folder), 'manifest.json'))
+    if manifest is None or manifest.get('key') != {'root': root}:
+        return None
+    return manifest
+
+def scan_root(root: str, cache_folder: str) -> ScannedRoot:
+    """
+    The slow part on a network mount: walking the tree and reading the command files.
+    Like load_commands_cached, only directories whose mtime changed since the last
+    session are listed again, the others are only stat'ed.
+    """
+    root_cache_folder = get_root_cache_folder(root, cache_folder)
+    manifest = read_root_manifest(root, cache_folder) or {}
+
+    tree = walk_command_tree(root, directories=manifest.get('directories'))
+    paths = [os.path.join(root, path) for files in tree.commands.values() for path in files.values()]
+    metadata = load_metadata(paths, os.path.join(root_cache_folder, 'metadata.json'))
+
+    if tree.scanned or manifest.get('command_files') != tree.commands:
+        write_manifest({
+            'version': MANIFEST_VERSION,
+            'key': {'root': root},
+            'directories': tree.directories,
+            'folders': tree.folders,
+            'command_files': tree.commands,
+        }, os.path.join(root_cache_folder, 'manifest.json'))
+    return ScannedRoot(root, tree, metadata)
+
+def load_cached_root(root: str, cache_folder: str) -> Optional[ScannedRoot]:
+    """The root as scanned in the last session, without touching the root itself."""
+    manifest = read_root_manifest(root, cache_folder)
+    if manifest is None or 'command_files' not in manifest:
+        return None
+    tree = CommandTree(manifest['folders'], manifest['command_files'], 0, 0, manifest['directories'])
+    metadata = read_cached_metadata(os.path.join(get_root_cache_folder(root, cache_folder), 'metadata.json'))
+    return ScannedRoot(root, tree, metadata)
+
+def scan_roots(roots: list[str], timeout: float, cache_folder: str) -> list[ScannedRoot]:
+    """
+    Scans the roots concurrently, one daemon thread per root. Roots that are not scanned
+    within timeout seconds get the commands of their last scan, or are left out when
+    they were never scanned. Their threads do not keep the process alive.
+    """
+    results: dict[str, ScannedRoot] = {}
+    errors: dict[str, Exception] = {}
+
+    def scan(root: str) -> None:
+        try:
+            results[root] = scan_root(root, cache_folder)
+        except (OSError, ValueError) as e:
+            errors[root] = e
+
+    threads = [threading.Thread(target=scan, args=(root,), name=f"scan-{get_root_label(root)}", daemon=True) for root in roots]
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + timeout
+    for root, thread in zip(roots, threads):
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            cached = load_cached_root(root, cache_folder)
+            if cached is None:
+                logger.warning(f"Scanning {root} took more than {timeout:g}s, its commands are not loaded.")
+                continue
+            logger.warning(f"Scanning {root} took more than {timeout:g}s, using its commands from the last session.")
+            results[root] = cached
+        elif root in errors:
+            logger.error(f"Could not scan {root}: {errors[root]}")
+
+    return [results[root] for root in roots if root in results]
+
+def get_folder_directories(tree: CommandTree) -> dict[str, str]:
+    directories: dict[str, str] = {}
+    for relative_path, record in sorted(tree.directories.items()):
+        if relative_path != '.' and record['has_init']:
+            directories.setdefault(os.path.basename(relative_path), relative_path)
+    return directories
+
+def setup_import_paths(roots: list[str]) -> None:
+    """Roots are searched in order after the existing sys.path entries, so commands can import their root's modules."""
+    for root in roots:
+        if root not in sys.path:
+            sys.path.append(root)
+    with alias_finder_lock:
+        if alias_finder not in sys.meta_path:
+            sys.meta_path.append(alias_finder)
+
+def load_command_roots(
+    roots: list[str],
+    descriptions_file: str = 'command_descriptions.json',
+    timeout: float = ROOT_SCAN_TIMEOUT,
+    cache_folder: str = ROOT_CACHE_FOLDER
+) -> tuple[list[str], dict[str, dict[str, dict[str, str]]]]:
+    """
+    Loads the commands of several source roots into one catalog. A folder name found in
+    more than one root keeps its name in the first root and is named folder@root in the
+    later ones, so a command in both is resolved through the folder menu. Each root's
+    descriptions_file is read relative to that root.
+    """
+    absolute_roots = []
+    for root in roots:
+        if not os.path.isdir(root):
+            logger.error(f"Specified source folder does not exist: {root}")
+        elif os.path.abspath(root) not in absolute_roots:
+            absolute_roots.append(os.path.abspath(root))
+
+    scanned = scan_roots(absolute_roots, timeout, cache_folder)
+    setup_import_paths([result.root for result in scanned])
+
+    folders: list[str] = []
+    entries: dict[str, FolderCommands] = {}
+    for result in scanned:
+        directories = get_folder_directories(result.tree)
+        folder_keys = {}
+        for folder in result.tree.folders:
+            if folder in entries:
+                folder_keys[folder] = f"{folder}@{get_root_label(result.root)}"
+                with alias_finder_lock:
+                    alias_finder.aliases[folder_keys[folder]] = os.path.join(result.root, directories[folder])
+                logger.debug("Folder %s of %s is named %s", folder, result.root, folder_keys[folder])
+
+        command_files = select_runnable_commands(result.tree.commands, result.metadata, result.root, folder_keys)
+        store = DescriptionStore(
+            os.path.join(result.root, descriptions_file),
+            command_files,
+            result.root,
+            os.path.join(get_root_cache_folder(result.root, cache_folder), 'descriptions')
+        )
+        for folder, files in command_files.items():
+            key = folder_keys.get(folder, folder)
+            if key in entries:
+                # Two roots with the same label, the later folder is not reachable.
+                logger.warning(f"Folder {key} of {result.root} is already loaded, skipping it.")
+                continue
+            folders.append(key)
+            entries[key] = FolderCommands.lazy(files, partial(store.get_folder, folder))
+
+    logger.debug("Loaded %d folders from %d of %d roots", len(folders), len(scanned), len(roots))
+    return folders, CommandCatalog(entries)
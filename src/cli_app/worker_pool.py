@@ -0,0 +1,302 @@
+import contextvars
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Iterator, Optional
+from cli_app.config import LOGGER_CONFIG, WORKER_MAX_RSS, WORKER_MAX_RUNS, WORKER_POOL_SIZE, WORKER_PRELOAD_MODULES
+from shared.logger import flush_logging, setup_logger
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = setup_logger(__name__, LOGGER_CONFIG)
+
+def get_rss() -> int:
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+@contextmanager
+def command_limits(memory_limit: Optional[int], cpu_limit: Optional[float]) -> Iterator[None]:
+    """Lowers the soft address space and CPU time limits for one command, then restores them."""
+    if resource is None or (memory_limit is None and cpu_limit is None):
+        yield
+        return
+
+    previous = {}
+    if memory_limit is not None:
+        previous[resource.RLIMIT_AS] = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, previous[resource.RLIMIT_AS][1]))
+    if cpu_limit is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        previous[resource.RLIMIT_CPU] = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (int(usage.ru_utime + usage.ru_stime + cpu_limit) + 1, previous[resource.RLIMIT_CPU][1]))
+    try:
+        yield
+    finally:
+        for limit, values in previous.items():
+            resource.setrlimit(limit, values)
+
+class WorkerOutput:
+    """
+    A worker's sys.stdout or sys.stderr: complete lines are sent to the app, which writes
+    them to the streams of the context that runs the command. Writing after the app
+    stopped reading raises BrokenPipeError, like a pipe stage whose reader stopped.
+    """
+
+    def __init__(self, connection: Connection, name: str, stopped) -> None:
+        self.connection = connection
+        self.name = name
+        self.stopped = stopped
+        self.buffer = ''
+
+    def write(self, text: str) -> int:
+        if self.stopped.is_set():
+            raise BrokenPipeError("The output of this command is no longer read.")
+        self.buffer += text
+        if '\n' in text:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self.buffer:
+            buffer, self.buffer = self.buffer, ''
+            self.connection.send(('write', self.name, buffer))
+
+    def isatty(self) -> bool:
+        return False
+
+class WorkerInput:
+    """A worker's sys.stdin, each line is read from the app's stdin in the context that runs the command."""
+
+    def __init__(self, connection: Connection, outputs: list[WorkerOutput]) -> None:
+        self.connection = connection
+        self.outputs = outputs
+
+    def readline(self, size: int = -1) -> str:
+        # A prompt written before reading has to be shown first.
+        for output in self.outputs:
+            output.flush()
+        self.connection.send(('readline',))
+        return self.connection.recv()
+
+    def read(self, size: int = -1) -> str:
+        return ''.join(iter(self.readline, ''))
+
+    def readlines(self) -> list[str]:
+        return list(iter(self.readline, ''))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.readline, '')
+
+    def isatty(self) -> bool:
+        return False
+
+def worker_main(connection: Connection, preload_modules: list[str], stopped) -> None:
+    for module_name in preload_modules:
+        try:
+            importlib.import_module(module_name)
+        except ImportError as e:
+            logger.debug("Worker could not preload %s: %s", module_name, e)
+
+    outputs = [WorkerOutput(connection, 'stdout', stopped), WorkerOutput(connection, 'stderr', stopped)]
+    sys.stdout, sys.stderr = outputs
+    sys.stdin = WorkerInput(connection, outputs)
+
+    start_directory = os.getcwd()
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if request is None:
+            break
+
+        handler, args = request
+        try:
+            result = handler(*args)
+        except KeyboardInterrupt:
+            result = None
+        finally:
+            os.chdir(start_directory)
+            for output in outputs:
+                output.flush()
+            flush_logging()
+
+        connection.send(('done', result, get_rss()))
+
+class Worker:
+    def __init__(self, context, preload_modules: list[str]) -> None:
+        self.connection, child_connection = context.Pipe()
+        self.stopped = context.Event()
+        self.process = context.Process(target=worker_main, args=(child_connection, preload_modules, self.stopped), daemon=True)
+        # Started outside of any capture or pipe, a forked worker must not inherit its routing.
+        contextvars.Context().run(self.process.start)
+        child_connection.close()
+        self.runs = 0
+        self.rss = 0
+
+    def run(self, handler: Callable, args: tuple) -> Any:
+        """
+        Calls handler(*args) in the worker, writing its output to this thread's sys.stdout and
+        sys.stderr and answering its reads from sys.stdin. Once a write fails the worker's
+        output is dropped, its next write raises BrokenPipeError and the error is raised here
+        when it is done.
+        """
+        self.stopped.clear()
+        self.connection.send((handler, args))
+        error: Optional[Exception] = None
+        while True:
+            message = self.connection.recv()
+            if message[0] == 'write':
+                if error is None:
+                    try:
+                        getattr(sys, message[1]).write(message[2])
+                    except Exception as e:
+                        error = e
+                        self.stopped.set()
+            elif message[0] == 'readline':
+                try:
+                    line = sys.stdin.readline() if error is None else ''
+                except (OSError, ValueError):
+                    line = ''
+                self.connection.send(line)
+            else:
+                _, result, self.rss = message
+                break
+
+        self.runs += 1
+        if error is not None and not isinstance(error, BrokenPipeError):
+            raise error
+        return result
+
+    def stop(self, timeout: float = 1.0) -> None:
+        try:
+            self.connection.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+class WorkerPool:
+    """
+    Pre-forked workers that run commands over pipes, so that a command changing the cwd,
+    leaking memory or hitting its limits does not affect the app or later commands.
+    A worker is replaced after max_runs commands, when its RSS exceeds max_rss or when it dies.
+    When every worker is busy, e.g. with the earlier stages of a pipeline that waits for this
+    one, an extra worker is forked for the command and stopped after it.
+    """
+
+    def __init__(
+        self,
+        size: int = WORKER_POOL_SIZE,
+        max_runs: int = WORKER_MAX_RUNS,
+        max_rss: Optional[int] = WORKER_MAX_RSS,
+        preload_modules: list[str] = WORKER_PRELOAD_MODULES
+    ) -> None:
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        self.max_runs = max_runs
+        self.max_rss = max_rss
+        self.preload_modules = preload_modules
+        self.size = size
+        self.idle: queue.Queue = queue.Queue()
+        self.workers: list[Worker] = []
+        self.lock = threading.Lock()
+        for _ in range(size):
+            self.idle.put(self.spawn())
+
+    def spawn(self) -> Worker:
+        worker = Worker(self.context, self.preload_modules)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def retire(self, worker: Worker) -> None:
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+        worker.stop()
+
+    def replace(self, worker: Worker) -> None:
+        self.retire(worker)
+        if self.idle.qsize() < self.size:
+            self.idle.put(self.spawn())
+
+    def release(self, worker: Worker) -> None:
+        if self.idle.qsize() < self.size:
+            self.idle.put(worker)
+        else:
+            self.retire(worker)
+
+    def needs_recycling(self, worker: Worker) -> bool:
+        return worker.runs >= self.max_runs or (self.max_rss is not None and worker.rss > self.max_rss)
+
+    def run(self, handler: Callable, *args) -> Any:
+        """handler(*args) in a worker, None when the worker was interrupted or died."""
+        try:
+            worker = self.idle.get_nowait()
+        except queue.Empty:
+            worker = self.spawn()
+
+        try:
+            result = worker.run(handler, args)
+        except KeyboardInterrupt:
+            logger.warning(f"Worker {worker.process.pid} was cancelled.")
+            self.replace(worker)
+            return None
+        except (EOFError, OSError):
+            worker.process.join()
+            logger.error(f"Worker {worker.process.pid} exited with code {worker.process.exitcode}.")
+            self.replace(worker)
+            return None
+        except Exception:
+            self.release(worker)
+            raise
+
+        if self.needs_recycling(worker):
+            logger.debug("Recycling worker %d after %d runs, RSS %d bytes", worker.process.pid, worker.runs, worker.rss)
+            self.replace(worker)
+        else:
+            self.release(worker)
+        return result
+
+    def shutdown(self) -> None:
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.stop()
+
+worker_pool: Optional[WorkerPool] = None
+worker_pool_lock = threading.Lock()
+
+def get_worker_pool() -> WorkerPool:
+    global worker_pool
+    with worker_pool_lock:
+        if worker_pool is None:
+            worker_pool = WorkerPool()
+        return worker_pool
+
+def run_in_worker(handler: Callable, *args) -> Any:
+    return get_worker_pool().run(handler, *args)
+
+def shutdown_worker_pool() -> None:
+    global worker_pool
+    with worker_pool_lock:
+        if worker_pool is not None:
+            worker_pool.shutdown()
+            worker_pool = None
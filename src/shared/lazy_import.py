@@ -0,0 +1,51 @@
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+load_lock = threading.RLock()
+loading: set[str] = set()
+
+class LazyModule(ModuleType):
+    """
+    Module whose code runs on the first access to an attribute it does not have yet.
+    Unlike importlib.util.LazyLoader before Python 3.12, loading holds a lock, so a
+    second thread waits for it instead of seeing a half executed module.
+    """
+
+    def __getattr__(self, name: str):
+        spec = self.__spec__
+        with load_lock:
+            if type(self) is LazyModule and spec.name not in loading:
+                loading.add(spec.name)
+                try:
+                    spec.loader.exec_module(self)
+                    self.__class__ = ModuleType
+                finally:
+                    loading.discard(spec.name)
+
+        if type(self) is LazyModule:
+            raise AttributeError(f"partially initialized module '{spec.name}' has no attribute '{name}'")
+        return getattr(self, name)
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns the module `name`, executing it on first attribute access instead of now.
+    Already imported modules are returned as they are. A submodule is bound on its
+    package like a real import does, so a later `import a.b` can use `a.b`.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = LazyModule
+    sys.modules[name] = module
+    parent_name, _, child_name = name.rpartition('.')
+    if parent_name:
+        # find_spec imported the parent package.
+        setattr(sys.modules[parent_name], child_name, module)
+    return module
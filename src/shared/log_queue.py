@@ -0,0 +1,53 @@
+import copy
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from shared.logger import LOG_BATCH_SIZE
+
+class TracebackQueueHandler(QueueHandler):
+    """
+    Formats only the message before a record is queued. The stock prepare() appends the
+    traceback to the message and drops exc_info, here it is kept apart in exc_text, so that
+    the formatter of the file still writes it as its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            # Tracebacks hold frames, which cannot cross to a process listener.
+            record.exc_info = None
+        return record
+
+class BatchQueueListener(QueueListener):
+    """Writes every record waiting in the queue, then flushes each handler once."""
+
+    def _monitor(self) -> None:
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < LOG_BATCH_SIZE and batch[-1] is not self._sentinel:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            self.handle_batch([record for record in batch if record is not self._sentinel])
+            for _ in batch:
+                self.queue.task_done()
+            if batch[-1] is self._sentinel:
+                break
+
+    def handle_batch(self, records: list[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            handler.defer_flush = True
+        try:
+            for record in records:
+                self.handle(record)
+        finally:
+            for handler in self.handlers:
+                handler.defer_flush = False
+                handler.flush()
@@ -1,7 +1,215 @@
+import atexit
 import logging
 import os
+import queue
+import threading
 from typing import Optional
-from logging.handlers import RotatingFileHandler
+from shared.lazy_import import lazy_import
+
+json = lazy_import('json')
+# logging.handlers pulls in socket and pickle, it is only imported when a queue is used.
+log_queue = lazy_import('shared.log_queue')
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_BATCH_SIZE = 256
+STRUCTURED_FIELDS = ('command', 'folder', 'duration', 'status')
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One compact JSON object per record, the message is only built here, when the record is written.
+    Fields passed with `extra=` (command, folder, duration, status) become top level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+class DeferredFlushMixin:
+    """Skips the flush after every record while the listener is writing a batch."""
+    defer_flush = False
+
+    def flush(self) -> None:
+        if not self.defer_flush:
+            super().flush()
+
+class BatchStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+class RotatingFileHandler(logging.FileHandler):
+    """
+    Size based rotation like logging.handlers.RotatingFileHandler, without importing
+    that module. Tracks the file size itself, the stock rollover check seeks to the end
+    of the file for every record, which flushes the buffer and defeats batching.
+    """
+    size: Optional[int] = None
+
+    def __init__(self, filename: str, mode: str = 'a', maxBytes: int = 0, backupCount: int = 0, encoding: Optional[str] = None, delay: bool = False) -> None:
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        super().__init__(filename, 'a' if maxBytes > 0 else mode, encoding=encoding, delay=delay)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes <= 0:
+            return False
+        if self.size is None:
+            self.size = os.path.getsize(self.baseFilename) if os.path.isfile(self.baseFilename) else 0
+
+        message_size = len(f"{self.format(record)}\n".encode(self.encoding or 'utf-8', errors='replace'))
+        if self.size and self.size + message_size >= self.maxBytes:
+            return True
+        self.size += message_size
+        return False
+
+    def doRollover(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0:
+            for index in range(self.backupCount - 1, 0, -1):
+                source = f"{self.baseFilename}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.baseFilename}.{index + 1}")
+            os.replace(self.baseFilename, f"{self.baseFilename}.1")
+        else:
+            open(self.baseFilename, 'w').close()
+        self.stream = self._open()
+        self.size = None
+
+class BatchRotatingFileHandler(DeferredFlushMixin, RotatingFileHandler):
+    pass
+
+class LogPipeline:
+    def __init__(self, handlers: list[logging.Handler]) -> None:
+        self.handlers = handlers
+        self.queue: queue.Queue = queue.Queue()
+        self.queue_handler = log_queue.TracebackQueueHandler(self.queue)
+        self.queue_handler.setLevel(min(handler.level for handler in handlers))
+        self.listener: Optional['log_queue.BatchQueueListener'] = None
+        self.start()
+
+    def start(self) -> None:
+        self.listener = log_queue.BatchQueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def flush(self) -> None:
+        if self.listener is not None:
+            self.queue.join()
+
+    def stop(self) -> None:
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+        self.listener = None
+
+    def restart_in_child(self) -> None:
+        # Only the forking thread survives a fork, pending records belong to the parent's listener.
+        self.queue = queue.Queue()
+        self.queue_handler.queue = self.queue
+        self.start()
+
+shared_handlers: dict[tuple, list[logging.Handler]] = {}
+pipelines: dict[tuple, LogPipeline] = {}
+pipelines_lock = threading.Lock()
+
+def get_config_key(config: dict[str, Optional[object]]) -> tuple:
+    return tuple(sorted((key, repr(value)) for key, value in config.items()))
+
+def create_handlers(config: dict[str, Optional[object]], batched: bool = False) -> list[logging.Handler]:
+    handlers: list[logging.Handler] = []
+
+    # Console handler setup
+    console_handler = BatchStreamHandler() if batched else logging.StreamHandler()
+    console_handler.setLevel(config.get('consoleLevel', logging.DEBUG))
+    console_handler.setFormatter(logging.Formatter(config.get('format', DEFAULT_FORMAT)))
+    handlers.append(console_handler)
+
+    # File handler setup with rotation
+    if config.get('log_to_file', True):
+        log_file = config.get('log_file', 'logs/app.log')
+        if os.path.dirname(log_file):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        file_handler_class = BatchRotatingFileHandler if batched else RotatingFileHandler
+        file_handler = file_handler_class(
+            log_file,
+            maxBytes=config.get('max_bytes', 10 * 1024 * 1024),  # Default 10MB
+            backupCount=config.get('backup_count', 3)             # Default 5 backups
+        )
+        file_handler.setLevel(config.get('fileLevel', logging.DEBUG))
+        if config.get('structured', False):
+            file_handler.setFormatter(JsonLinesFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(config.get('format', DEFAULT_FORMAT)))
+        handlers.append(file_handler)
+
+    return handlers
+
+def get_shared_handlers(config: dict[str, Optional[object]]) -> list[logging.Handler]:
+    """Handlers used by every logger set up with this config, the queue handler when 'queue' is on."""
+    key = get_config_key(config)
+    with pipelines_lock:
+        if config.get('queue', False):
+            if key not in pipelines:
+                pipelines[key] = LogPipeline(create_handlers(config, batched=True))
+            return [pipelines[key].queue_handler]
+
+        if key not in shared_handlers:
+            shared_handlers[key] = create_handlers(config)
+        return shared_handlers[key]
+
+def get_output_handlers() -> list[logging.Handler]:
+    """Every console and file handler created by setup_logger, including those behind a queue."""
+    handlers = [handler for group in shared_handlers.values() for handler in group]
+    handlers.extend(handler for pipeline in pipelines.values() for handler in pipeline.handlers)
+    return handlers
+
+def flush_logging() -> None:
+    """Waits until queued records are written."""
+    for pipeline in list(pipelines.values()):
+        pipeline.flush()
+    for handler in get_output_handlers():
+        handler.flush()
+
+def shutdown_logging() -> None:
+    """Writes the remaining queued records and stops the listener threads."""
+    with pipelines_lock:
+        for pipeline in pipelines.values():
+            pipeline.stop()
+        for pipeline in pipelines.values():
+            for handler in pipeline.handlers:
+                handler.flush()
+
+def restart_logging_in_child() -> None:
+    global pipelines_lock
+    pipelines_lock = threading.Lock()
+    for pipeline in pipelines.values():
+        if pipeline.listener is not None:
+            pipeline.restart_in_child()
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=restart_logging_in_child)
 
 def setup_logger(name: str, config: Optional[dict[str, Optional[object]]]=None) -> logging.Logger:
     if config is None:
@@ -11,37 +219,18 @@ def setup_logger(name: str, config: Optional[dict[str, Optional[object]]]=None)
             'mainLevel': logging.DEBUG,
             'consoleLevel': logging.DEBUG,
             'fileLevel': logging.DEBUG,
-            'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            'format': DEFAULT_FORMAT,
             'max_bytes': 10 * 1024 * 1024,  # 10 MB, you can adjust this
             'backup_count': 3,               # Number of backup files to keep
+            'queue': False,                  # Write records on a background thread
+            'structured': False,             # Write the log file as JSON Lines
         }
 
     logger = logging.getLogger(name)
     logger.setLevel(config.get('mainLevel', logging.DEBUG))
 
     if not logger.hasHandlers():
-        # Console handler setup
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(config.get('consoleLevel', logging.DEBUG))
-        console_formatter = logging.Formatter(config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
-
-        # File handler setup with rotation
-        if config.get('log_to_file', True):
-            log_file = config.get('log_file', 'logs/app.log')
-            if os.path.dirname(log_file):
-                os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            
-            # Rotating file handler setup
-            file_handler = RotatingFileHandler(
-                log_file,
-                maxBytes=config.get('max_bytes', 10 * 1024 * 1024),  # Default 10MB
-                backupCount=config.get('backup_count', 3)             # Default 5 backups
-            )
-            file_handler.setLevel(config.get('fileLevel', logging.DEBUG))
-            file_formatter = logging.Formatter(config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-            file_handler.setFormatter(file_formatter)
-            logger.addHandler(file_handler)
+        for handler in get_shared_handlers(config):
+            logger.addHandler(handler)
 
     return logger
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+import pytest
+from cli_app.command_runner import module_registry
+
+@pytest.fixture
+def make_command_package(tmp_path, monkeypatch):
+    """
+    Returns a function creating an importable command folder in tmp_path from command names
+    and their sources. The folders' modules are dropped from module_registry and sys.modules afterwards.
+    """
+    packages: list[str] = []
+
+    def make(name: str, commands: dict[str, str]) -> Path:
+        package = tmp_path / name
+        package.mkdir()
+        (package / "__init__.py").touch()
+        for command, source in commands.items():
+            (package / f"{command}.py").write_text(source)
+        packages.append(name)
+        return package
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield make
+
+    for name in packages:
+        for module_name in [module_name for module_name in module_registry if module_name.startswith(f"{name}.")]:
+            del module_registry[module_name]
+        for module_name in [module_name for module_name in sys.modules if module_name == name or module_name.startswith(f"{name}.")]:
+            del sys.modules[module_name]
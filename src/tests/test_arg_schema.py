@@ -0,0 +1,62 @@
+import pytest
+from cli_app.arg_schema import ArgumentSchemaError, complete_arguments, get_parser, parse_arguments
+from cli_app.cli_helpers import get_help
+from cli_app.command_runner import parse_input, run_command
+
+SCHEMA = [
+    {'name': 'path', 'help': 'File to read'},
+    {'name': ['-n', '--count'], 'type': int, 'default': 10},
+    {'name': '--mode', 'choices': ['fast', 'slow'], 'default': 'fast'},
+    {'name': '--verbose', 'action': 'store_true'},
+]
+
+def test_parse_typed_arguments():
+    arguments = parse_arguments(get_parser('schema.read', SCHEMA), ['notes.txt', '-n', '3', '--verbose'])
+
+    assert (arguments.path, arguments.count, arguments.mode, arguments.verbose) == ('notes.txt', 3, 'fast', True)
+
+@pytest.mark.parametrize("args", [[], ['a', '--count', 'x'], ['a', '--mode', 'other'], ['a', 'b']])
+def test_invalid_arguments(args):
+    with pytest.raises(ArgumentSchemaError):
+        parse_arguments(get_parser('schema.read', SCHEMA), args)
+
+def test_parser_compiled_once_per_schema():
+    parser = get_parser('schema.cached', SCHEMA)
+
+    assert get_parser('schema.cached', SCHEMA) is parser
+    assert get_parser('schema.cached', list(SCHEMA)) is not parser
+
+def test_complete_arguments():
+    parser = get_parser('schema.read', SCHEMA)
+
+    assert complete_arguments(parser, '-', ['a']) == ['--count', '--mode', '--verbose', '-n']
+    assert complete_arguments(parser, '', ['a', '--mode']) == ['fast', 'slow']
+
+def test_parse_input_fast_path_matches_shlex():
+    assert parse_input('read  notes.txt -n 3') == ('read', ['notes.txt', '-n', '3'])
+    assert parse_input('read "my notes.txt"') == ('read', ['my notes.txt'])
+
+@pytest.fixture
+def schema_command(make_command_package):
+    make_command_package("schema_commands", {
+        "read": (
+            "arguments = [{'name': 'path'}, {'name': '--count', 'type': int, 'default': 1, 'help': 'Lines to read'}]\n\n"
+            "def run(args=None):\n    print(args.path, args.count + 1)\n"
+        ),
+    })
+    return {'schema_commands': {'read': 'Reads a file'}}
+
+def test_command_receives_parsed_arguments(schema_command, capsys):
+    assert run_command('schema_commands', 'read', ['notes.txt', '--count', '2']) is True
+    assert capsys.readouterr().out == "notes.txt 3\n"
+
+def test_command_with_invalid_arguments(schema_command, caplog):
+    assert run_command('schema_commands', 'read', ['--count', 'x']) is False
+    assert "Invalid arguments for 'schema_commands.read'" in caplog.text
+    assert "usage: schema_commands.read [--count COUNT] path" in caplog.text
+
+def test_help_shows_arguments(schema_command):
+    help_text = get_help(schema_command, None, 'read')
+
+    assert "usage: schema_commands.read [--count COUNT] path" in help_text
+    assert "Lines to read" in help_text
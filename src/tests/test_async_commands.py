@@ -0,0 +1,74 @@
+import asyncio
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+from cli_app import command_runner
+from cli_app.command_runner import get_event_loop, run_command, run_parallel_block, shutdown_executors
+
+def async_module(run, **attributes):
+    module = MagicMock()
+    module.run = run
+    for name, value in attributes.items():
+        setattr(module, name, value)
+    return module
+
+def test_async_command_runs_on_shared_loop():
+    loops = []
+
+    async def run(args):
+        loops.append((asyncio.get_running_loop(), threading.current_thread().name, args))
+
+    module = async_module(run, timeout=None)
+    with patch.dict(sys.modules, {"commands.async_command_one": module, "commands.async_command_two": module}), \
+         patch("importlib.util.find_spec", return_value=True), \
+         patch("importlib.import_module", return_value=module):
+        assert run_command("commands", "async_command_one", ["a"]) is True
+        assert run_command("commands", "async_command_two", ["b"]) is True
+
+    assert loops[0][0] is loops[1][0] is get_event_loop()
+    assert loops[0][1] == "command-event-loop"
+    assert [args for _, _, args in loops] == [["a"], ["b"]]
+
+def test_async_command_timeout(caplog):
+    cancelled = threading.Event()
+
+    async def run(args):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    module = async_module(run, timeout=0.05)
+    with patch.dict(sys.modules, {"commands.slow_async_command": module}), \
+         patch("importlib.util.find_spec", return_value=True), \
+         patch("importlib.import_module", return_value=module):
+        assert run_command("commands", "slow_async_command") is False
+
+    assert cancelled.wait(1)
+    assert "Command 'commands.slow_async_command' timed out." in caplog.text
+
+def test_concurrent_async_commands_share_loop(capsys):
+    running = []
+
+    async def run(args):
+        running.append(args[0])
+        await asyncio.sleep(0.05)
+        print(f"done {args[0]}")
+
+    folders = {"commands": {"async_command": {"description": "Async"}}}
+    module = async_module(run, executor='thread', timeout=None)
+    command_runner.module_registry.clear()
+
+    try:
+        with patch.dict(sys.modules, {"commands.async_command": module}), \
+             patch("importlib.util.find_spec", return_value=True), \
+             patch("importlib.import_module", return_value=module):
+            assert run_parallel_block(["async_command 1", "async_command 2"], folders, None) is True
+    finally:
+        shutdown_executors()
+
+    output = capsys.readouterr().out
+    assert sorted(running) == ["1", "2"]
+    assert "[commands.async_command] done 1" in output
+    assert "[commands.async_command] done 2" in output
@@ -0,0 +1,103 @@
+import json
+import os
+import time
+from unittest.mock import patch
+import pytest
+from cli_app.catalog_watcher import CatalogWatcher
+from cli_app.command_index import CommandMap
+from cli_app.command_runner import capture_command, module_registry
+
+def wait_for_changes(watcher: CatalogWatcher, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not watcher.has_pending():
+        assert time.monotonic() < deadline, "no change noticed"
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+@pytest.fixture
+def command_tree(tmp_path, make_command_package):
+    make_command_package("watched", {"first": "def run(args=None):\n    pass\n"})
+    (tmp_path / "command_descriptions.json").write_text(json.dumps({"watched": {"first": {"description": "First"}}}))
+    return tmp_path
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, command_tree):
+    commands = CommandMap({"watched": {"first": {"description": "First"}}})
+    watcher = CatalogWatcher(
+        commands,
+        str(command_tree),
+        str(command_tree / "command_descriptions.json"),
+        poll_interval=0.05,
+        descriptions_cache_folder=str(command_tree / ".cli_app_cache" / "descriptions")
+    )
+
+    if request.param == "polling":
+        with patch("cli_app.catalog_watcher.Inotify", side_effect=OSError("disabled")):
+            watcher.start()
+            watcher.ready.wait(5)
+            time.sleep(0.1)
+    else:
+        watcher.start()
+        watcher.ready.wait(5)
+        time.sleep(0.1)
+        if watcher.backend != "inotify":
+            watcher.stop()
+            pytest.skip("inotify is not available")
+
+    yield watcher
+    watcher.stop()
+
+def test_added_and_removed_commands(watcher, command_tree):
+    (command_tree / "watched" / "second.py").write_text("def run(args=None):\n    pass\n")
+    wait_for_changes(watcher)
+
+    assert watcher.apply_pending() is True
+    assert watcher.commands["watched"] == {
+        "first": {"description": "First"},
+        "second": "Description for second not found"
+    }
+    assert watcher.commands.find("second") == ["watched"]
+
+    os.remove(command_tree / "watched" / "first.py")
+    wait_for_changes(watcher)
+
+    assert watcher.apply_pending() is True
+    assert list(watcher.commands["watched"]) == ["second"]
+    assert watcher.commands.find("first") == []
+
+def test_new_folder_and_descriptions(watcher, command_tree):
+    folder = command_tree / "added"
+    folder.mkdir()
+    (folder / "__init__.py").touch()
+    (folder / "third.py").write_text("def run(args=None):\n    pass\n")
+    (command_tree / "command_descriptions.json").write_text(json.dumps({
+        "watched": {"first": {"description": "First, updated"}},
+        "added": {"third": {"description": "Third"}}
+    }))
+    wait_for_changes(watcher)
+
+    assert watcher.apply_pending() is True
+    assert watcher.commands == {
+        "watched": {"first": {"description": "First, updated"}},
+        "added": {"third": {"description": "Third"}}
+    }
+
+def test_modified_command_leaves_module_registry(watcher, command_tree):
+    command_file = command_tree / "watched" / "first.py"
+    command_file.write_text("def run(args=None):\n    print('v1')\n")
+    assert capture_command("watched", "first")[1].getvalue() == "v1\n"
+    assert "watched.first" in module_registry
+    wait_for_changes(watcher)
+    watcher.apply_pending()
+
+    command_file.write_text("def run(args=None):\n    print('v2')\n")
+    os.utime(command_file, (time.time() + 5, time.time() + 5))
+    wait_for_changes(watcher)
+
+    assert watcher.apply_pending() is False
+    assert "watched.first" not in module_registry
+    assert capture_command("watched", "first")[1].getvalue() == "v2\n"
+
+def test_nothing_pending():
+    watcher = CatalogWatcher(CommandMap())
+    assert watcher.apply_pending() is False
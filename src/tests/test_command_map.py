@@ -0,0 +1,97 @@
+from cli_app.command_index import CommandCatalog, CommandMap, FolderCommands, get_command_index
+from cli_app.command_runner import find_command_in_folders
+
+def sample_map() -> CommandMap:
+    return CommandMap({
+        "commands": {
+            "clear": {"description": "Clear the console screen"},
+            "example": {"description": "Prints a simple example message"}
+        },
+        "log_project": {
+            "example": {"description": "Prints a simple example message from log project"}
+        }
+    })
+
+def test_index_built_from_initial_folders():
+    commands = sample_map()
+
+    assert commands.find("example") == ["commands", "log_project"]
+    assert commands.find("clear") == ["commands"]
+    assert commands.find("missing") == []
+    assert commands == {
+        "commands": {
+            "clear": {"description": "Clear the console screen"},
+            "example": {"description": "Prints a simple example message"}
+        },
+        "log_project": {
+            "example": {"description": "Prints a simple example message from log project"}
+        }
+    }
+
+def test_index_follows_folder_changes():
+    commands = sample_map()
+
+    commands["misc_project"] = {"clear": {"description": "Clears something"}}
+    assert commands.find("clear") == ["commands", "misc_project"]
+
+    commands["commands"] = {"example": {"description": "Prints a simple example message"}}
+    assert commands.find("clear") == ["misc_project"]
+    assert commands.find("example") == ["commands", "log_project"]
+
+    del commands["log_project"]
+    assert commands.find("example") == ["commands"]
+
+    commands.pop("misc_project")
+    assert "clear" not in commands.index
+
+def test_index_follows_command_changes():
+    commands = sample_map()
+    version = commands.version
+
+    commands.add_command("log_project", "clear", {"description": "Clears the log"})
+    assert commands.find("clear") == ["commands", "log_project"]
+
+    commands.remove_command("commands", "clear")
+    assert commands.find("clear") == ["log_project"]
+    assert "clear" not in commands["commands"]
+    assert commands.version == version + 2
+
+def test_find_command_in_folders_uses_index():
+    commands = sample_map()
+    commands.index["indexed_only"] = {"log_project": None}
+
+    assert find_command_in_folders(commands, "indexed_only") == ["log_project"]
+
+def test_get_command_index_for_plain_dict():
+    index = get_command_index({"folder1": {"command1": {}}, "folder2": {"command1": {}}})
+    assert list(index["command1"]) == ["folder1", "folder2"]
+
+def test_catalog_has_the_command_map_api():
+    catalog = CommandCatalog(sample_map())
+
+    assert catalog == sample_map()
+    assert catalog.find("example") == ["commands", "log_project"]
+    assert find_command_in_folders(catalog, "clear") == ["commands"]
+
+    catalog.add_command("log_project", "clear", {"description": "Clears the log"})
+    catalog.remove_command("commands", "clear")
+    assert catalog.find("clear") == ["log_project"]
+    assert isinstance(catalog["log_project"], FolderCommands)
+
+    del catalog["log_project"]
+    assert "clear" not in catalog.index
+
+def test_folder_commands_store_default_descriptions_as_none():
+    commands = FolderCommands({"b": "Description for b not found", "a": "Custom"})
+
+    assert list(commands) == ["a", "b"]
+    assert commands.descriptions == ("Custom", None)
+    assert commands["b"] == "Description for b not found"
+    assert "c" not in commands
+
+def test_catalog_manifest_round_trip():
+    catalog = CommandCatalog({"folder1": {"command1": "Description for command1 not found", "command0": "Zero"}})
+    data = catalog.to_manifest()
+
+    assert data == {"folder1": [["command0", "command1"], ["Zero", None]]}
+    assert CommandCatalog.from_manifest(data) == catalog
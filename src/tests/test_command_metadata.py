@@ -0,0 +1,93 @@
+import json
+import os
+from unittest.mock import patch
+from cli_app import command_metadata
+from cli_app.command_metadata import (
+    CommandMetadata,
+    extract_metadata,
+    find_runnable_commands,
+    get_metadata,
+    load_metadata,
+    parse_in_parallel
+)
+
+COMMAND_SOURCE = b"""
+import os
+
+description = "Lists files"
+arguments = [
+    {'name': 'path', 'nargs': '?'},
+    {'name': ['-n', '--count'], 'type': int},
+]
+
+async def run(args=None):
+    os.listdir(args.path)
+"""
+
+def test_extract_metadata_does_not_execute_the_module():
+    source = b"raise SystemExit('executed')\n" + COMMAND_SOURCE
+    assert extract_metadata(source) == CommandMetadata(
+        has_run=True,
+        is_async=True,
+        description="Lists files",
+        options=['path', '-n', '--count'],
+        has_complete=False
+    )
+
+def test_extract_metadata_of_other_run_forms():
+    assert extract_metadata(b"def main(args=None): pass\nrun = main\n").has_run
+    assert extract_metadata(b"from .impl import run\n").has_run
+    assert extract_metadata(b"def complete(text, args): return []\n").has_complete
+
+    nested = extract_metadata(b"class Command:\n    def run(self): pass\n")
+    assert not nested.has_run
+    assert nested.description is None and nested.options == []
+
+def test_load_metadata_cached_by_file_hash(tmp_path):
+    command = tmp_path / "command.py"
+    command.write_bytes(COMMAND_SOURCE)
+    broken = tmp_path / "broken.py"
+    broken.write_text("def run(:\n")
+    cache_file = str(tmp_path / "metadata.json")
+
+    metadata = load_metadata([str(command), str(broken), str(tmp_path / "missing.py")], cache_file)
+    assert metadata[str(command)].description == "Lists files"
+    assert metadata[str(broken)] is None
+    assert str(tmp_path / "missing.py") not in metadata
+
+    # Touched but unchanged: hashed again, not parsed.
+    os.utime(command, ns=(0, 1))
+    with patch.object(command_metadata, "parse_files", side_effect=AssertionError("parsed")):
+        assert load_metadata([str(command)], cache_file)[str(command)].is_async
+
+    command.write_text("def run(args=None): pass\n")
+    assert not load_metadata([str(command)], cache_file)[str(command)].is_async
+    with open(cache_file) as f:
+        assert list(json.load(f)["files"]) == [str(command)]
+
+def test_parse_in_parallel_matches_serial_parse(tmp_path):
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"command{index}.py"
+        path.write_text(f"description = 'Command {index}'\ndef run(args=None): pass\n")
+        paths.append(str(path))
+
+    with patch.object(command_metadata, "METADATA_PARALLEL_MIN_FILES", 2), \
+            patch.object(command_metadata, "PARSE_CHUNK_SIZE", 4):
+        parallel = parse_in_parallel(paths, workers=2)
+
+    assert parallel == command_metadata.parse_files(paths)
+    assert [result[3][2] for result in parallel] == [f"Command {index}" for index in range(6)]
+
+def test_find_runnable_commands_skips_files_without_run(tmp_path):
+    (tmp_path / "tools").mkdir()
+    (tmp_path / "tools" / "listing.py").write_bytes(COMMAND_SOURCE)
+    (tmp_path / "tools" / "constants.py").write_text("VALUE = 1\n")
+    (tmp_path / "tools" / "broken.py").write_text("def run(:\n")
+    command_files = {"tools": {name: f"tools/{name}.py" for name in ("listing", "constants", "broken")}}
+
+    runnable = find_runnable_commands(command_files, str(tmp_path), str(tmp_path / "metadata.json"))
+
+    assert runnable == {"tools": {"listing": "tools/listing.py"}}
+    assert get_metadata("tools", "listing").options == ['path', '-n', '--count']
+    assert get_metadata("tools", "constants") is None
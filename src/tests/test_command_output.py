@@ -0,0 +1,84 @@
+import sys
+import pytest
+from cli_app.command_output import LineInput, OutputLimitExceeded, PipeOutput, RingBufferOutput, SpooledOutput, routed_output
+from cli_app.command_runner import capture_command, execute_command_line, split_pipeline, stream_command
+
+FOLDERS = {'pipe_commands': {'count': 'Counts', 'grep': 'Filters', 'head': 'First lines'}}
+
+@pytest.fixture
+def pipe_commands(make_command_package):
+    make_command_package("pipe_commands", {
+        "count": "def run(args=None):\n    for i in range(int(args[0])):\n        print(i)\n",
+        "grep": "import sys\n\ndef run(args=None):\n    for line in sys.stdin:\n        if args[0] in line:\n            print(line, end='')\n",
+        "head": "import sys\n\ndef run(args=None):\n    for _, line in zip(range(int(args[0])), sys.stdin):\n        print(line, end='')\n",
+    })
+
+def test_ring_buffer_keeps_last_lines():
+    output = RingBufferOutput(2)
+    output.write("a\nb\nc")
+    output.write("d\n")
+
+    assert output.getvalue() == "b\ncd"
+    assert output.dropped == 1
+
+def test_spooled_output_spills_to_file():
+    output = SpooledOutput(memory_limit=10, max_chars=None)
+    output.write("first line\nsecond line\n")
+
+    assert output.spilled
+    assert list(output.iter_lines()) == ["first line", "second line"]
+    output.close()
+
+def test_spooled_output_limit():
+    output = SpooledOutput(max_chars=5)
+    with pytest.raises(OutputLimitExceeded):
+        output.write("too long")
+
+def test_pipe_output_stops_writer():
+    pipe = PipeOutput(max_lines=1)
+    pipe.write("a\n")
+    pipe.stop()
+
+    with pytest.raises(BrokenPipeError):
+        pipe.write("b\n")
+
+def test_routed_output_restores_streams():
+    stdout = sys.stdout
+    buffer = RingBufferOutput(10)
+    with routed_output(stdout=buffer, stdin=LineInput(["x\n"])):
+        print("captured")
+        assert sys.stdin.readline() == "x\n"
+
+    assert sys.stdout is stdout
+    assert buffer.getvalue() == "captured"
+
+def test_split_pipeline():
+    assert split_pipeline('count 3') == ['count 3']
+    assert split_pipeline('count "a|b" | head 1') == ["count 'a|b'", 'head 1']
+    assert split_pipeline("count '|' '||' | head 1") == ["count '|' '||'", 'head 1']
+
+def test_split_pipeline_rejects_other_operators():
+    with pytest.raises(ValueError, match="Unsupported operator '||'"):
+        split_pipeline('count 3 || head 1')
+
+def test_capture_command(pipe_commands):
+    succeeded, output = capture_command('pipe_commands', 'count', ['5'], max_lines=2)
+
+    assert succeeded is True
+    assert output.getvalue() == "3\n4"
+
+def test_stream_command(pipe_commands):
+    with stream_command('pipe_commands', 'count', ['3']) as stream:
+        assert list(stream) == ["0\n", "1\n", "2\n"]
+    assert stream.succeeded is True
+
+def test_pipeline(pipe_commands, capsys):
+    assert execute_command_line('count 30 | grep 1 | head 3', FOLDERS, None) is True
+    assert capsys.readouterr().out == "1\n10\n11\n"
+
+def test_pipeline_stops_upstream_when_reader_stops(pipe_commands, capsys):
+    assert execute_command_line('count 100000000 | head 2', FOLDERS, None) is True
+    assert capsys.readouterr().out == "0\n1\n"
+
+def test_pipeline_with_unknown_stage(pipe_commands):
+    assert execute_command_line('count 3 | missing', FOLDERS, None) is False
@@ -0,0 +1,112 @@
+from unittest.mock import patch
+from cli_app.command_index import CommandMap
+from cli_app.command_runner import execute_user_input
+from cli_app.command_search import CommandSearchIndex, edit_distance, get_search_index, warm_search_index
+
+def sample_map() -> CommandMap:
+    return CommandMap({
+        "commands": {
+            "clear": {"description": "Clear the console screen"},
+            "example": {"description": "Prints a simple example message"}
+        },
+        "log_project": {
+            "example": {"description": "Prints a simple example message from log project"},
+            "export": {"description": "Exports the log"}
+        }
+    })
+
+def test_edit_distance():
+    assert edit_distance("example", "example", 2) == 0
+    assert edit_distance("exmaple", "example", 2) == 1
+    assert edit_distance("exmalpe", "example", 2) == 2
+    assert edit_distance("clr", "clear", 2) == 2
+    assert edit_distance("a", "abcdef", 2) == 3
+
+def test_prefix_lookups():
+    index = CommandSearchIndex(["clear", "example", "export", "exit"])
+
+    assert index.starting_with("ex") == ["example", "exit", "export"]
+    assert index.starting_with("ex", limit=2) == ["example", "exit"]
+    assert index.starting_with("z") == []
+    assert index.unique_completion("exa") == "example"
+    assert index.unique_completion("ex") is None
+    assert index.unique_completion("") is None
+
+def test_suggestions_ranked_by_distance():
+    index = CommandSearchIndex(["clear", "example", "export", "exit"])
+
+    assert index.suggest("exmaple") == ["example"]
+    assert index.suggest("exprot") == ["export"]
+    assert index.suggest("clera") == ["clear"]
+    assert index.suggest("zzzzzz") == []
+
+def test_suggestions_in_large_catalog():
+    index = CommandSearchIndex(f"command{number}" for number in range(100000))
+
+    assert index.suggest("comand54321")[0] == "command54321"
+    assert index.unique_completion("command99999") == "command99999"
+    assert index.starting_with("command9999") == ["command9999", *[f"command9999{digit}" for digit in range(10)]]
+
+def test_updated_index_matches_rebuild():
+    names = [f"command{number}" for number in range(1000)]
+    index = CommandSearchIndex(names)
+    changed = names[10:] + ["added", "comand7"]
+    updated = index.updated(changed)
+    rebuilt = CommandSearchIndex(changed)
+
+    assert updated.names == rebuilt.names
+    assert {gram: {length: sorted(postings) for length, postings in by_length.items()} for gram, by_length in updated.grams.items()} == \
+        {gram: {length: sorted(postings) for length, postings in by_length.items()} for gram, by_length in rebuilt.grams.items()}
+    assert updated.suggest("comand7")[0] == "comand7"
+    assert "command5" in index.names and "added" not in index.names
+    assert index.updated(names) is index
+
+def test_search_index_cached_per_version():
+    commands = sample_map()
+    index = get_search_index(commands)
+
+    assert get_search_index(commands) is index
+    commands.add_command("commands", "exit_all", {})
+    assert get_search_index(commands) is not index
+    assert "exit_all" in get_search_index(commands).names
+
+def test_search_index_updated_after_reload():
+    commands = sample_map()
+    index = get_search_index(commands)
+
+    commands.add_command("commands", "exit_all", {})
+    with patch("cli_app.command_search.CommandSearchIndex.updated", wraps=index.updated) as mock_updated:
+        assert get_search_index(commands).suggest("exit_al") == ["exit_all"]
+    mock_updated.assert_called_once()
+
+def test_warm_search_index_builds_in_background():
+    commands = sample_map()
+
+    warm_search_index(commands).join()
+
+    assert commands.derived['search_index'][1].names == get_search_index(commands).names
+
+@patch("cli_app.command_runner.run_command", return_value=True)
+def test_unique_prefix_runs_command(mock_run_command):
+    commands = sample_map()
+
+    with patch("builtins.input", side_effect=["1"]):
+        assert execute_user_input("exa arg1", commands, None) is True
+
+    mock_run_command.assert_called_once_with("commands", "example", ["arg1"])
+
+@patch("cli_app.command_runner.run_command")
+def test_unknown_command_suggests_names(mock_run_command):
+    commands = sample_map()
+
+    with patch("cli_app.command_runner.logger.info") as mock_info:
+        assert execute_user_input("exmaple", commands, None) is False
+
+    mock_info.assert_any_call("Unknown command 'exmaple'. Type 'help' for a list of commands.")
+    mock_info.assert_any_call("Did you mean: example?")
+    mock_run_command.assert_not_called()
+
+@patch("cli_app.command_runner.run_command")
+def test_ambiguous_prefix_not_run(mock_run_command):
+    assert execute_user_input("ex", sample_map(), None) is False
+    mock_run_command.assert_not_called()
@@ -0,0 +1,68 @@
+import socket
+import subprocess
+import sys
+import threading
+import pytest
+from cli_app import client, config, protocol
+from cli_app.client import forward
+from cli_app.protocol import STDOUT, FrameWriter, receive_frame, receive_request, send_request
+from cli_app.server import CommandServer, server_supported
+
+pytestmark = pytest.mark.skipif(not server_supported(), reason="server mode needs Unix sockets and fork")
+
+def test_protocol_round_trip():
+    left, right = socket.socketpair()
+    with left, right:
+        send_request(left, {'argv': ['example', 'arg 1']})
+        assert receive_request(right) == {'argv': ['example', 'arg 1']}
+
+        FrameWriter(right, STDOUT).write("output line\n")
+        assert receive_frame(left) == (STDOUT, b"output line\n")
+
+@pytest.fixture
+def running_server(tmp_path, make_command_package):
+    make_command_package("server_commands", {"greet": "def run(args=None):\n    print('hello', *args)\n"})
+
+    commands = {"server_commands": {"greet": {"description": "Greets"}}}
+    socket_path = str(tmp_path / "server.sock")
+    server = CommandServer(socket_path, commands, request_timeout=0.5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield socket_path
+
+    server.shutdown()
+    server.server_close()
+
+def test_forward_streams_output_and_exit_code(running_server, capfd):
+    assert forward(["greet", "world"], running_server) == 0
+    assert "hello world" in capfd.readouterr().out
+
+def test_forward_unknown_command_fails(running_server):
+    assert forward(["missing"], running_server) == 1
+
+def test_stalled_client_does_not_block_others(running_server):
+    results = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+        stalled.connect(running_server)
+        thread = threading.Thread(target=lambda: results.append(forward(["greet", "world"], running_server)), daemon=True)
+        thread.start()
+        thread.join(5)
+
+    assert results == [0]
+
+def test_client_matches_server_constants():
+    assert client.SERVER_SOCKET == config.SERVER_SOCKET
+    assert client.HEADER.format == protocol.HEADER.format
+    assert client.REQUEST_HEADER.format == protocol.REQUEST_HEADER.format
+    assert (client.STDOUT, client.STDERR, client.EXIT) == (protocol.STDOUT, protocol.STDERR, protocol.EXIT)
+
+def test_client_request_is_json():
+    argv = ["greet", "a b", '"quoted"', "back\\slash", "tab\t", "\u00e9", "\U0001f600"]
+    assert protocol.json.loads(client.encode_request(argv, "/work")) == {'argv': argv, 'cwd': "/work"}
+
+def test_client_imports_no_app_modules():
+    code = "import sys, cli_app.client; print(','.join(name for name in ('cli_app.config', 'logging', 'json', 'typing') if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,101 @@
+from io import StringIO
+from unittest.mock import MagicMock, patch
+import pytest
+from cli_app import command_stats
+from cli_app.command_runner import run_command
+from cli_app.command_stats import (
+    CommandTiming,
+    format_stats,
+    percentile,
+    profile_call,
+    record_timing,
+    start_memory_tracing,
+    stop_memory_tracing
+)
+
+@pytest.fixture(autouse=True)
+def empty_timings(monkeypatch):
+    monkeypatch.setattr(command_stats, "command_timings", {})
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+
+def test_format_stats_without_commands():
+    assert format_stats() == "No commands have run in this session."
+
+def test_format_stats_aggregates_per_command():
+    for milliseconds in range(1, 101):
+        record_timing("folder1.command1", CommandTiming(0.001, milliseconds / 1000, None, milliseconds != 1))
+    record_timing("folder2.command2", CommandTiming(0.002, 0.005, 2048, True))
+
+    lines = format_stats().splitlines()
+    assert "p50 ms" in lines[0] and "p99 ms" in lines[0]
+    assert lines[1].split() == ["folder1.command1", "100", "1", "50.00", "95.00", "99.00", "1.00", "-"]
+    assert lines[2].split() == ["folder2.command2", "1", "0", "5.00", "5.00", "5.00", "2.00", "2.0"]
+    assert lines[3] == "Peak memory is traced for the whole process, it includes commands that ran at the same time."
+
+def test_run_command_records_timing():
+    mock_module = MagicMock()
+    with patch("importlib.util.find_spec", return_value=True), \
+         patch("importlib.import_module", return_value=mock_module):
+        run_command("commands", "timed_command", ["arg1"])
+
+    timings = command_stats.command_timings["commands.timed_command"]
+    assert len(timings) == 1
+    assert timings[0].succeeded is True
+    assert timings[0].run_seconds >= 0
+
+def test_run_command_logs_structured_result(caplog):
+    mock_module = MagicMock()
+    with patch("importlib.util.find_spec", return_value=True), \
+         patch("importlib.import_module", return_value=mock_module), \
+         caplog.at_level("DEBUG", logger="cli_app.command_runner"):
+        run_command("commands", "logged_command")
+
+    record = next(record for record in caplog.records if getattr(record, 'status', None))
+    assert record.getMessage().startswith("Command 'commands.logged_command' finished in ")
+    assert (record.command, record.folder, record.status) == ("logged_command", "commands", "ok")
+    assert record.duration >= 0
+
+def test_memory_tracing_reports_peak():
+    started = start_memory_tracing(enabled=True)
+    data = [bytearray(1024) for _ in range(100)]
+    peak = stop_memory_tracing(started)
+
+    assert started is True
+    assert peak >= 100 * 1024
+    assert len(data) == 100
+    assert stop_memory_tracing(start_memory_tracing(enabled=False)) is None
+
+def test_overlapping_commands_share_memory_tracing():
+    first = start_memory_tracing(enabled=True)
+    second = start_memory_tracing(enabled=True)
+    data = [bytearray(1024) for _ in range(100)]
+
+    assert first is True and second is True
+    assert stop_memory_tracing(first) >= 100 * 1024
+    assert command_stats.tracemalloc.is_tracing()
+    assert stop_memory_tracing(second) >= 100 * 1024
+    assert not command_stats.tracemalloc.is_tracing()
+    assert len(data) == 100
+
+def test_memory_tracing_started_elsewhere_is_left_alone():
+    command_stats.tracemalloc.start()
+    try:
+        assert start_memory_tracing(enabled=True) is False
+    finally:
+        command_stats.tracemalloc.stop()
+
+def test_profile_call_prints_hotspots():
+    stream = StringIO()
+
+    def work():
+        return sum(range(1000))
+
+    assert profile_call(work, top=5, stream=stream) == sum(range(1000))
+    assert "Ordered by: cumulative time" in stream.getvalue()
+    assert "work" in stream.getvalue()
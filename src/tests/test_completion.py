@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import types
+from unittest.mock import patch
+from cli_app.command_index import CommandMap
+from cli_app.completion import CommandCompleter, complete_prefix, get_completion_index, save_history, setup_completion
+
+def sample_map() -> CommandMap:
+    return CommandMap({
+        "commands": {
+            "clear": {"description": "Clear the console screen"},
+            "example": {"description": "Prints a simple example message"}
+        },
+        "log_project": {
+            "example": {"description": "Prints a simple example message from log project"},
+            "export": {"description": "Exports the log"}
+        }
+    })
+
+def test_completion_index_contains_builtins_and_qualified_names():
+    index = get_completion_index(sample_map())
+
+    assert complete_prefix(index, "ex") == ["example", "exit", "export"]
+    assert complete_prefix(index, "log_project.") == ["log_project.example", "log_project.export"]
+    assert complete_prefix(index, "commands.c") == ["commands.clear"]
+    assert complete_prefix(index, "ex", limit=2) == ["example", "exit"]
+
+def test_completion_index_does_not_build_trigrams():
+    folders = CommandMap({f"folder{folder}": {f"command{index}": "" for index in range(folder, 1000, 100)} for folder in range(100)})
+
+    with patch("cli_app.command_search.build_grams", side_effect=AssertionError("trigrams built")):
+        index = get_completion_index(folders)
+
+    assert isinstance(index, tuple)
+    assert list(index) == sorted(index)
+    assert complete_prefix(index, "folder7.command") == ["folder7.command107", "folder7.command207", "folder7.command307", "folder7.command407", "folder7.command507", "folder7.command607", "folder7.command7", "folder7.command707", "folder7.command807", "folder7.command907"]
+
+def test_first_word_of_each_command_completes_names():
+    completer = CommandCompleter(sample_map())
+
+    assert completer.get_matches("cl", 0, "cl") == ["clear"]
+    assert completer.get_matches("clear ; ex", 8, "ex") == ["example", "exit", "export"]
+    assert completer.get_matches("clear arg", 6, "arg") == []
+
+def test_argument_completer_of_command():
+    module = types.ModuleType("log_project.export")
+    module.run = lambda args=None: None
+    module.complete = lambda text, args: ["json", "csv", "jsonl"]
+    completer = CommandCompleter(sample_map())
+
+    with patch.dict(sys.modules, {"log_project.export": module}), \
+            patch("cli_app.command_runner.resolve_command", return_value=module.run):
+        assert completer.get_matches("export js", 7, "js") == ["json", "jsonl"]
+        assert completer.get_matches("log_project.export c", 19, "c") == ["csv"]
+
+def test_argument_completion_skips_ambiguous_commands():
+    completer = CommandCompleter(sample_map())
+
+    assert completer.get_matches("example a", 8, "a") == []
+    assert completer.get_matches("export 'a", 7, "'a") == []
+
+def test_history_persisted_and_bounded():
+    readline = __import__("readline")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        history_file = os.path.join(temp_dir, "cache", "history")
+        readline.clear_history()
+        for index in range(5):
+            readline.add_history(f"command{index}")
+
+        with patch("cli_app.completion.HISTORY_LENGTH", 3):
+            save_history(history_file)
+        readline.clear_history()
+        setup_completion(sample_map(), history_file)
+
+        assert [readline.get_history_item(index) for index in range(1, readline.get_current_history_length() + 1)] == [
+            "command2", "command3", "command4"
+        ]
+        readline.clear_history()
+
+def test_declared_options_complete_without_import():
+    from cli_app.command_metadata import CommandMetadata, metadata_registry
+
+    folders = CommandMap({"files": {"listing": "Lists files"}})
+    metadata = CommandMetadata(True, False, None, ['path', '--count', '-n'], False)
+    with patch.dict(metadata_registry, {"files.listing": metadata}), \
+            patch("cli_app.command_runner.resolve_command", side_effect=AssertionError("imported")):
+        assert CommandCompleter(folders).get_matches("listing --c", 8, "--c") == ['--count']
@@ -0,0 +1,65 @@
+import json
+from unittest.mock import patch
+import pytest
+from cli_app.command_loader import load_command_tree
+from cli_app.descriptions import DescriptionStore, build_lazy_catalog, read_module_description
+
+@pytest.fixture
+def command_tree(tmp_path):
+    folder = tmp_path / "described"
+    folder.mkdir()
+    (folder / "__init__.py").touch()
+    (folder / "listed.py").write_text("def run(args=None):\n    pass\n")
+    (folder / "attribute.py").write_text("def run(args=None):\n    pass\n\ndescription = 'From the module'\n")
+    (folder / "plain.py").write_text("def run(args=None):\n    pass\n")
+    (tmp_path / "command_descriptions.json").write_text(json.dumps({"described": {"listed": {"description": "From the file"}}}))
+    return tmp_path
+
+COMMAND_FILES = {"described": {"listed": "described/listed.py", "attribute": "described/attribute.py", "plain": "described/plain.py"}}
+
+def make_store(root) -> DescriptionStore:
+    return DescriptionStore(str(root / "command_descriptions.json"), COMMAND_FILES, str(root), str(root / "cache"))
+
+def test_read_module_description(tmp_path):
+    annotated = tmp_path / "annotated.py"
+    annotated.write_text("description: str = 'Annotated'\n")
+    broken = tmp_path / "broken.py"
+    broken.write_text("def run(:\n")
+
+    assert read_module_description(str(annotated)) == "Annotated"
+    assert read_module_description(str(broken)) is None
+    assert read_module_description(str(tmp_path / "missing.py")) is None
+
+def test_descriptions_load_on_first_access(command_tree):
+    catalog = build_lazy_catalog(COMMAND_FILES, make_store(command_tree))
+    assert not catalog["described"].loaded
+    assert "plain" in catalog["described"]
+    assert not catalog["described"].loaded
+
+    assert dict(catalog["described"]) == {
+        "attribute": "From the module",
+        "listed": {"description": "From the file"},
+        "plain": "Description for plain not found",
+    }
+
+def test_later_sessions_read_shards(command_tree):
+    make_store(command_tree).get_folder("described")
+    assert (command_tree / "cache" / "index.json").exists()
+
+    with patch("cli_app.descriptions.read_descriptions", side_effect=AssertionError("descriptions file parsed again")), \
+         patch("cli_app.descriptions.read_module_description", side_effect=AssertionError("module parsed again")):
+        assert make_store(command_tree).get_folder("described")["attribute"] == "From the module"
+
+def test_changed_descriptions_file_splits_again(command_tree):
+    make_store(command_tree).get_folder("described")
+    (command_tree / "command_descriptions.json").write_text(json.dumps({"described": {"plain": "Plain now"}}))
+
+    assert make_store(command_tree).get_folder("described") == {"plain": "Plain now", "attribute": "From the module"}
+
+def test_load_command_tree_is_lazy(command_tree, monkeypatch):
+    monkeypatch.chdir(command_tree)
+    folders, commands = load_command_tree(".", "command_descriptions.json")
+
+    assert folders == ["described"]
+    assert not commands["described"].loaded
+    assert commands["described"]["listed"] == {"description": "From the file"}
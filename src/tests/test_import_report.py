@@ -0,0 +1,46 @@
+import sys
+from cli_app.import_report import ImportTime, format_import_report, format_prompt_time, measure_prompt_time, parse_import_times
+
+SAMPLE_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       300 |        300 | site
+import time:       100 |        100 |     json.decoder
+import time:       200 |        300 |   json
+import time:      1000 |       1000 |   shared.logger
+import time:      2000 |       3300 | cli_app.main
+"""
+
+def test_parse_import_times():
+    assert parse_import_times(SAMPLE_OUTPUT) == [
+        ImportTime("site", 300, 300, 0),
+        ImportTime("json.decoder", 100, 100, 2),
+        ImportTime("json", 200, 300, 1),
+        ImportTime("shared.logger", 1000, 1000, 1),
+        ImportTime("cli_app.main", 2000, 3300, 0),
+    ]
+
+def test_format_import_report():
+    lines = format_import_report(parse_import_times(SAMPLE_OUTPUT), top=2).splitlines()
+
+    assert lines[0].split() == ["module", "self", "ms", "total", "ms"]
+    assert lines[1].split() == ["cli_app.main", "2.00", "3.30"]
+    assert lines[2].split() == ["shared.logger", "1.00", "1.00"]
+    assert lines[3] == "cli_app.main imports 4 modules in 3.30 ms, within the 50 ms budget."
+
+def test_format_import_report_without_module():
+    assert format_import_report([], "cli_app.main") == "Could not measure the import of cli_app.main."
+
+def test_measure_prompt_time_waits_for_the_prompt():
+    app = [sys.executable, "-c", "import time; time.sleep(0.2); input('> ')"]
+
+    assert measure_prompt_time(runs=1, command=app) >= 200
+
+def test_measure_prompt_time_without_prompt():
+    assert measure_prompt_time(runs=1, command=[sys.executable, "-c", "print('no prompt')"]) is None
+
+def test_app_reaches_the_first_prompt():
+    assert measure_prompt_time(runs=1) is not None
+
+def test_format_prompt_time():
+    assert format_prompt_time(12.345) == "First prompt after 12.35 ms, within the 50 ms budget."
+    assert format_prompt_time(75.0) == "First prompt after 75.00 ms, over the 50 ms budget."
+    assert format_prompt_time(None) == "Could not measure the time to the first prompt."
@@ -0,0 +1,91 @@
+import subprocess
+import sys
+import threading
+import pytest
+from shared.lazy_import import LazyModule, lazy_import
+
+def is_loaded(module) -> bool:
+    return not isinstance(module, LazyModule)
+
+def test_module_loaded_on_first_attribute_access(tmp_path, monkeypatch):
+    (tmp_path / "lazy_sample.py").write_text("LOADED = True\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        module = lazy_import("lazy_sample")
+        assert sys.modules["lazy_sample"] is module
+        assert not is_loaded(module)
+
+        assert module.LOADED is True
+        assert is_loaded(module)
+    finally:
+        sys.modules.pop("lazy_sample", None)
+
+def test_threads_wait_for_the_first_load(tmp_path, monkeypatch):
+    (tmp_path / "lazy_slow.py").write_text("import time\ntime.sleep(0.2)\nLOADED = True\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        module = lazy_import("lazy_slow")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(module.LOADED)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [True] * 4
+    finally:
+        sys.modules.pop("lazy_slow", None)
+
+def test_submodule_bound_on_its_package(tmp_path, monkeypatch):
+    (tmp_path / "lazy_package").mkdir()
+    (tmp_path / "lazy_package" / "__init__.py").touch()
+    (tmp_path / "lazy_package" / "sub.py").write_text("VALUE = 3\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        module = lazy_import("lazy_package.sub")
+        import lazy_package.sub
+        assert lazy_package.sub is module
+        assert lazy_package.sub.VALUE == 3
+    finally:
+        sys.modules.pop("lazy_package.sub", None)
+        sys.modules.pop("lazy_package", None)
+
+def test_imported_module_returned_as_is():
+    assert lazy_import("os") is sys.modules["os"]
+
+def test_missing_module():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("missing_module_for_lazy_import")
+
+def test_first_prompt_does_not_load_runner_dependencies():
+    code = (
+        "import sys\n"
+        "import cli_app.main\n"
+        "loaded = [name for name in ('asyncio', 'argparse', 'inspect', 'cProfile', 'pstats', 'multiprocessing', 'ctypes', 'socket') "
+        "if name in sys.modules and type(sys.modules[name]).__name__ != 'LazyModule']\n"
+        "print(','.join(loaded))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+
+    assert loaded == []
+
+def test_first_prompt_does_not_wait_for_the_catalog():
+    code = (
+        "import builtins, sys\n"
+        "def show_loaded(prompt=''):\n"
+        "    print(','.join(name for name in ('cli_app.command_runner', 'cli_app.manifest_cache', 'hashlib', 'logging.handlers') "
+        "if name in sys.modules and type(sys.modules[name]).__name__ != 'LazyModule'))\n"
+        "    raise SystemExit\n"
+        "builtins.input = show_loaded\n"
+        "import threading\n"
+        "threading.Thread.start = lambda self: None\n"
+        "import cli_app.main\n"
+        "cli_app.main.main([])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""
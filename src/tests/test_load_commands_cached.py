@@ -0,0 +1,108 @@
+import json
+import os
+import pytest
+from cli_app.manifest_cache import load_commands_cached, read_manifest
+
+@pytest.fixture
+def command_tree(tmp_path):
+    """
+    Creates a source folder with two command folders and a descriptions file.
+    """
+    (tmp_path / "folder1").mkdir()
+    (tmp_path / "folder1" / "__init__.py").touch()
+    (tmp_path / "folder1" / "command1.py").write_text("def run(args=None): pass\n")
+    (tmp_path / "folder1" / "lib").mkdir()
+    (tmp_path / "folder1" / "lib" / "helper.py").touch()
+    (tmp_path / "folder2").mkdir()
+    (tmp_path / "folder2" / "__init__.py").touch()
+    (tmp_path / "folder2" / "command2.py").write_text("def run(args=None): pass\n")
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "__init__.py").touch()
+
+    descriptions = {"folder1": {"command1": {"description": "Command 1 description"}}}
+    (tmp_path / "command_descriptions.json").write_text(json.dumps(descriptions))
+
+    return tmp_path
+
+def load(root):
+    return load_commands_cached(
+        src_folder_with_commands=str(root),
+        descriptions_file=str(root / "command_descriptions.json"),
+        cache_file=str(root / ".cli_app_cache" / "manifest.json")
+    )
+
+def test_cold_load_builds_manifest(command_tree):
+    folders, commands = load(command_tree)
+
+    assert folders == ["folder1", "folder2"]
+    assert commands["folder1"] == {"command1": {"description": "Command 1 description"}}
+    assert commands["folder2"] == {"command2": "Description for command2 not found"}
+
+    manifest = read_manifest(str(command_tree / ".cli_app_cache" / "manifest.json"))
+    assert manifest["folders"] == folders
+    assert manifest["commands"] == {"folder1": [["command1"]], "folder2": [["command2"]]}
+
+def test_warm_load_does_not_rescan(command_tree, monkeypatch):
+    expected = load(command_tree)
+
+    def fail_scan(path, follow_symlinks=False):
+        raise AssertionError(f"Unexpected rescan of {path}")
+
+    monkeypatch.setattr("cli_app.command_loader.scan_directory", fail_scan)
+    assert load(command_tree) == expected
+
+def test_new_command_rescans_only_changed_folder(command_tree, monkeypatch):
+    load(command_tree)
+    (command_tree / "folder2" / "command3.py").write_text("def run(args=None): pass\n")
+    os.utime(command_tree / "folder2", ns=(0, 1))
+
+    from cli_app import command_loader
+    scanned = []
+    original_scan = command_loader.scan_directory
+
+    def tracking_scan(path, follow_symlinks=False):
+        scanned.append(os.path.basename(path))
+        return original_scan(path, follow_symlinks)
+
+    monkeypatch.setattr("cli_app.command_loader.scan_directory", tracking_scan)
+    folders, commands = load(command_tree)
+
+    assert scanned == ["folder2"]
+    assert set(commands["folder2"]) == {"command2", "command3"}
+
+def test_files_without_run_are_left_out_until_edited(command_tree):
+    (command_tree / "folder2" / "helper.py").write_text("VALUE = 1\n")
+    (command_tree / "folder2" / "broken.py").write_text("def run(:\n")
+
+    folders, commands = load(command_tree)
+    assert set(commands["folder2"]) == {"command2"}
+
+    (command_tree / "folder2" / "helper.py").write_text("async def run(args=None): pass\n")
+    folders, commands = load(command_tree)
+    assert set(commands["folder2"]) == {"command2", "helper"}
+
+def test_command_edited_to_drop_run_leaves_the_catalog(command_tree):
+    folders, commands = load(command_tree)
+    assert set(commands["folder2"]) == {"command2"}
+
+    (command_tree / "folder2" / "command2.py").write_text("VALUE = 1\n")
+    folders, commands = load(command_tree)
+    assert "command2" not in commands.get("folder2", {})
+
+    (command_tree / "folder2" / "command2.py").write_text("def run(args=None): pass\n")
+    folders, commands = load(command_tree)
+    assert set(commands["folder2"]) == {"command2"}
+
+def test_descriptions_change_refreshes_commands(command_tree):
+    load(command_tree)
+
+    descriptions = {"folder2": {"command2": {"description": "Command 2 description"}}}
+    descriptions_file = command_tree / "command_descriptions.json"
+    descriptions_file.write_text(json.dumps(descriptions))
+    os.utime(descriptions_file, ns=(0, 1))
+
+    _, commands = load(command_tree)
+    assert commands["folder2"]["command2"] == {"description": "Command 2 description"}
+
+def test_missing_source_folder(tmp_path):
+    assert load(tmp_path / "missing") == ([], {})
@@ -0,0 +1,135 @@
+import json
+import logging
+from shared.logger import BatchRotatingFileHandler, RotatingFileHandler, JsonLinesFormatter, get_shared_handlers, pipelines, setup_logger, shared_handlers, shutdown_logging
+
+def make_config(tmp_path, **overrides) -> dict:
+    return {
+        'log_file': str(tmp_path / "logs" / "test.log"),
+        'log_to_file': True,
+        'mainLevel': logging.INFO,
+        'consoleLevel': logging.CRITICAL,
+        'fileLevel': logging.INFO,
+        'format': '%(name)s %(levelname)s %(message)s',
+        'max_bytes': 10 * 1024 * 1024,
+        'backup_count': 1,
+        **overrides
+    }
+
+def test_loggers_share_handlers(tmp_path):
+    config = make_config(tmp_path)
+    handlers = get_shared_handlers(config)
+
+    assert get_shared_handlers(dict(config)) is handlers
+    assert [type(handler).__name__ for handler in handlers] == ["StreamHandler", "RotatingFileHandler"]
+    assert get_shared_handlers(make_config(tmp_path, fileLevel=logging.DEBUG)) is not handlers
+
+def test_queue_writes_every_record_on_shutdown(tmp_path):
+    config = make_config(tmp_path, queue=True)
+    logger = setup_logger("test_logger.queue", config)
+    logger.propagate = False
+    logger.handlers = get_shared_handlers(config)
+
+    assert [type(handler).__name__ for handler in logger.handlers] == ["TracebackQueueHandler"]
+    for index in range(1000):
+        logger.info(f"record {index}")
+    logger.debug("below the level")
+    shutdown_logging()
+
+    lines = (tmp_path / "logs" / "test.log").read_text().splitlines()
+    assert lines == [f"test_logger.queue INFO record {index}" for index in range(1000)]
+    assert len(get_shared_handlers(config)) == 1
+
+def test_queue_keeps_exception_apart_from_message(tmp_path):
+    config = make_config(tmp_path / "exception", queue=True, structured=True)
+    logger = setup_logger("test_logger.exception", config)
+    logger.propagate = False
+    logger.handlers = get_shared_handlers(config)
+
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("Command %s failed", "divide")
+    shutdown_logging()
+
+    entry = json.loads((tmp_path / "exception" / "logs" / "test.log").read_text())
+    assert entry['message'] == "Command divide failed"
+    assert entry['exception'].startswith("Traceback")
+    assert "ZeroDivisionError" in entry['exception']
+
+def test_batch_file_handler_rolls_over(tmp_path):
+    handler = BatchRotatingFileHandler(str(tmp_path / "roll.log"), maxBytes=100, backupCount=1)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.defer_flush = True
+    for index in range(10):
+        handler.emit(logging.makeLogRecord({'msg': f"message {index:02d}"}))
+    handler.defer_flush = False
+    handler.close()
+
+    assert (tmp_path / "roll.log.1").exists()
+    assert (tmp_path / "roll.log").stat().st_size < 100
+    assert (tmp_path / "roll.log").read_text().splitlines()[-1] == "message 09"
+
+def test_file_handler_keeps_backup_count_files(tmp_path):
+    handler = RotatingFileHandler(str(tmp_path / "roll.log"), maxBytes=30, backupCount=2)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for index in range(10):
+        handler.emit(logging.makeLogRecord({'msg': f"message {index:02d}"}))
+    handler.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["roll.log", "roll.log.1", "roll.log.2"]
+    assert (tmp_path / "roll.log.2").read_text().splitlines() == ["message 04", "message 05"]
+    assert (tmp_path / "roll.log").read_text().splitlines() == ["message 08", "message 09"]
+
+def teardown_module():
+    for group in [pipelines, shared_handlers]:
+        for key in [key for key in group if "test.log" in str(key)]:
+            entry = group.pop(key)
+            for handler in getattr(entry, 'handlers', entry):
+                handler.close()
+
+def test_json_lines_formatter_writes_structured_fields():
+    record = logging.makeLogRecord({
+        'name': 'cli_app.command_runner',
+        'levelname': 'INFO',
+        'msg': "Command '%s.%s' finished: %s",
+        'args': ('folder1', 'command1', 'ok'),
+        'created': 1700000000.5,
+        'command': 'command1',
+        'folder': 'folder1',
+        'duration': 0.25,
+        'status': 'ok',
+    })
+
+    line = JsonLinesFormatter().format(record)
+
+    assert "\n" not in line
+    assert json.loads(line) == {
+        'time': 1700000000.5,
+        'level': 'INFO',
+        'logger': 'cli_app.command_runner',
+        'message': "Command 'folder1.command1' finished: ok",
+        'command': 'command1',
+        'folder': 'folder1',
+        'duration': 0.25,
+        'status': 'ok',
+    }
+
+def test_structured_file_handler(tmp_path):
+    handlers = get_shared_handlers(make_config(tmp_path, structured=True, fileLevel=logging.DEBUG))
+
+    assert isinstance(handlers[1].formatter, JsonLinesFormatter)
+    assert not isinstance(handlers[0].formatter, JsonLinesFormatter)
+
+def test_disabled_records_are_not_formatted():
+    calls = []
+
+    class Expensive:
+        def __repr__(self) -> str:
+            calls.append(1)
+            return "expensive"
+
+    logger = logging.getLogger("test_logger.lazy")
+    logger.setLevel(logging.INFO)
+    logger.debug("Discovered commands: %s", Expensive())
+
+    assert calls == []
@@ -0,0 +1,53 @@
+import importlib.util
+import os
+from unittest.mock import patch
+import pytest
+from cli_app import command_runner
+from cli_app.command_runner import module_registry, run_command, start_preloader
+
+@pytest.fixture
+def command_package(tmp_path, monkeypatch, make_command_package):
+    """
+    Creates an importable command folder with a single command writing to a marker file.
+    """
+    marker = tmp_path / "marker.txt"
+    package = make_command_package("registry_commands", {
+        "write_marker": f"def run(args=None):\n    open({str(marker)!r}, 'w').write('first')\n"
+    })
+    monkeypatch.setattr(command_runner, "command_usage", command_runner.Counter())
+    return package, marker
+
+def test_run_command_uses_registry_after_first_call(command_package):
+    _, marker = command_package
+
+    with patch("importlib.util.find_spec", wraps=importlib.util.find_spec) as mock_find_spec:
+        run_command("registry_commands", "write_marker")
+        run_command("registry_commands", "write_marker")
+
+    assert mock_find_spec.call_count == 1
+    assert "registry_commands.write_marker" in module_registry
+    assert marker.read_text() == "first"
+    assert command_runner.command_usage["registry_commands.write_marker"] == 2
+
+def test_run_command_reimports_changed_module(command_package):
+    package, marker = command_package
+    run_command("registry_commands", "write_marker")
+
+    command_file = package / "write_marker.py"
+    command_file.write_text(f"def run(args=None):\n    open({str(marker)!r}, 'w').write('second')\n")
+    stat = command_file.stat()
+    os.utime(command_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    run_command("registry_commands", "write_marker")
+    assert marker.read_text() == "second"
+
+def test_start_preloader_warms_most_used_commands(command_package):
+    command_runner.command_usage.update({"registry_commands.write_marker": 3, "missing.command": 5})
+    folders = {"registry_commands": {"write_marker": {"description": "Writes a marker"}}}
+
+    futures = start_preloader(folders)
+    for future in futures:
+        future.result()
+
+    assert len(futures) == 1
+    assert "registry_commands.write_marker" in module_registry
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+import pytest
+from cli_app import command_runner
+from cli_app.command_runner import execute_command_line, run_parallel_block, shutdown_executors, split_command_line
+
+FOLDERS = {
+    'folder1': {'command1': {'description': 'Command 1'}},
+    'folder2': {'command2': {'description': 'Command 2'}}
+}
+
+def test_split_command_line_plain_input():
+    assert split_command_line('command "a b" x') == [('command "a b" x', False)]
+
+def test_split_command_line_separators():
+    assert split_command_line('command1 a ; command2 "b c" & command3') == [
+        ('command1 a', False),
+        ("command2 'b c'", True),
+        ('command3', False),
+    ]
+
+def test_split_command_line_keeps_quoted_separators():
+    assert split_command_line('command1 "a;b" & command2') == [("command1 'a;b'", True), ('command2', False)]
+    assert split_command_line("command1 ';' '&&' \\& ; command2") == [("command1 ';' '&&' '&'", False), ('command2', False)]
+
+@pytest.mark.parametrize("user_input", ['command1 && command2', 'command1 ;; command2', 'command1 |& command2', 'command1 &; command2', 'command1 || command2 ; command3'])
+def test_split_command_line_rejects_other_operators(user_input):
+    with pytest.raises(ValueError, match="Unsupported operator"):
+        split_command_line(user_input)
+
+def test_execute_command_line_does_not_run_unsupported_operators():
+    with patch.object(command_runner, "run_command") as run_command:
+        with pytest.raises(ValueError):
+            execute_command_line('command1 && command2', FOLDERS, None)
+    run_command.assert_not_called()
+
+@pytest.fixture
+def fake_commands():
+    calls = []
+
+    def fake_run_command(folder, command, args=None):
+        print(f"output of {command}")
+        calls.append((folder, command, args))
+        return command != 'command2'
+
+    with patch('cli_app.command_runner.run_command', side_effect=fake_run_command), \
+         patch('cli_app.command_runner.resolve_command', return_value=print):
+        yield calls
+    shutdown_executors()
+
+def test_execute_command_line_runs_background_jobs(fake_commands, capsys):
+    assert execute_command_line('command1 a & command1 b', FOLDERS, None) is True
+
+    assert sorted(fake_commands) == [('folder1', 'command1', ['a']), ('folder1', 'command1', ['b'])]
+    output = capsys.readouterr().out
+    assert "[folder1.command1] output of command1" in output
+    assert "output of command1\n" in output.replace("[folder1.command1] output of command1\n", "", 1)
+
+def test_run_parallel_block_gathers_failures(fake_commands, caplog):
+    assert run_parallel_block(['command1', 'command2 x'], FOLDERS, None) is False
+    assert len(fake_commands) == 2
+    assert "1 of 2 background commands failed: folder2.command2" in caplog.text
+
+def test_process_executor_attribute(make_command_package, capsys):
+    make_command_package("process_commands", {"compute": "executor = 'process'\n\ndef run(args=None):\n    print('computed', *args)\n"})
+    folders = {'process_commands': {'compute': {'description': 'Computes'}}}
+
+    try:
+        assert run_parallel_block(['compute 1', 'compute 2'], folders, None) is True
+    finally:
+        shutdown_executors()
+
+    output = capsys.readouterr().out
+    assert "[process_commands.compute] computed 1" in output
+    assert "[process_commands.compute] computed 2" in output
+
+def test_split_command_line_keeps_pipelines():
+    assert split_command_line('command1 a | command2 ; command3') == [('command1 a | command2', False), ('command3', False)]
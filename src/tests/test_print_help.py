@@ -114,3 +114,48 @@ def test_get_help_padding():
     # Verify padding exists for each command
     assert "short" in result and " " * (COMMAND_NAME_MAX_LENGTH - len("short")) in result
     assert "veryverylongcommand" in result and " " * (COMMAND_NAME_MAX_LENGTH - len("veryverylongcommand")) in result
+
+def test_get_help_marks_commands_in_multiple_folders():
+    folders = {
+        "Folder1": {
+            "command1": {"description": "Command 1 description"},
+        },
+        "Folder2": {
+            "command1": {"description": "Other command 1 description"},
+        }
+    }
+
+    result = get_help(folders, None)
+
+    assert "Command 1 description (also in: Folder2)" in result
+    assert "Other command 1 description (also in: Folder1)" in result
+
+def test_get_help_folder_filter():
+    folders = {
+        "Folder1": {"command1": {"description": "Command 1 description"}},
+        "Folder2": {"command2": {"description": "Command 2 description"}},
+    }
+
+    result = get_help(folders, None, "Folder2")
+
+    assert "Folder2 commands:" in result
+    assert "Command 2 description" in result
+    assert "Folder1 commands:" not in result
+
+def test_get_help_prefix_filter():
+    folders = {
+        "Folder1": {"build": {"description": "Build it"}, "clean": {"description": "Clean it"}},
+        "Folder2": {"bump": {"description": "Bump version"}},
+    }
+
+    result = get_help(folders, None, "bu")
+
+    assert "Commands starting with 'bu':" in result
+    assert "Build it [Folder1]" in result
+    assert "Bump version [Folder2]" in result
+    assert "Clean it" not in result
+
+def test_get_help_description_not_found_string():
+    folders = {"Folder1": {"command1": "Description for command1 not found"}}
+
+    assert "- Description for command1 not found" in get_help(folders, None)
@@ -0,0 +1,58 @@
+from io import StringIO
+from unittest.mock import MagicMock
+from cli_app.cli_helpers import build_help_section, get_help, print_paged
+from cli_app.command_index import CommandCatalog, CommandMap, FolderCommands
+
+class TerminalOutput(StringIO):
+    def isatty(self) -> bool:
+        return True
+
+def test_print_paged_without_terminal_prints_everything():
+    stream = StringIO()
+    read_key = MagicMock()
+
+    print_paged((f"line {index}" for index in range(10)), page_size=3, stream=stream, read_key=read_key)
+
+    assert stream.getvalue().count("\n") == 10
+    read_key.assert_not_called()
+
+def test_print_paged_stops_on_quit():
+    stream = TerminalOutput()
+    consumed = []
+
+    def lines():
+        for index in range(10):
+            consumed.append(index)
+            yield f"line {index}"
+
+    print_paged(lines(), page_size=3, stream=stream, read_key=MagicMock(side_effect=["", "q"]))
+
+    assert stream.getvalue().splitlines() == [f"line {index}" for index in range(6)]
+    assert consumed == list(range(6))
+
+def test_help_sections_cached_per_folder_and_catalog_version(monkeypatch):
+    commands = CommandMap({"Folder1": {"command1": {"description": "Command 1 description"}}})
+    build = MagicMock(side_effect=build_help_section)
+    monkeypatch.setattr("cli_app.cli_helpers.build_help_section", build)
+
+    get_help(commands, None)
+    get_help(commands, None, "Folder1")
+    assert build.call_count == 1
+
+    commands["Folder2"] = {"command2": {"description": "Command 2 description"}}
+    assert "Command 2 description" in get_help(commands, None, "Folder2")
+    assert build.call_count == 2
+
+def test_folder_help_reads_only_that_folder():
+    loaded = []
+
+    def source(folder: str) -> dict:
+        loaded.append(folder)
+        return {f"{folder}_command": f"{folder} description"}
+
+    commands = CommandCatalog({folder: FolderCommands.lazy([f"{folder}_command"], lambda folder=folder: source(folder)) for folder in ["one", "two", "three"]})
+
+    assert "two description" in get_help(commands, None, "two")
+    assert loaded == ["two"]
+    assert "three description" in get_help(commands, None, "thr")
+    assert loaded == ["two", "three"]
@@ -0,0 +1,33 @@
+from unittest.mock import patch
+from cli_app.command_runner import execute_user_input, resolve_ambiguity
+
+FOLDERS = {
+    'folder1': {'command1': {'description': 'Command 1'}},
+    'folder2': {'command1': {'description': 'Other command 1'}}
+}
+
+def test_resolve_ambiguity_first():
+    assert resolve_ambiguity(['folder1', 'folder2'], None, 'first') == 'folder1'
+
+def test_resolve_ambiguity_prefers_selected_folder():
+    assert resolve_ambiguity(['folder1', 'folder2'], 'folder2', 'first') == 'folder2'
+    assert resolve_ambiguity(['folder1', 'folder2'], 'folder2', 'error') == 'folder2'
+
+def test_resolve_ambiguity_error(caplog):
+    assert resolve_ambiguity(['folder1', 'folder2'], None, 'error') is None
+    assert "Multiple folders contain this command: folder1, folder2" in caplog.text
+
+@patch('cli_app.command_runner.display_menu', return_value='folder2')
+def test_resolve_ambiguity_prompt(mock_display_menu):
+    assert resolve_ambiguity(['folder1', 'folder2'], None, 'prompt') == 'folder2'
+    mock_display_menu.assert_called_once_with(['folder1', 'folder2'])
+
+@patch('cli_app.command_runner.run_command', return_value=True)
+def test_execute_user_input_qualified_command(mock_run_command):
+    assert execute_user_input("folder2.command1 arg1", FOLDERS, None, 'error') is True
+    mock_run_command.assert_called_once_with('folder2', 'command1', ['arg1'])
+
+@patch('cli_app.command_runner.run_command')
+def test_execute_user_input_ambiguity_error(mock_run_command):
+    assert execute_user_input("command1", FOLDERS, None, 'error') is False
+    mock_run_command.assert_not_called()
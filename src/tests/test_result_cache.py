@@ -0,0 +1,59 @@
+import sys
+from unittest.mock import patch
+import pytest
+from cli_app import result_cache
+from cli_app.command_runner import run_command
+from cli_app.command_stats import format_stats
+from cli_app.result_cache import ResultCache
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 'A', 60, None)
+    cache.put('b', 'B', 60, None)
+    cache.get('a', None)
+    cache.put('c', 'C', 60, None)
+
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.evictions == 1
+
+def test_expired_and_changed_results_are_misses():
+    cache = ResultCache()
+    with patch('cli_app.result_cache.time.time', return_value=100.0):
+        cache.put('a', 'A', 10, 1)
+    with patch('cli_app.result_cache.time.time', return_value=105.0):
+        assert cache.get('a', 1).output == 'A'
+        assert cache.get('a', 2) is None
+    cache.put('b', 'B', 10, 1)
+    with patch('cli_app.result_cache.time.time', return_value=10 ** 12):
+        assert cache.get('b', 1) is None
+
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 2, 2)
+
+def test_disk_tier_survives_restart(tmp_path):
+    disk_file = str(tmp_path / "results.json")
+    cache = ResultCache(disk_file=disk_file)
+    cache.put('a', 'A', 60, 1)
+    cache.save()
+
+    restarted = ResultCache(disk_file=disk_file)
+    assert restarted.get('a', 1).output == 'A'
+    assert restarted.disk_hits == 1
+
+@pytest.fixture
+def cached_command(make_command_package, monkeypatch):
+    make_command_package("cached_commands", {
+        "lookup": (
+            "cacheable = True\ncache_ttl = 60\nruns = []\n\n"
+            "def run(args=None):\n    runs.append(args)\n    print('result for', *args)\n"
+        ),
+    })
+    monkeypatch.setattr(result_cache, 'result_cache', ResultCache())
+
+def test_cacheable_command_runs_once_per_args(cached_command, capsys):
+    assert run_command('cached_commands', 'lookup', ['x']) is True
+    assert run_command('cached_commands', 'lookup', ['x']) is True
+    assert run_command('cached_commands', 'lookup', ['y']) is True
+
+    assert sys.modules['cached_commands.lookup'].runs == [['x'], ['y']]
+    assert capsys.readouterr().out == "result for x\nresult for x\nresult for y\n"
+    assert "Result cache: 1 hits (0 from disk), 2 misses (33% hits)" in format_stats()
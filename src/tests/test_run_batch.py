@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+from cli_app.batch import run_batch
+
+FOLDERS = {
+    'folder1': {'command1': {'description': 'Command 1'}},
+    'folder2': {'command2': {'description': 'Command 2'}}
+}
+
+@patch('cli_app.batch.execute_command_line', return_value=True)
+def test_run_batch_runs_every_command_line(mock_execute_command_line):
+    lines = ["command1 arg1\n", "\n", "# a comment\n", "command2\n"]
+
+    assert run_batch(lines, FOLDERS, on_ambiguity='first') == 0
+
+    assert mock_execute_command_line.call_count == 2
+    mock_execute_command_line.assert_any_call("command1 arg1", FOLDERS, None, 'first')
+    mock_execute_command_line.assert_any_call("command2", FOLDERS, None, 'first')
+
+@patch('cli_app.batch.execute_command_line', side_effect=[False, True])
+def test_run_batch_returns_non_zero_on_failure(mock_execute_command_line):
+    assert run_batch(["unknown", "command1"], FOLDERS) == 1
+    assert mock_execute_command_line.call_count == 2
+
+@patch('cli_app.batch.execute_command_line', return_value=False)
+def test_run_batch_stop_on_error(mock_execute_command_line):
+    assert run_batch(["unknown", "command1"], FOLDERS, stop_on_error=True) == 1
+    mock_execute_command_line.assert_called_once()
+
+@patch('cli_app.batch.execute_command_line', return_value=True)
+def test_run_batch_stops_at_exit(mock_execute_command_line):
+    assert run_batch(["command1", "exit", "command2"], FOLDERS) == 0
+    mock_execute_command_line.assert_called_once()
+
+def test_batch_background_command_in_subprocess(tmp_path):
+    # A fresh interpreter: pytest has already imported what the app imports lazily.
+    batch_file = tmp_path / "batch.txt"
+    batch_file.write_text("commands.example &\n")
+    src_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    result = subprocess.run(
+        [sys.executable, "-m", "cli_app.main", "--batch", str(batch_file)],
+        cwd=src_folder,
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "This is an example command!" in result.stdout
+    assert "0 failed" in result.stdout + result.stderr
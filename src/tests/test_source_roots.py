@@ -0,0 +1,104 @@
+import sys
+import time
+from unittest.mock import patch
+import pytest
+from cli_app import source_roots
+from cli_app.command_index import find_folders
+from cli_app.command_runner import capture_command, execute_user_input
+from cli_app.source_roots import load_command_roots
+
+def write_folder(root, folder, commands):
+    (root / folder).mkdir(parents=True)
+    (root / folder / "__init__.py").touch()
+    for command, text in commands.items():
+        (root / folder / f"{command}.py").write_text(f"def run(args=None):\n    print({text!r})\n")
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch):
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    write_folder(first, "rootcmds", {"greet": "first greet"})
+    write_folder(first, "firsttools", {"alone": "alone"})
+    write_folder(second, "rootcmds", {"greet": "second greet"})
+    (second / "rootcmds" / "helper.py").write_text("VALUE = 1\n")
+
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+    monkeypatch.setattr(source_roots.alias_finder, "aliases", {})
+    yield first, second
+    for name in [name for name in sys.modules if name.split('.')[0] in ("rootcmds", "rootcmds@second", "firsttools")]:
+        del sys.modules[name]
+
+def load(roots, tmp_path, **kwargs):
+    return load_command_roots([str(root) for root in roots], cache_folder=str(tmp_path / "cache"), **kwargs)
+
+def test_roots_merged_with_colliding_folders_renamed(roots, tmp_path):
+    folders, commands = load(roots, tmp_path)
+
+    assert sorted(folders) == ["firsttools", "rootcmds", "rootcmds@second"]
+    assert set(commands["rootcmds@second"]) == {"greet"}
+    assert find_folders(commands, "greet") == ["rootcmds", "rootcmds@second"]
+    assert str(roots[1]) in sys.path
+
+    assert capture_command("rootcmds", "greet")[1].getvalue() == "first greet\n"
+    assert capture_command("rootcmds@second", "greet")[1].getvalue() == "second greet\n"
+
+def test_collision_resolved_through_folder_menu(roots, tmp_path):
+    _, commands = load(roots, tmp_path)
+
+    with patch("cli_app.command_runner.display_menu", return_value="rootcmds@second") as display_menu, \
+            patch("cli_app.command_runner.run_command", return_value=True) as run_command:
+        assert execute_user_input("greet", commands, None) is True
+
+    display_menu.assert_called_once_with(["rootcmds", "rootcmds@second"])
+    run_command.assert_called_once_with("rootcmds@second", "greet", [])
+
+def test_slow_root_does_not_block(roots, tmp_path, caplog):
+    original_scan = source_roots.scan_root
+
+    def slow_scan(root, cache_folder):
+        if root == str(roots[1]):
+            time.sleep(2)
+        return original_scan(root, cache_folder)
+
+    started = time.monotonic()
+    with patch.object(source_roots, "scan_root", slow_scan):
+        folders, _ = load(roots, tmp_path, timeout=0.2)
+
+    assert time.monotonic() - started < 1.5
+    assert sorted(folders) == ["firsttools", "rootcmds"]
+    assert f"Scanning {roots[1]} took more than 0.2s" in caplog.text
+
+def test_warm_start_does_not_list_directories_again(roots, tmp_path):
+    expected = load(roots, tmp_path)
+
+    def fail_scan(path, follow_symlinks=False):
+        raise AssertionError(f"Unexpected rescan of {path}")
+
+    with patch("cli_app.command_loader.scan_directory", fail_scan):
+        folders, commands = load(roots, tmp_path)
+
+    assert folders == expected[0]
+    assert commands == expected[1]
+
+def test_slow_root_uses_commands_of_last_session(roots, tmp_path, caplog):
+    load(roots, tmp_path)
+
+    def hung_scan(root, cache_folder):
+        if root == str(roots[1]):
+            time.sleep(2)
+        return original_scan(root, cache_folder)
+
+    original_scan = source_roots.scan_root
+    with patch.object(source_roots, "scan_root", hung_scan):
+        folders, commands = load(roots, tmp_path, timeout=0.2)
+
+    assert sorted(folders) == ["firsttools", "rootcmds", "rootcmds@second"]
+    assert set(commands["rootcmds@second"]) == {"greet"}
+    assert "using its commands from the last session" in caplog.text
+
+def test_missing_root_is_skipped(roots, tmp_path, caplog):
+    folders, _ = load([roots[0], tmp_path / "missing"], tmp_path)
+
+    assert sorted(folders) == ["firsttools", "rootcmds"]
+    assert "Specified source folder does not exist" in caplog.text
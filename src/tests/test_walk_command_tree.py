@@ -0,0 +1,60 @@
+import os
+import pytest
+from cli_app.command_loader import walk_command_tree
+
+@pytest.fixture
+def command_tree(tmp_path):
+    """
+    Creates a source folder with command folders and directories that should be pruned.
+    """
+    (tmp_path / "folder1" / "lib").mkdir(parents=True)
+    (tmp_path / "folder1" / "__init__.py").touch()
+    (tmp_path / "folder1" / "command1.py").touch()
+    (tmp_path / "folder1" / "lib" / "helper.py").touch()
+    (tmp_path / "nested" / "folder2").mkdir(parents=True)
+    (tmp_path / "nested" / "folder2" / "__init__.py").touch()
+    (tmp_path / "nested" / "folder2" / "command2.py").touch()
+    (tmp_path / ".git" / "objects").mkdir(parents=True)
+    (tmp_path / "node_modules" / "package").mkdir(parents=True)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "__init__.py").touch()
+    (tmp_path / "my_env" / "lib").mkdir(parents=True)
+    (tmp_path / "my_env" / "pyvenv.cfg").touch()
+
+    return tmp_path
+
+def test_walk_returns_folders_and_commands(command_tree):
+    tree = walk_command_tree(str(command_tree))
+
+    assert tree.folders == ["folder1", "folder2"]
+    assert tree.commands == {
+        "folder1": {"command1": os.path.join("folder1", "command1.py")},
+        "folder2": {"command2": os.path.join("nested", "folder2", "command2.py")},
+    }
+
+def test_walk_prunes_ignored_hidden_and_virtualenv_directories(command_tree):
+    tree = walk_command_tree(str(command_tree))
+
+    # .git, node_modules, tests, folder1/lib and the my_env virtualenv
+    assert tree.skipped == 5
+    assert not any(path.startswith((".git", "node_modules", "tests")) for path in tree.directories)
+    assert os.path.join("my_env", "lib") not in tree.directories
+
+def test_walk_reuses_unchanged_directories(command_tree):
+    first = walk_command_tree(str(command_tree))
+    second = walk_command_tree(str(command_tree), directories=first.directories)
+
+    assert second.scanned == 0
+    assert second.folders == first.folders
+    assert second.commands == first.commands
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+def test_walk_follows_symlinks_without_cycles(command_tree):
+    os.symlink(command_tree / "nested", command_tree / "nested" / "folder2" / "loop")
+
+    tree = walk_command_tree(str(command_tree), follow_symlinks=True)
+    assert tree.folders == ["folder1", "folder2"]
+    assert tree.skipped == 6
+
+    tree = walk_command_tree(str(command_tree))
+    assert os.path.join("nested", "folder2", "loop") not in tree.directories
@@ -0,0 +1,158 @@
+import os
+import sys
+import pytest
+from cli_app import command_runner, result_cache, worker_pool
+from cli_app.command_runner import capture_command, execute_command_line, run_command, run_worker_request
+from cli_app.result_cache import ResultCache
+from cli_app.worker_pool import WorkerPool, command_limits
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="worker limits need the resource module")
+
+COMMANDS = {
+    "cwd": (
+        "import os\n"
+        "\n"
+        "def run(args=None):\n"
+        "    with open(os.path.join(args[0], 'cwd.txt'), 'a') as f:\n"
+        "        f.write(os.getcwd() + '\\n')\n"
+        "    os.chdir(args[0])\n"
+    ),
+    "crash": "import os\n\ndef run(args=None):\n    os._exit(3)\n",
+    "fail": "def run(args=None):\n    raise RuntimeError('broken')\n",
+    "echo": "import sys\n\ndef run(args=None):\n    print(*args)\n    print('warning', file=sys.stderr)\n",
+    "count": "def run(args=None):\n    for i in range(int(args[0])):\n        print(i)\n",
+    "grep": "import sys\n\ndef run(args=None):\n    for line in sys.stdin:\n        if args[0] in line:\n            print(line, end='')\n",
+    "head": "import sys\n\ndef run(args=None):\n    for _, line in zip(range(int(args[0])), sys.stdin):\n        print(line, end='')\n",
+    "lookup": (
+        "cacheable = True\n"
+        "\n"
+        "def run(args=None):\n"
+        "    with open(args[0], 'a') as f:\n"
+        "        f.write('run\\n')\n"
+        "    print('looked up')\n"
+    ),
+    "hungry": (
+        "import os\n"
+        "memory_limit = int(open('/proc/self/statm').read().split()[0]) * os.sysconf('SC_PAGE_SIZE') + 64 * 1024 * 1024\n"
+        "\n"
+        "def run(args=None):\n"
+        "    return bytearray(512 * 1024 * 1024)\n"
+    ),
+}
+
+@pytest.fixture
+def pool(make_command_package):
+    make_command_package("isolated_commands", COMMANDS)
+
+    pool = WorkerPool(size=1, max_runs=3, max_rss=None, preload_modules=["json"])
+    yield pool
+    pool.shutdown()
+
+def get_pid(pool: WorkerPool) -> int:
+    return pool.workers[0].process.pid
+
+def run(pool: WorkerPool, command: str, args: list[str]):
+    result = pool.run(run_worker_request, "isolated_commands", command, args)
+    return result[0] if result is not None else None
+
+def test_worker_cwd_does_not_leak(pool, tmp_path):
+    cwd = os.getcwd()
+
+    assert run(pool, "cwd", [str(tmp_path)]).succeeded is True
+    assert run(pool, "cwd", [str(tmp_path)]).succeeded is True
+
+    assert os.getcwd() == cwd
+    assert (tmp_path / "cwd.txt").read_text().splitlines() == [cwd, cwd]
+
+def test_worker_recycled_after_max_runs(pool, tmp_path):
+    first_pid = get_pid(pool)
+    for _ in range(3):
+        run(pool, "cwd", [str(tmp_path)])
+
+    assert get_pid(pool) != first_pid
+    assert len(pool.workers) == 1
+
+def test_worker_recycled_over_rss_threshold(pool, tmp_path):
+    pool.max_rss = 0
+    first_pid = get_pid(pool)
+    run(pool, "cwd", [str(tmp_path)])
+
+    assert get_pid(pool) != first_pid
+
+def test_crashed_worker_replaced(pool, tmp_path):
+    first_pid = get_pid(pool)
+
+    assert run(pool, "crash", []) is None
+    assert get_pid(pool) != first_pid
+    assert run(pool, "cwd", [str(tmp_path)]).succeeded is True
+
+def test_failures_and_unknown_commands(pool):
+    assert run(pool, "fail", []).succeeded is False
+    assert run(pool, "missing", []) is None
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_memory_limit(pool, tmp_path):
+    assert run(pool, "hungry", []).succeeded is False
+    assert run(pool, "cwd", [str(tmp_path)]).succeeded is True
+
+def test_command_limits_restored():
+    resource = pytest.importorskip("resource")
+    before = resource.getrlimit(resource.RLIMIT_AS)
+
+    with command_limits(2 ** 40, None):
+        assert resource.getrlimit(resource.RLIMIT_AS)[0] == 2 ** 40
+
+    assert resource.getrlimit(resource.RLIMIT_AS) == before
+
+FOLDERS = {"isolated_commands": {name: "" for name in COMMANDS}}
+
+@pytest.fixture
+def isolated(pool, monkeypatch):
+    monkeypatch.setattr(worker_pool, "worker_pool", WorkerPool(size=2, max_runs=100, max_rss=None, preload_modules=[]))
+    monkeypatch.setattr(command_runner, "ISOLATE_COMMANDS", True)
+    monkeypatch.setattr(command_runner, "isolated_modules", {})
+    yield
+    worker_pool.worker_pool.shutdown()
+
+def test_isolated_command_captured(isolated):
+    succeeded, output = capture_command("isolated_commands", "echo", ["a", "b"])
+
+    assert succeeded is True
+    assert output.getvalue() == "a b\nwarning\n"
+
+def test_isolated_commands_piped(isolated, capsys):
+    assert execute_command_line("count 30 | grep 2", FOLDERS, None) is True
+    assert capsys.readouterr().out.split() == ["2", "12", "20", "21", "22", "23", "24", "25", "26", "27", "28", "29"]
+
+    assert execute_command_line("count 5000 | grep 99 | grep 999", FOLDERS, None) is True
+    assert capsys.readouterr().out.split() == ["999", "1999", "2999", "3999", "4999"]
+
+def test_isolated_command_stops_when_reader_stops(isolated, capsys):
+    assert execute_command_line("count 100000000 | head 3", FOLDERS, None) is True
+    assert capsys.readouterr().out.split() == ["0", "1", "2"]
+
+def test_isolated_background_jobs_prefixed(isolated, capsys):
+    assert execute_command_line("echo first & echo second &", FOLDERS, None) is True
+    lines = capsys.readouterr().out.splitlines()
+
+    assert sorted(lines) == ["[isolated_commands.echo] first", "[isolated_commands.echo] second"]
+
+def test_isolated_cacheable_command_replayed(isolated, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(result_cache, "result_cache", ResultCache())
+    runs = tmp_path / "runs.txt"
+
+    for _ in range(3):
+        assert run_command("isolated_commands", "lookup", [str(runs)]) is True
+
+    assert capsys.readouterr().out == "looked up\n" * 3
+    assert runs.read_text() == "run\n"
+
+def test_pool_started_inside_capture_keeps_later_output(pool, monkeypatch, capsys):
+    monkeypatch.setattr(worker_pool, "worker_pool", None)
+    monkeypatch.setattr(command_runner, "ISOLATE_COMMANDS", True)
+    try:
+        assert capture_command("isolated_commands", "echo", ["captured"])[1].getvalue() == "captured\nwarning\n"
+        assert run_command("isolated_commands", "echo", ["later"]) is True
+        assert capsys.readouterr().out == "later\n"
+    finally:
+        worker_pool.shutdown_worker_pool()